@@ -1,6 +1,13 @@
 import os
+import re
+import threading
+from collections import Counter
+from datetime import date
+from typing import Any, Dict, List, Optional, Union
 from dotenv import load_dotenv
 
+from app.blockers import has_blocker
+
 try:
     import groq
     GROQ_AVAILABLE = True
@@ -8,19 +15,95 @@ except ImportError:
     groq = None
     GROQ_AVAILABLE = False
 
-load_dotenv()  
-def summarize_standup(standup_responses: list) -> str:
+load_dotenv()
+
+# A response is a dict (or object) with developer_name/developer_email, what_did_i_do, what_will_i_do, blockers;
+# plain strings are still accepted as free-text updates
+StandupUpdate = Union[Dict[str, Any], str, Any]
+
+FIELDS = ("developer_name", "developer_email", "what_did_i_do", "what_will_i_do", "blockers")
+SENTENCE_RE = re.compile(r"(?<=[.!?;])\s+|\n+")
+WORD_RE = re.compile(r"[a-z0-9][a-z0-9\-]*")
+ISSUE_KEY_RE = re.compile(r"\b[A-Z][A-Z0-9]+-\d+\b")
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have i if in into is it its me my no not of on or our so that the their
+then there these this to was we were will with would yesterday today tomorrow also some more working work worked
+""".split())
+URGENT_WORDS = frozenset({"blocked", "waiting", "failing", "failed", "broken", "down", "urgent", "outage",
+                          "access", "approval", "dependency", "review", "deadline", "risk"})
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """One Groq client per process, so calls reuse its connection pool instead of opening a new one"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = groq.Groq(
+                    api_key=os.getenv("GROQ_API_KEY"),
+                    timeout=float(os.getenv("SUMMARIZER_TIMEOUT_SECONDS", "10")),
+                    max_retries=int(os.getenv("SUMMARIZER_MAX_RETRIES", "0")),
+                )
+    return _client
+
+
+def _reset_client_after_fork():
+    global _client, _client_lock
+    _client = None
+    _client_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_client_after_fork)
+
+
+def normalize_update(update: StandupUpdate) -> Dict[str, Optional[str]]:
+    """Dict view of one update, whether given as a dict, a StandupResponse-like object or free text"""
+    if isinstance(update, str):
+        return {"developer_name": None, "developer_email": None, "what_did_i_do": update,
+                "what_will_i_do": None, "blockers": None}
+    if isinstance(update, dict):
+        return {f: update.get(f) for f in FIELDS}
+    return {f: getattr(update, f, None) for f in FIELDS}
+
+
+def _developer(update: Dict[str, Optional[str]]) -> Optional[str]:
+    return update["developer_name"] or update["developer_email"]
+
+
+def _bullet(developer: Optional[str], text: str) -> str:
+    return f"- {developer}: {text}" if developer else f"- {text}"
+
+
+def format_updates(updates: List[Dict[str, Optional[str]]]) -> str:
+    lines = []
+    for update in updates:
+        lines.append(f"- {_developer(update) or 'Unknown'}")
+        lines.append(f"  Did: {update['what_did_i_do'] or 'No information'}")
+        lines.append(f"  Will do: {update['what_will_i_do'] or 'No information'}")
+        lines.append(f"  Blockers: {update['blockers'] if has_blocker(update['blockers']) else 'None'}")
+    return "\n".join(lines)
+
+
+def summarize_standup(standup_responses: List[StandupUpdate]) -> str:
     """
-    Takes a list of standup responses from developers and generates a summary using Groq AI.
+    Takes a list of standup responses from developers and generates a summary using Groq AI,
+    falling back to a local extractive summary when Groq is unavailable, failing or too slow.
     """
-    
+    updates = [normalize_update(u) for u in standup_responses]
+    if not updates:
+        return extractive_summary(updates)
+
     prompt = f"""
     Please act as a professional Scrum Master and summarize the following daily stand-up updates into a concise, well-structured paragraph.
     Focus on progress made, plans for the day, and especially any blockers or impediments that need attention.
     Provide actionable insights and highlight any risks or dependencies.
-    
+
     Here are the individual updates:
-    {standup_responses}
+{format_updates(updates)}
 
     Provide a comprehensive summary with the following sections:
     1. Overall Progress
@@ -31,56 +114,93 @@ def summarize_standup(standup_responses: list) -> str:
 
     Summary:
     """
-    
-    
+
+
     if GROQ_AVAILABLE and os.getenv("GROQ_API_KEY"):
         try:
-            client = groq.Groq(api_key=os.getenv("GROQ_API_KEY"))
             model = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
-            
-            response = client.chat.completions.create(
+
+            response = get_client().chat.completions.create(
                 model=model,
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=800,
                 temperature=0.5
             )
-            
+
             summary = response.choices[0].message.content
             print(f"Groq AI summary generated using model: {model}")
             return summary
-            
+
         except Exception as e:
-            print(f"Error calling Groq API: {e}")
-            
-            return get_mock_summary()
+            print(f"Error calling Groq API, using extractive summary: {e}")
+            return extractive_summary(updates)
     else:
-        print("Groq not available or not configured. Using mock summary.")
-        return get_mock_summary()
-
-def get_mock_summary():
-    """Return a mock summary when Groq is not available"""
-    return """
-**AI Generated Standup Summary - [Today's Date]**
-
-**Overall Progress:**
-The team is making steady progress on current sprint goals. Most tasks are on track, with a few minor blockers reported.
-
-**Key Accomplishments:**
-- John completed the login page implementation
-- Jane fixed the database connection bug
-- Mike implemented the user profile API endpoints
-
-**Planned Work:**
-- John will work on password reset functionality (pending design feedback)
-- Jane will optimize database queries for better performance
-- Mike will start work on the notification system
-
-**Blockers and Impediments:**
-- John is waiting for design feedback on the login page (blocker)
-- Database performance issues need investigation (medium priority)
-
-**Recommendations:**
-1. Follow up with the design team for John's login page feedback
-2. Schedule a session to review database performance metrics
-3. Consider pair programming for the notification system implementation
-"""
+        print("Groq not available or not configured. Using extractive summary.")
+        return extractive_summary(updates)
+
+
+def _sentences(text: Optional[str]) -> List[str]:
+    return [s.strip(" -*•\t") for s in SENTENCE_RE.split(text or "") if len(s.strip(" -*•\t")) > 2]
+
+
+def _words(sentence: str) -> List[str]:
+    return [w for w in WORD_RE.findall(sentence.lower()) if w not in STOPWORDS and len(w) > 1]
+
+
+def _top_sentences(candidates: List[tuple], frequencies: Counter, limit: int) -> List[tuple]:
+    """Highest-scoring (developer, sentence) pairs: shared vocabulary and issue keys rank up, repeats are dropped"""
+    scored = []
+    seen = set()
+    for position, (developer, sentence) in enumerate(candidates):
+        words = _words(sentence)
+        key = " ".join(words)
+        if not words or key in seen:
+            continue
+        seen.add(key)
+        score = sum(frequencies[w] for w in set(words)) / (len(words) ** 0.5)
+        score += 2.0 * len(ISSUE_KEY_RE.findall(sentence))
+        scored.append((score, position, developer, sentence))
+    top = sorted(scored, key=lambda s: (-s[0], s[1]))[:limit]
+    # Present in the order people spoke, not by score
+    return [(developer, sentence) for _, _, developer, sentence in sorted(top, key=lambda s: s[1])]
+
+
+def extractive_summary(standup_responses: List[StandupUpdate], max_items: Optional[int] = None) -> str:
+    """Summary built from the updates' own sentences; no network, runs in milliseconds"""
+    updates = [normalize_update(u) for u in standup_responses]
+    max_items = max_items or int(os.getenv("SUMMARIZER_EXTRACTIVE_ITEMS", "5"))
+    heading = f"**Standup Summary - {date.today().isoformat()}** (extractive)"
+    if not updates:
+        return f"{heading}\n\nNo standup updates were submitted."
+
+    done = [(_developer(u), s) for u in updates for s in _sentences(u["what_did_i_do"])]
+    planned = [(_developer(u), s) for u in updates for s in _sentences(u["what_will_i_do"])]
+    blocked = [(_developer(u), u["blockers"].strip()) for u in updates if has_blocker(u["blockers"])]
+    frequencies = Counter(w for _, s in done + planned + blocked for w in set(_words(s)))
+
+    developers = {_developer(u) for u in updates if _developer(u)}
+    blocked_developers = sorted({d or "Unknown" for d, _ in blocked})
+    progress = f"{len(updates)} update(s)" + (f" from {len(developers)} developer(s)" if developers else "")
+    if blocked_developers:
+        progress += f"; {len(blocked_developers)} reported blockers ({', '.join(blocked_developers)})."
+    else:
+        progress += "; no blockers reported."
+    themes = [w for w, c in frequencies.most_common(8) if c > 1 and not w.isdigit()][:4]
+    if themes:
+        progress += f" Common themes: {', '.join(themes)}."
+
+    sections = [heading, "", "**Overall Progress:**", progress, "", "**Key Accomplishments:**"]
+    sections += [_bullet(d, s) for d, s in _top_sentences(done, frequencies, max_items)] or ["- None reported"]
+    sections += ["", "**Planned Work:**"]
+    sections += [_bullet(d, s) for d, s in _top_sentences(planned, frequencies, max_items)] or ["- None reported"]
+    sections += ["", "**Blockers and Impediments:**"]
+    # Every blocker is listed; they are what the summary exists to surface
+    sections += [_bullet(d, s) for d, s in blocked] or ["- None reported"]
+    sections += ["", "**Recommendations:**"]
+    recommendations = []
+    for developer, blocker in sorted(blocked, key=lambda b: -len(URGENT_WORDS & set(_words(b[1])))):
+        recommendations.append(f"{len(recommendations) + 1}. Follow up with {developer or 'the team'} on: {blocker}")
+    if not recommendations:
+        recommendations.append("1. No blockers reported; keep the current plan.")
+    sections += recommendations
+    return "\n".join(sections)
@@ -0,0 +1,9 @@
+from typing import Optional
+
+# Blocker answers that mean "nothing is blocking me"
+NO_BLOCKER_VALUES = frozenset({"", "none", "n/a", "na", "no", "nothing", "no blockers", "-"})
+
+
+def has_blocker(text: Optional[str]) -> bool:
+    """Whether a free-text blockers field reports an actual blocker"""
+    return (text or "").strip().lower() not in NO_BLOCKER_VALUES
@@ -1,4 +1,5 @@
 from celery import Celery
+from celery.schedules import crontab
 import os
 
 # Create Celery instance
@@ -16,6 +17,40 @@ celery_app.conf.update(
     result_serializer='json',
     timezone='UTC',
     enable_utc=True,
+    beat_schedule={
+        # Catches any Jira webhooks that were missed or failed
+        'resync-jira-issues': {
+            'task': 'app.tasks.resync_jira_issues_task',
+            'schedule': float(os.environ.get('JIRA_RESYNC_INTERVAL_SECONDS', 900)),
+        },
+        # Each project closes at its own StandupSchedule cutoff; this only checks which are due
+        'close-due-standup-sessions': {
+            'task': 'app.tasks.close_due_sessions_task',
+            'schedule': float(os.environ.get('SESSION_CLOSE_CHECK_SECONDS', 60)),
+        },
+        # Usage and trend endpoints only read the rollups; these keep them current
+        'refresh-usage-rollups': {
+            'task': 'app.tasks.refresh_usage_rollups_task',
+            'schedule': float(os.environ.get('USAGE_ROLLUP_INTERVAL_SECONDS', 300)),
+        },
+        'refresh-sentiment-trends': {
+            'task': 'app.tasks.refresh_sentiment_trends_task',
+            'schedule': float(os.environ.get('TREND_REFRESH_INTERVAL_SECONDS', 300)),
+        },
+        'sync-semantic-index': {
+            'task': 'app.tasks.sync_semantic_index_task',
+            'schedule': float(os.environ.get('SEMANTIC_SYNC_INTERVAL_SECONDS', 300)),
+        },
+        # Digests go out once a target's coalescing window (SLACK_COALESCE_SECONDS) has closed
+        'flush-slack-outbox': {
+            'task': 'app.tasks.flush_slack_outbox_task',
+            'schedule': float(os.environ.get('SLACK_FLUSH_INTERVAL_SECONDS', 15)),
+        },
+        'apply-retention': {
+            'task': 'app.tasks.apply_retention_task',
+            'schedule': crontab(hour=3, minute=15),
+        },
+    },
 )
 
 if __name__ == '__main__':
@@ -1,7 +1,7 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON, Text, Boolean, ForeignKey, Float
+from sqlalchemy import Column, Integer, BigInteger, String, Date, DateTime, JSON, Text, Boolean, ForeignKey, Float, UniqueConstraint, Index, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 import datetime
 import os
 from dotenv import load_dotenv
@@ -12,9 +12,67 @@ Base = declarative_base()
 
 # Use SQLite for development - no server required!
 DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///./autoscrum.db')
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {})
+if DATABASE_URL.startswith("postgres://"):
+    # Railway/Heroku style URLs use the scheme SQLAlchemy no longer accepts
+    DATABASE_URL = "postgresql://" + DATABASE_URL[len("postgres://"):]
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+IS_SQLITE_MEMORY = IS_SQLITE and (":memory:" in DATABASE_URL or DATABASE_URL.rstrip("/") in ("sqlite:", "sqlite+pysqlite:"))
+
+def _engine_options():
+    """Pool settings from DB_POOL_* env vars (in-memory SQLite keeps SQLAlchemy's single-connection pool)"""
+    options = {"pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")}
+    if not IS_SQLITE_MEMORY:
+        options.update(
+            pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "20")),
+            pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+            pool_timeout=int(os.getenv("DB_POOL_TIMEOUT", "30")),
+        )
+    return options
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL lets readers run alongside the writer; busy_timeout waits for locks instead of failing"""
+    cursor = dbapi_connection.cursor()
+    if not IS_SQLITE_MEMORY:
+        cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute(f"PRAGMA cache_size=-{int(os.getenv('SQLITE_CACHE_SIZE_KB', '65536'))}")
+    cursor.close()
+
+engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False} if IS_SQLITE else {}, **_engine_options())
+if IS_SQLITE:
+    event.listen(engine, "connect", _set_sqlite_pragmas)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for async endpoints (aiosqlite for SQLite, asyncpg for Postgres), created on first use
+_async_engine = None
+_AsyncSessionLocal = None
+
+def _async_database_url(url):
+    if url.startswith("sqlite"):
+        return "sqlite+aiosqlite:" + url.split(":", 1)[1]
+    if url.startswith("postgresql"):
+        return "postgresql+asyncpg:" + url.split(":", 1)[1]
+    return url
+
+def get_async_engine():
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+        from sqlalchemy.pool import AsyncAdaptedQueuePool
+        options = _engine_options()
+        if IS_SQLITE and not IS_SQLITE_MEMORY:
+            # aiosqlite otherwise defaults to NullPool, reconnecting (and re-running pragmas) per session
+            options["poolclass"] = AsyncAdaptedQueuePool
+        _async_engine = create_async_engine(_async_database_url(DATABASE_URL), **options)
+        if IS_SQLITE:
+            event.listen(_async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+        _AsyncSessionLocal = async_sessionmaker(_async_engine, class_=AsyncSession,
+                                                autoflush=False, expire_on_commit=False)
+    return _async_engine
+
 class Project(Base):
     __tablename__ = "projects"
     id = Column(Integer, primary_key=True, index=True)
@@ -62,15 +120,60 @@ class StandupResponse(Base):
     blockers = Column(Text)
     sentiment_score = Column(Float)  # -1.0 to 1.0 for more granular sentiment
     has_blockers = Column(Boolean, default=False)
-    ai_analysis = Column(JSON)  # Raw AI analysis JSON response
+    ai_analysis = Column(JSON)  # Compact AI analysis; lists live in analysis_items, the raw response in analysis_blobs
     risk_level = Column(String)  # low, medium, high, critical
     confidence_score = Column(Float)  # AI analysis confidence (0.0 to 1.0)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow, index=True)
     
     # Relationship
     session = relationship("StandupSession", back_populates="responses")
     blocked_items = relationship("BlockedItem", back_populates="response")
+    analysis_items = relationship("AnalysisItem", order_by="AnalysisItem.position")
+
+class NotificationOutbox(Base):
+    __tablename__ = "notification_outbox"
+    __table_args__ = (
+        Index('ix_notification_outbox_pending', 'status', 'target_type', 'target'),
+    )
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey('projects.id'), index=True)
+    kind = Column(String)  # session_summary, blocker
+    target_type = Column(String, nullable=False)  # channel (digest) or user (direct alert)
+    target = Column(String, nullable=False)  # Slack channel id or user id
+    dedupe_key = Column(String, unique=True)  # Repeat events for the same thing and target are dropped
+    payload = Column(JSON)  # {"section": ..., "text": ...}
+    status = Column(String, default="pending", index=True)  # pending, sending, sent, failed
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime)  # Backoff after a failed delivery
+    claim_token = Column(String, index=True)  # Set by the worker currently delivering the item
+    claimed_at = Column(DateTime)
+    sent_at = Column(DateTime)
+    error_message = Column(Text)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class AnalysisItem(Base):
+    __tablename__ = "analysis_items"
+    __table_args__ = (
+        UniqueConstraint('response_id', 'kind', 'position', name='uq_analysis_items_position'),
+        Index('ix_analysis_items_project_kind_created', 'project_id', 'kind', 'created_at'),
+    )
+    id = Column(Integer, primary_key=True, index=True)
+    response_id = Column(Integer, ForeignKey('standup_responses.id'), index=True, nullable=False)
+    session_id = Column(Integer, ForeignKey('standup_sessions.id'), index=True)
+    project_id = Column(Integer, ForeignKey('projects.id'))
+    kind = Column(String, nullable=False)  # achievement, planned_work, blocker, action
+    position = Column(Integer, default=0)  # Order within the analysis list
+    text = Column(Text)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)  # The response's created_at
+
+class AnalysisBlob(Base):
+    __tablename__ = "analysis_blobs"
+    response_id = Column(Integer, ForeignKey('standup_responses.id'), primary_key=True)
+    codec = Column(String, default="zlib")
+    raw_size = Column(Integer)  # Bytes of the uncompressed JSON
+    data = Column(LargeBinary)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
 
 class BlockedItem(Base):
     __tablename__ = "blocked_items"
@@ -142,6 +245,165 @@ class AIAnalysisLog(Base):
     error_message = Column(Text)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
 
+class AIUsageRollup(Base):
+    __tablename__ = "ai_usage_rollups"
+    __table_args__ = (
+        UniqueConstraint('project_id', 'model_used', 'analysis_type', 'day', name='uq_ai_usage_rollup_key'),
+    )
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey('projects.id'), index=True)
+    model_used = Column(String, index=True)
+    analysis_type = Column(String)
+    day = Column(Date, index=True)
+    call_count = Column(Integer, default=0)
+    error_count = Column(Integer, default=0)
+    tokens_total = Column(BigInteger, default=0)
+    latency_total_ms = Column(BigInteger, default=0)
+    latency_max_ms = Column(Integer, default=0)
+    latency_histogram = Column(JSON)  # Bucket counts over usage_analytics.LATENCY_BUCKETS_MS
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+class AnalyticsWatermark(Base):
+    __tablename__ = "analytics_watermarks"
+    name = Column(String, primary_key=True)  # e.g. ai_usage_rollups
+    last_id = Column(BigInteger, default=0)  # Highest source row id already folded in
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+class JiraIssue(Base):
+    __tablename__ = "jira_issues"
+    __table_args__ = (
+        Index('ix_jira_issues_project_status', 'project_key', 'status_category'),
+    )
+    id = Column(Integer, primary_key=True, index=True)
+    jira_id = Column(String, unique=True, index=True)
+    issue_key = Column(String, unique=True, index=True)
+    project_id = Column(Integer, ForeignKey('projects.id'), index=True)
+    project_key = Column(String, index=True)  # Matches Project.jira_project_key
+    summary = Column(Text)
+    status = Column(String)
+    status_category = Column(String)  # new, indeterminate, done
+    assignee = Column(String, index=True)
+    story_points = Column(Float)
+    sprint_id = Column(Integer, index=True)
+    sprint_name = Column(String)
+    jira_updated_at = Column(DateTime, index=True)
+    last_event_at = Column(BigInteger, default=0)  # Epoch ms of the newest event applied; older events are ignored
+    is_deleted = Column(Boolean, default=False)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+class StandupIssueLink(Base):
+    __tablename__ = "standup_issue_links"
+    __table_args__ = (
+        UniqueConstraint('response_id', 'issue_key', name='uq_standup_issue_link'),
+        Index('ix_standup_issue_links_key_mentioned', 'issue_key', 'mentioned_at'),
+    )
+    id = Column(Integer, primary_key=True, index=True)
+    response_id = Column(Integer, ForeignKey('standup_responses.id'), index=True)
+    session_id = Column(Integer, ForeignKey('standup_sessions.id'), index=True)
+    issue_key = Column(String, nullable=False)  # e.g. PROJ-123
+    project_key = Column(String, index=True)
+    field = Column(String)  # what_did_i_do, what_will_i_do, blockers (first field mentioning it)
+    mentioned_at = Column(DateTime, default=datetime.datetime.utcnow)  # StandupResponse.created_at
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class ArchivePartition(Base):
+    __tablename__ = "archive_partitions"
+    __table_args__ = (
+        Index('ix_archive_partitions_table_partition', 'table_name', 'partition'),
+    )
+    id = Column(Integer, primary_key=True, index=True)
+    table_name = Column(String, nullable=False)  # ai_analysis_logs, standup_ai_analysis
+    partition = Column(String, nullable=False)  # YYYY-MM of the archived rows' created_at
+    path = Column(String, nullable=False)  # Relative to ARCHIVE_DIR
+    codec = Column(String)  # zstd, gzip
+    row_count = Column(Integer, default=0)
+    min_id = Column(Integer)
+    max_id = Column(Integer)
+    min_created_at = Column(DateTime)
+    max_created_at = Column(DateTime)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class SentimentDaily(Base):
+    __tablename__ = "sentiment_daily"
+    __table_args__ = (
+        UniqueConstraint('project_id', 'developer_email', 'day', name='uq_sentiment_daily_key'),
+    )
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey('projects.id'), index=True)
+    developer_email = Column(String, index=True)
+    day = Column(Date, index=True)  # StandupResponse.created_at date (UTC)
+    response_count = Column(Integer, default=0)
+    sentiment_count = Column(Integer, default=0)  # Responses with a sentiment_score
+    sentiment_sum = Column(Float, default=0.0)
+    blocker_count = Column(Integer, default=0)
+    risk_count = Column(Integer, default=0)  # Responses with a known risk_level
+    risk_score_sum = Column(Float, default=0.0)  # low=0, medium=1, high=2, critical=3
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+class SprintBurndown(Base):
+    __tablename__ = "sprint_burndowns"
+    id = Column(Integer, primary_key=True, index=True)
+    sprint_id = Column(Integer, unique=True, index=True)  # Jira sprint id
+    sprint_name = Column(String)
+    project_key = Column(String, index=True)
+    state = Column(String)  # future, active, closed
+    start_date = Column(Date)
+    end_date = Column(Date)
+    scope_points = Column(Float, default=0.0)
+    remaining_points = Column(Float, default=0.0)
+    completed_points = Column(Float, default=0.0)
+    issues_total = Column(Integer, default=0)
+    issues_done = Column(Integer, default=0)
+    version = Column(Integer, default=0)  # Bumped on every change; keys the chart cache
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+class BurndownSnapshot(Base):
+    __tablename__ = "burndown_snapshots"
+    __table_args__ = (
+        UniqueConstraint('sprint_id', 'day', name='uq_burndown_snapshot_day'),
+    )
+    id = Column(Integer, primary_key=True, index=True)
+    sprint_id = Column(Integer, index=True)
+    day = Column(Date, nullable=False)  # End-of-day totals; days without a row carry the previous one forward
+    scope_points = Column(Float, default=0.0)
+    remaining_points = Column(Float, default=0.0)
+    completed_points = Column(Float, default=0.0)
+    issues_total = Column(Integer, default=0)
+    issues_done = Column(Integer, default=0)
+    standup_issues = Column(Integer, default=0)  # Sprint issues first mentioned in a standup that day
+
+class StandupSchedule(Base):
+    __tablename__ = "standup_schedules"
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey('projects.id'), unique=True, index=True)
+    cutoff_time = Column(String, default="09:30")  # HH:MM local time after which the day's session closes
+    timezone = Column(String, default="UTC")  # IANA name, e.g. Europe/Berlin
+    is_active = Column(Boolean, default=True)
+    last_closed_date = Column(Date)  # Local date of the most recent close, so each day closes once
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+class SessionProcessingJob(Base):
+    __tablename__ = "session_processing_jobs"
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(Integer, ForeignKey('standup_sessions.id'), unique=True, index=True)
+    project_id = Column(Integer, ForeignKey('projects.id'), index=True)
+    status = Column(String, default="queued")  # queued, processing, completed, failed
+    total_responses = Column(Integer, default=0)  # Responses that still needed analysis at close
+    analyzed_responses = Column(Integer, default=0)
+    failed_responses = Column(Integer, default=0)
+    first_wave = Column(Integer)
+    summary_wave = Column(Integer)
+    scheduled_from = Column(DateTime)  # When the first task for this session is due
+    summary_scheduled_at = Column(DateTime)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    error_message = Column(Text)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
 # Database utility functions
 def get_db():
     """Dependency for getting database session"""
@@ -151,6 +413,30 @@ def get_db():
     finally:
         db.close()
 
+async def dispose_async_engine():
+    """Close pooled async connections, e.g. on application shutdown"""
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = _AsyncSessionLocal = None
+
+def _reset_engines_after_fork():
+    # A forked worker must not share the parent's pooled sockets; drop them without closing the parent's
+    global _async_engine, _AsyncSessionLocal
+    engine.dispose(close=False)
+    if _async_engine is not None:
+        _async_engine.sync_engine.dispose(close=False)
+        _async_engine = _AsyncSessionLocal = None
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_engines_after_fork)
+
+async def get_async_db():
+    """Dependency for getting an async database session"""
+    get_async_engine()
+    async with _AsyncSessionLocal() as db:
+        yield db
+
 def init_db():
     """Initialize database tables"""
     Base.metadata.create_all(bind=engine)
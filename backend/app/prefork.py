@@ -0,0 +1,24 @@
+import gc
+
+from app.models import engine
+from app.services.config_cache import config_cache
+from app.services.semantic_index import semantic_index
+
+
+def warm_shared_state():
+    """Load read-mostly data in a preloading parent so forked workers share it copy-on-write.
+
+    Called once by gunicorn (see gunicorn.conf.py) after the app is imported and before any
+    worker forks. Sockets are not shared: the parent's pooled DB connections are closed here,
+    and every module holding a connection pool or HTTP client resets it in the child through
+    os.register_at_fork.
+    """
+    config_cache.warm()
+    try:
+        semantic_index.warm()
+    except Exception as e:
+        print(f"Semantic index not preloaded, workers will load it on first use: {e}")
+    engine.dispose()
+    # Keep the cyclic GC in workers from touching (and so copying) every page inherited from the parent
+    gc.freeze()
+    print(f"Shared state warmed before fork: {gc.get_freeze_count()} objects frozen")
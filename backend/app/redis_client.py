@@ -0,0 +1,29 @@
+import os
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+_client = None
+
+
+def get_redis():
+    """Shared Redis client for REDIS_URL, or None when Redis isn't configured or installed"""
+    global _client
+    url = os.environ.get("REDIS_URL")
+    if redis is None or not url:
+        return None
+    if _client is None:
+        _client = redis.Redis.from_url(url, socket_timeout=2, socket_connect_timeout=2, health_check_interval=30)
+    return _client
+
+
+def _reset_after_fork():
+    # Reconnect lazily in the child instead of reusing the parent's sockets
+    global _client
+    _client = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
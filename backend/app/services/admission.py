@@ -0,0 +1,173 @@
+import os
+import re
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Callable
+
+from app.ai.standup_summarizer import SENTENCE_RE, URGENT_WORDS
+from app.blockers import has_blocker
+
+POSITIVE_WORDS = frozenset({"finished", "completed", "shipped", "merged", "fixed", "done", "released", "resolved",
+                            "deployed", "great", "good", "progress", "unblocked"})
+NEGATIVE_WORDS = frozenset({"stuck", "blocked", "failing", "failed", "broken", "slow", "waiting", "delayed", "issue",
+                            "bug", "problem", "frustrated", "outage", "regression"})
+WORD_RE = re.compile(r"[a-z]+")
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed instead of waiting for an analysis slot"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"Analysis capacity exhausted ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def local_analysis(standup_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Keyword-level analysis returned when a request is shed; same keys as a provider analysis"""
+    def sentences(text):
+        return [s.strip(" -*\t") for s in SENTENCE_RE.split(text or "") if s.strip(" -*\t")]
+
+    blockers = standup_data.get('blockers')
+    blocked = has_blocker(blockers)
+    text = " ".join(standup_data.get(f) or "" for f in ("what_did_i_do", "what_will_i_do", "blockers"))
+    words = WORD_RE.findall(text.lower())
+    positive = sum(w in POSITIVE_WORDS for w in words)
+    negative = sum(w in NEGATIVE_WORDS for w in words)
+    sentiment = round((positive - negative) / max(positive + negative, 1), 2)
+    urgent = blocked and bool(URGENT_WORDS & set(WORD_RE.findall(blockers.lower())))
+    return {
+        "sentiment_score": sentiment,
+        "sentiment_label": "positive" if sentiment > 0.2 else "negative" if sentiment < -0.2 else "neutral",
+        "risk_level": "high" if urgent else "medium" if blocked else "low",
+        "confidence_score": 0.3,
+        "key_achievements": sentences(standup_data.get('what_did_i_do')),
+        "planned_work": sentences(standup_data.get('what_will_i_do')),
+        "critical_blockers": [blockers.strip()] if blocked else [],
+        "suggested_actions": ["Follow up on the reported blocker"] if blocked else [],
+        "productivity_insight": "Preliminary keyword analysis; the full AI analysis is pending",
+    }
+
+
+class AdmissionController:
+    """Bounds concurrent provider calls per process, globally and per project.
+
+    Requests wait in a bounded FIFO for a slot. A request is shed instead of queued when the
+    queue is full or when, going by recent call latency, it could not finish before its
+    deadline; a waiter whose deadline passes while queued is shed too. Waiters whose project
+    is at its limit are skipped, so one busy project cannot block the others.
+    """
+
+    def __init__(self):
+        self.max_concurrency = int(os.getenv("ANALYZE_MAX_CONCURRENCY", "8"))
+        self.project_concurrency = int(os.getenv("ANALYZE_PROJECT_CONCURRENCY", "3"))
+        # Waiters hold a threadpool thread, so running + queued stays well under the pool size (40)
+        self.max_queue = int(os.getenv("ANALYZE_QUEUE_SIZE", "16"))
+        self.default_deadline = float(os.getenv("ANALYZE_DEADLINE_SECONDS", "20"))
+        self.latency_alpha = float(os.getenv("ANALYZE_LATENCY_EWMA_ALPHA", "0.2"))
+        self._cond = threading.Condition()
+        self._waiting: List[Dict[str, Any]] = []
+        self._running = 0
+        self._running_by_project: Dict[Any, int] = {}
+        self._latency = float(os.getenv("ANALYZE_INITIAL_LATENCY_SECONDS", "2"))
+        self._deferrer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="analysis-defer")
+        self.stats = {"admitted": 0, "completed": 0, "shed_queue_full": 0, "shed_deadline": 0,
+                      "shed_timeout": 0, "wait_total_ms": 0.0, "max_queue_depth": 0,
+                      "deferred": 0, "defer_errors": 0}
+
+    def _estimated_wait(self, position: int) -> float:
+        # Slots free up about every latency / concurrency seconds
+        return position * self._latency / max(self.max_concurrency, 1)
+
+    def _can_start(self, ticket: Dict[str, Any]) -> bool:
+        if self._running >= self.max_concurrency:
+            return False
+        if self._running_by_project.get(ticket["project"], 0) >= self.project_concurrency:
+            return False
+        # First in line among waiters that could run now
+        for waiter in self._waiting:
+            if waiter is ticket:
+                return True
+            if self._running_by_project.get(waiter["project"], 0) < self.project_concurrency:
+                return False
+        return False
+
+    @contextmanager
+    def admit(self, project_id: Optional[int], timeout: Optional[float] = None):
+        """Hold an analysis slot for the block, or raise Overloaded without waiting past the deadline"""
+        budget = self.default_deadline if timeout is None else min(timeout, self.default_deadline)
+        arrived = time.monotonic()
+        deadline = arrived + budget
+        ticket = {"project": project_id}
+        with self._cond:
+            if len(self._waiting) >= self.max_queue:
+                self.stats["shed_queue_full"] += 1
+                raise Overloaded("queue_full", self._estimated_wait(len(self._waiting)))
+            if self._running >= self.max_concurrency and \
+                    self._estimated_wait(len(self._waiting) + 1) + self._latency > budget:
+                self.stats["shed_deadline"] += 1
+                raise Overloaded("deadline", self._estimated_wait(len(self._waiting) + 1))
+            self._waiting.append(ticket)
+            self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], len(self._waiting))
+            try:
+                while not self._can_start(ticket):
+                    # Give up once the call could no longer finish in time
+                    remaining = deadline - time.monotonic() - self._latency
+                    if remaining <= 0:
+                        self.stats["shed_timeout"] += 1
+                        raise Overloaded("timeout", self._estimated_wait(len(self._waiting)))
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting.remove(ticket)
+                # Our leaving may let a waiter behind us go first
+                self._cond.notify_all()
+            self._running += 1
+            self._running_by_project[project_id] = self._running_by_project.get(project_id, 0) + 1
+            self.stats["admitted"] += 1
+            self.stats["wait_total_ms"] += (time.monotonic() - arrived) * 1000
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            with self._cond:
+                self._running -= 1
+                self._running_by_project[project_id] -= 1
+                if not self._running_by_project[project_id]:
+                    del self._running_by_project[project_id]
+                self._latency += self.latency_alpha * (elapsed - self._latency)
+                self.stats["completed"] += 1
+                self._cond.notify_all()
+
+    def defer(self, dispatch: Callable[[], Any], label: str):
+        """Run a dispatch (e.g. queueing a Celery task) off the request thread; a down broker must not stall shedding"""
+        def run():
+            try:
+                dispatch()
+                self.stats["deferred"] += 1
+            except Exception as e:
+                self.stats["defer_errors"] += 1
+                print(f"Could not queue deferred analysis for {label}: {e}")
+        self._deferrer.submit(run)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            admitted = self.stats["admitted"]
+            shed = self.stats["shed_queue_full"] + self.stats["shed_deadline"] + self.stats["shed_timeout"]
+            return {
+                **{k: v for k, v in self.stats.items() if k != "wait_total_ms"},
+                "shed": shed,
+                "queue_depth": len(self._waiting),
+                "in_flight": self._running,
+                "in_flight_by_project": dict(self._running_by_project),
+                "avg_wait_ms": round(self.stats["wait_total_ms"] / admitted, 1) if admitted else None,
+                "latency_ewma_ms": round(self._latency * 1000, 1),
+                "limits": {"max_concurrency": self.max_concurrency, "project_concurrency": self.project_concurrency,
+                           "queue_size": self.max_queue, "deadline_seconds": self.default_deadline},
+            }
+
+
+# Global instance
+admission_controller = AdmissionController()
@@ -4,6 +4,7 @@ import time
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 from app.models import SessionLocal, AIAnalysisLog
+from app.ai.standup_summarizer import extractive_summary
 
 
 try:
@@ -60,7 +61,7 @@ class AIAnalysisService:
                 print(f"Groq summary failed: {e}")
         
        
-        return {"summary": self._get_mock_summary()}
+        return {"summary": extractive_summary(responses), "metadata": {"model": "extractive"}}
 
     def _get_mock_response(self) -> Dict[str, Any]:
         """Fallback mock response when no AI service is available"""
@@ -76,17 +77,5 @@ class AIAnalysisService:
             "productivity_insight": "Developer is making good progress"
         }
 
-    def _get_mock_summary(self) -> str:
-        """Fallback mock summary"""
-        return """
-        **Daily Standup Summary**
-        
-        **Overall Progress**: Team is making good progress on current sprint goals.
-        **Key Achievements**: Backend API development completed, login functionality implemented.
-        **Planned Work**: Database integration, testing phase preparation.
-        **Blockers**: No critical blockers reported.
-        **Recommendations**: Continue current pace, focus on testing.
-        """
-
 
 ai_service = AIAnalysisService()
@@ -0,0 +1,199 @@
+import os
+import json
+import zlib
+import datetime
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models import StandupSession, StandupResponse, BlockedItem, AnalysisItem, AnalysisBlob
+
+# Analysis list field -> AnalysisItem.kind
+LIST_FIELDS = {
+    "key_achievements": "achievement",
+    "planned_work": "planned_work",
+    "critical_blockers": "blocker",
+    "suggested_actions": "action",
+}
+FIELD_FOR_KIND = {kind: field for field, kind in LIST_FIELDS.items()}
+SCALAR_FIELDS = ("sentiment_score", "sentiment_label", "risk_level", "confidence_score", "productivity_insight")
+METADATA_FIELDS = ("model", "tier")
+STORAGE_MODES = ("compressed", "drop", "inline")
+SEVERITIES = ("low", "medium", "high", "critical")
+
+
+def _texts(value: Any) -> List[str]:
+    # Models sometimes answer with a bare string or objects instead of a list of strings
+    if value is None:
+        return []
+    if isinstance(value, (str, dict)):
+        value = [value]
+    texts = []
+    for item in value:
+        if isinstance(item, dict):
+            item = item.get("description") or item.get("text") or json.dumps(item, sort_keys=True)
+        text = str(item).strip()
+        if text:
+            texts.append(text)
+    return texts
+
+
+def _normalize(text: Optional[str]) -> str:
+    return " ".join((text or "").lower().split())
+
+
+class AnalysisStore:
+    """Stores AI analysis results as indexed rows instead of one JSON document per response.
+
+    The lists go to analysis_items, critical blockers also open BlockedItem rows, and
+    StandupResponse.ai_analysis keeps only the scalar fields. The raw provider response is
+    kept zlib-compressed in analysis_blobs (ANALYSIS_RAW_STORAGE=compressed), not kept at all
+    (drop; the analysis is rebuilt from the rows), or left inline as before (inline).
+    """
+
+    def __init__(self):
+        self.mode = os.getenv("ANALYSIS_RAW_STORAGE", "compressed")
+        if self.mode not in STORAGE_MODES:
+            raise ValueError(f"ANALYSIS_RAW_STORAGE must be one of {STORAGE_MODES}")
+        self.compression_level = int(os.getenv("ANALYSIS_COMPRESSION_LEVEL", "6"))
+        self.backfill_batch = int(os.getenv("ANALYSIS_BACKFILL_BATCH", "500"))
+
+    def compact(self, analysis: Dict[str, Any]) -> Dict[str, Any]:
+        metadata = analysis.get("metadata") or {}
+        compact = {f: analysis[f] for f in SCALAR_FIELDS if analysis.get(f) is not None}
+        compact["metadata"] = {f: metadata[f] for f in METADATA_FIELDS if metadata.get(f) is not None}
+        compact["storage"] = self.mode
+        return compact
+
+    def save(self, db: Session, response: StandupResponse, analysis: Dict[str, Any],
+             project_id: Optional[int] = None, open_blockers: bool = True) -> List[BlockedItem]:
+        """Apply an analysis to a response and return the BlockedItems it opened; the caller commits"""
+        if project_id is None and response.session_id is not None:
+            session = db.get(StandupSession, response.session_id)
+            project_id = session.project_id if session else None
+        blockers = _texts(analysis.get("critical_blockers"))
+        response.sentiment_score = analysis.get("sentiment_score")
+        response.risk_level = analysis.get("risk_level")
+        response.confidence_score = analysis.get("confidence_score")
+        response.has_blockers = bool(blockers)
+
+        # A re-analysis replaces the previous lists and blob
+        db.query(AnalysisItem).filter(AnalysisItem.response_id == response.id).delete(synchronize_session=False)
+        db.query(AnalysisBlob).filter(AnalysisBlob.response_id == response.id).delete(synchronize_session=False)
+        created_at = response.created_at or datetime.datetime.utcnow()
+        db.add_all([
+            AnalysisItem(response_id=response.id, session_id=response.session_id, project_id=project_id,
+                         kind=kind, position=position, text=text, created_at=created_at)
+            for field, kind in LIST_FIELDS.items()
+            for position, text in enumerate(_texts(analysis.get(field)))
+        ])
+        if self.mode == "inline":
+            response.ai_analysis = analysis
+        else:
+            response.ai_analysis = self.compact(analysis)
+            if self.mode == "compressed":
+                raw = json.dumps(analysis, separators=(",", ":"), default=str).encode("utf-8")
+                db.add(AnalysisBlob(response_id=response.id, codec="zlib", raw_size=len(raw),
+                                    data=zlib.compress(raw, self.compression_level)))
+        return self._open_blockers(db, response, blockers) if open_blockers else []
+
+    def _open_blockers(self, db: Session, response: StandupResponse, blockers: List[str]) -> List[BlockedItem]:
+        # Blockers already on file for the response (imported, or from an earlier analysis) are not duplicated
+        existing = {_normalize(d) for (d,) in db.query(BlockedItem.blocker_description)
+                    .filter(BlockedItem.response_id == response.id)}
+        severity = response.risk_level if response.risk_level in SEVERITIES else "medium"
+        created = []
+        for text in blockers:
+            if _normalize(text) in existing:
+                continue
+            existing.add(_normalize(text))
+            item = BlockedItem(session_id=response.session_id, response_id=response.id, blocker_description=text,
+                               severity=severity, status="open", ai_priority_score=response.confidence_score)
+            db.add(item)
+            created.append(item)
+        return created
+
+    def expand_many(self, db: Session, analyses: Dict[int, Any]) -> Dict[int, Any]:
+        """Full analyses for {response_id: stored ai_analysis}, decompressing or rebuilding compact ones"""
+        result = dict(analyses)
+        compact_ids = [rid for rid, a in analyses.items()
+                       if isinstance(a, dict) and a.get("storage") in ("compressed", "drop")]
+        if not compact_ids:
+            return result
+        blobs = {b.response_id: b for b in db.query(AnalysisBlob).filter(AnalysisBlob.response_id.in_(compact_ids))}
+        rebuild = []
+        for rid in compact_ids:
+            blob = blobs.get(rid)
+            if blob is not None:
+                result[rid] = json.loads(zlib.decompress(blob.data))
+            else:
+                full = {k: v for k, v in analyses[rid].items() if k != "storage"}
+                full.update({field: [] for field in LIST_FIELDS})
+                result[rid] = full
+                rebuild.append(rid)
+        if rebuild:
+            items = db.query(AnalysisItem.response_id, AnalysisItem.kind, AnalysisItem.text) \
+                .filter(AnalysisItem.response_id.in_(rebuild)) \
+                .order_by(AnalysisItem.response_id, AnalysisItem.kind, AnalysisItem.position)
+            for rid, kind, text in items:
+                result[rid][FIELD_FOR_KIND[kind]].append(text)
+        return result
+
+    def load(self, db: Session, response: StandupResponse) -> Optional[Dict[str, Any]]:
+        """The full analysis for a response, however it was stored"""
+        return self.expand_many(db, {response.id: response.ai_analysis})[response.id]
+
+    def items(self, db: Session, kind: Optional[str] = None, project_id: Optional[int] = None,
+              session_id: Optional[int] = None, since: Optional[datetime.datetime] = None,
+              limit: int = 100) -> List[Dict[str, Any]]:
+        """Analysis list entries, newest first, straight from the indexed rows"""
+        if kind is not None and kind not in FIELD_FOR_KIND:
+            raise ValueError(f"kind must be one of {sorted(FIELD_FOR_KIND)}")
+        query = db.query(AnalysisItem, StandupResponse.developer_email) \
+            .join(StandupResponse, StandupResponse.id == AnalysisItem.response_id)
+        if kind is not None:
+            query = query.filter(AnalysisItem.kind == kind)
+        if project_id is not None:
+            query = query.filter(AnalysisItem.project_id == project_id)
+        if session_id is not None:
+            query = query.filter(AnalysisItem.session_id == session_id)
+        if since is not None:
+            query = query.filter(AnalysisItem.created_at >= since)
+        rows = query.order_by(AnalysisItem.created_at.desc(), AnalysisItem.id).limit(limit).all()
+        return [{
+            "kind": item.kind,
+            "text": item.text,
+            "response_id": item.response_id,
+            "session_id": item.session_id,
+            "project_id": item.project_id,
+            "developer_email": developer_email,
+            "created_at": item.created_at,
+        } for item, developer_email in rows]
+
+    def backfill(self, db: Session, limit: Optional[int] = None) -> Dict[str, int]:
+        """Normalize responses analyzed before this storage existed; their blockers are not reopened"""
+        if self.mode == "inline":
+            return {"responses": 0}
+        converted = 0
+        last_id = 0
+        while limit is None or converted < limit:
+            # The last batch is cut to what is left of the limit, so a run never converts more than asked
+            size = self.backfill_batch if limit is None else min(self.backfill_batch, limit - converted)
+            batch = db.query(StandupResponse).filter(StandupResponse.id > last_id,
+                                                     StandupResponse.ai_analysis.isnot(None)) \
+                .order_by(StandupResponse.id).limit(size).all()
+            if not batch:
+                break
+            for response in batch:
+                analysis = response.ai_analysis
+                # Archived summaries and already-normalized rows carry no lists to move
+                if isinstance(analysis, dict) and "storage" not in analysis and "archived" not in analysis:
+                    self.save(db, response, analysis, open_blockers=False)
+                    converted += 1
+            last_id = batch[-1].id
+            db.commit()
+        return {"responses": converted}
+
+
+# Global instance
+analysis_store = AnalysisStore()
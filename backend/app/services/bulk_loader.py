@@ -0,0 +1,351 @@
+import io
+import csv
+import json
+import time
+import datetime
+from itertools import islice
+from typing import Dict, Any, List, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.models import engine as default_engine, Project, StandupSession, StandupResponse, BlockedItem
+from app.blockers import has_blocker
+
+COPY_NULL = r"\N"
+MODELS = (Project, StandupSession, StandupResponse, BlockedItem)
+RECORD_FIELDS = [
+    "project_key", "project_name", "date", "developer_email", "developer_name",
+    "what_did_i_do", "what_will_i_do", "blockers", "sentiment_score", "risk_level", "created_at",
+]
+
+
+def _parse_datetime(value) -> Optional[datetime.datetime]:
+    if value in (None, ""):
+        return None
+    if isinstance(value, datetime.datetime):
+        return value
+    if isinstance(value, datetime.date):
+        return datetime.datetime.combine(value, datetime.time())
+    return datetime.datetime.fromisoformat(str(value).replace("Z", "+00:00")).replace(tzinfo=None)
+
+
+def _parse_float(value) -> Optional[float]:
+    return None if value in (None, "") else float(value)
+
+
+def read_records(path: str, fmt: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Stream standup records from a CSV (with header) or JSONL file"""
+    fmt = fmt or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _csv_field(value) -> str:
+    # Every non-null value is quoted, so only the unquoted marker reads back as NULL and empty strings survive
+    if value is None:
+        return COPY_NULL
+    if isinstance(value, (bool, int, float)):
+        return str(value)
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def _chunks(iterable: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class _IdSource:
+    """Primary keys for rows inserted with explicit ids that cannot collide with the API's inserts.
+
+    Postgres hands out blocks from each table's own sequence. SQLite has no sequences, so each
+    chunk takes the database write lock before reading MAX(id) and keeps it until the chunk commits.
+    """
+
+    def __init__(self, conn: Connection, dialect: str, block_size: int):
+        self.conn = conn
+        self.dialect = dialect
+        self.block_size = block_size
+        self._free: Dict[Any, List[int]] = {model: [] for model in MODELS}
+        self._next: Dict[Any, int] = {}
+
+    def begin_chunk(self):
+        if self.dialect == "postgresql":
+            return
+        if self.dialect == "sqlite":
+            self.conn.exec_driver_sql("BEGIN IMMEDIATE")
+        self._next = {model: (self.conn.execute(select(func.max(model.id))).scalar() or 0) + 1 for model in MODELS}
+
+    def take(self, model) -> int:
+        if self.dialect != "postgresql":
+            value = self._next[model]
+            self._next[model] += 1
+            return value
+        free = self._free[model]
+        if not free:
+            name = model.__tablename__
+            free.extend(sorted(self.conn.execute(text(
+                f"SELECT nextval(pg_get_serial_sequence('{name}', 'id')) FROM generate_series(1, :n)"
+            ), {"n": self.block_size}).scalars(), reverse=True))
+        return free.pop()
+
+
+class BulkLoader:
+    """Loads standup history with explicit ids and batched inserts (COPY on Postgres).
+
+    A record whose (project, date, developer) is already in the database, or earlier in the
+    file, is skipped, so re-running an import does not duplicate it.
+    """
+
+    def __init__(self, engine: Optional[Engine] = None, chunk_size: int = 50000):
+        self.engine = engine or default_engine
+        self.dialect = self.engine.dialect.name
+        self.chunk_size = chunk_size
+
+    def load(self, records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        stats = {"projects": 0, "sessions": 0, "responses": 0, "blocked_items": 0, "duplicates": 0}
+        with self.engine.connect() as conn:
+            project_ids = {key: pid for pid, key in conn.execute(select(Project.id, Project.jira_project_key))}
+            session_ids: Dict[Tuple[int, datetime.date], int] = {}
+            loaded_sessions = set()
+            submitted = set()  # (session_id, developer_email) already in the database or this file
+            ids = _IdSource(conn, self.dialect, min(self.chunk_size, 10000))
+            new_sessions = set()
+            touched_sessions = set()
+
+            for chunk in _chunks(records, self.chunk_size):
+                ids.begin_chunk()
+                rows = {model: [] for model in MODELS}
+                now = datetime.datetime.utcnow()
+                for record in chunk:
+                    key = record["project_key"]
+                    project_id = project_ids.get(key)
+                    if project_id is None:
+                        project_id = project_ids[key] = ids.take(Project)
+                        rows[Project].append({
+                            "id": project_id, "name": record.get("project_name") or key, "jira_project_key": key,
+                            "is_active": True, "created_at": now, "updated_at": now,
+                        })
+                    if project_id not in loaded_sessions:
+                        # Reuse sessions already in the database instead of duplicating a day
+                        for sid, day in conn.execute(select(StandupSession.id, StandupSession.date)
+                                                     .where(StandupSession.project_id == project_id)):
+                            session_ids.setdefault((project_id, _parse_datetime(day).date()), sid)
+                        submitted.update(conn.execute(
+                            select(StandupResponse.session_id, StandupResponse.developer_email)
+                            .join(StandupSession, StandupSession.id == StandupResponse.session_id)
+                            .where(StandupSession.project_id == project_id,
+                                   StandupResponse.developer_email.isnot(None))).tuples())
+                        loaded_sessions.add(project_id)
+
+                    created_at = _parse_datetime(record.get("created_at")) or _parse_datetime(record["date"])
+                    day = _parse_datetime(record["date"]).date() if record.get("date") else created_at.date()
+                    session_id = session_ids.get((project_id, day))
+                    developer = record.get("developer_email") or None
+                    if developer is not None and (session_id, developer) in submitted:
+                        stats["duplicates"] += 1
+                        continue
+                    if session_id is None:
+                        session_id = session_ids[(project_id, day)] = ids.take(StandupSession)
+                        new_sessions.add(session_id)
+                        session_at = datetime.datetime.combine(day, datetime.time())
+                        rows[StandupSession].append({
+                            "id": session_id, "project_id": project_id, "date": session_at, "status": "completed",
+                            "participant_count": 0, "blocker_count": 0, "created_at": session_at, "updated_at": session_at,
+                        })
+                    touched_sessions.add(session_id)
+                    if developer is not None:
+                        submitted.add((session_id, developer))
+
+                    # "None", "n/a" and the like are stored as NULL so they never read back as a blocker
+                    has_blockers = has_blocker(record.get("blockers"))
+                    blockers = record.get("blockers") if has_blockers else None
+                    response_id = ids.take(StandupResponse)
+                    rows[StandupResponse].append({
+                        "id": response_id, "session_id": session_id,
+                        "developer_email": developer,
+                        "developer_name": record.get("developer_name"),
+                        "what_did_i_do": record.get("what_did_i_do"),
+                        "what_will_i_do": record.get("what_will_i_do"),
+                        "blockers": blockers,
+                        "sentiment_score": _parse_float(record.get("sentiment_score")),
+                        "has_blockers": has_blockers,
+                        "risk_level": record.get("risk_level") or None,
+                        "created_at": created_at, "updated_at": created_at,
+                    })
+                    if has_blockers:
+                        rows[BlockedItem].append({
+                            "id": ids.take(BlockedItem), "session_id": session_id, "response_id": response_id,
+                            "blocker_description": blockers, "severity": record.get("severity") or "medium",
+                            "status": record.get("blocker_status") or "open",
+                            "created_at": created_at, "updated_at": created_at,
+                        })
+
+                # Parents before children so foreign keys always resolve
+                for model in MODELS:
+                    self._insert(conn, model, rows[model])
+                conn.commit()
+                stats["projects"] += len(rows[Project])
+                stats["sessions"] += len(rows[StandupSession])
+                stats["responses"] += len(rows[StandupResponse])
+                stats["blocked_items"] += len(rows[BlockedItem])
+
+            self._refresh_session_counts(conn, touched_sessions, new_sessions)
+            conn.commit()
+
+        stats["seconds"] = round(time.perf_counter() - started, 2)
+        return stats
+
+    def _insert(self, conn: Connection, model, rows: List[Dict[str, Any]]):
+        if not rows:
+            return
+        table = model.__table__
+        if self.dialect == "postgresql":
+            self._copy(conn, table.name, rows)
+        elif self.dialect == "sqlite":
+            self._executemany(conn, table.name, rows)
+        else:
+            conn.execute(table.insert(), rows)
+
+    def _executemany(self, conn: Connection, table_name: str, rows: List[Dict[str, Any]]):
+        """Plain DBAPI executemany; SQLAlchemy's per-value bind processing costs more than the insert"""
+        columns = list(rows[0])
+        placeholders = ", ".join("?" for _ in columns)
+        # Same text format SQLAlchemy's SQLite DateTime type writes, so comparisons keep working
+        params = [tuple(v.strftime("%Y-%m-%d %H:%M:%S.%f") if isinstance(v, datetime.datetime) else v
+                        for v in (row[c] for c in columns)) for row in rows]
+        cursor = conn.connection.cursor()
+        try:
+            cursor.executemany(f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})", params)
+        finally:
+            cursor.close()
+
+    def _copy(self, conn: Connection, table_name: str, rows: List[Dict[str, Any]]):
+        columns = list(rows[0])
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write(",".join(_csv_field(row[c]) for c in columns))
+            buffer.write("\n")
+        buffer.seek(0)
+        cursor = conn.connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY {table_name} ({', '.join(columns)}) FROM STDIN "
+                               f"WITH (FORMAT csv, NULL '{COPY_NULL}')", buffer)
+        finally:
+            cursor.close()
+
+    def _refresh_session_counts(self, conn: Connection, session_ids: set, new_ids: set):
+        """Recompute participant/blocker counts once, in SQL, for every session we added rows to"""
+        if not session_ids:
+            return
+        statement = text(
+            "UPDATE standup_sessions SET "
+            "participant_count = (SELECT COUNT(DISTINCT r.developer_email) FROM standup_responses r "
+            "WHERE r.session_id = standup_sessions.id), "
+            "blocker_count = (SELECT COUNT(*) FROM blocked_items b WHERE b.session_id = standup_sessions.id) "
+            "WHERE id >= :low AND id <= :high"
+        )
+        # New sessions are mostly one id range; sessions that already existed are updated one by one
+        if new_ids:
+            conn.execute(statement, {"low": min(new_ids), "high": max(new_ids)})
+        for sid in session_ids - new_ids:
+            conn.execute(statement, {"low": sid, "high": sid})
+
+
+# Vocabulary for synthetic standups
+_WORK = [
+    "implemented the {area} API endpoints", "fixed a bug in {area}", "reviewed pull requests for {area}",
+    "wrote unit tests for {area}", "refactored the {area} module", "paired on {area} performance",
+    "updated documentation for {area}", "investigated flaky tests in {area}", "deployed {area} to staging",
+]
+_PLANS = [
+    "continue work on {area}", "start the {area} integration", "write tests for {area}",
+    "pair with QA on {area}", "optimize queries in {area}", "finish code review for {area}",
+]
+_BLOCKERS = [
+    "waiting for design approval on {area}", "need access to the production database",
+    "blocked by failing CI pipeline", "waiting on API keys from the vendor",
+    "unclear requirements for {area}", "dependency on another team's {area} release",
+]
+_AREAS = ["login", "billing", "notifications", "search", "reporting", "user profile", "dashboard", "payments"]
+_FIRST = ["Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie", "Avery", "Quinn"]
+_LAST = ["Smith", "Lee", "Patel", "Garcia", "Kim", "Nguyen", "Brown", "Silva", "Khan", "Müller"]
+_RISKS = np.array(["low", "medium", "high", "critical"])
+
+
+def generate_records(projects: int = 5, developers: int = 8, days: int = 730, seed: int = 42,
+                     blocker_rate: float = 0.15, participation: float = 0.9,
+                     end_date: Optional[datetime.date] = None) -> Iterator[Dict[str, Any]]:
+    """Deterministic synthetic standups, generated a day at a time with NumPy"""
+    rng = np.random.default_rng(seed)
+    end_date = end_date or datetime.date(2024, 12, 31)
+    start_date = end_date - datetime.timedelta(days=days - 1)
+    team = []
+    for p in range(projects):
+        key = f"SYN{p + 1}"
+        for d in range(developers):
+            first, last = _FIRST[(p + d) % len(_FIRST)], _LAST[(p * 3 + d) % len(_LAST)]
+            team.append((key, f"Synthetic Project {p + 1}", f"{first} {last}",
+                         f"{first.lower()}.{last.lower()}.{p + 1}.{d + 1}@example.com"))
+    n = len(team)
+    # Each developer drifts around a personal mood baseline over time
+    baseline = rng.normal(0.3, 0.25, n)
+
+    for offset in range(days):
+        day = start_date + datetime.timedelta(days=offset)
+        if day.weekday() >= 5:
+            continue
+        present = rng.random(n) < participation
+        blocked = rng.random(n) < blocker_rate
+        sentiment = np.clip(baseline + rng.normal(0, 0.2, n) - 0.35 * blocked, -1, 1).round(3)
+        risk = _RISKS[np.clip((blocked * 2 + (sentiment < 0) + rng.integers(0, 2, n)), 0, 3)]
+        areas = rng.integers(0, len(_AREAS), (n, 2))
+        issue_numbers = rng.integers(1, 500, n)
+        work = rng.integers(0, len(_WORK), n)
+        plan = rng.integers(0, len(_PLANS), n)
+        blocker = rng.integers(0, len(_BLOCKERS), n)
+        minutes = rng.integers(0, 45, n)
+        for i in np.flatnonzero(present):
+            project_key, project_name, name, email = team[i]
+            area, next_area = _AREAS[areas[i, 0]], _AREAS[areas[i, 1]]
+            yield {
+                "project_key": project_key,
+                "project_name": project_name,
+                "date": day.isoformat(),
+                "developer_email": email,
+                "developer_name": name,
+                "what_did_i_do": f"{project_key}-{issue_numbers[i]}: " + _WORK[work[i]].format(area=area),
+                "what_will_i_do": _PLANS[plan[i]].format(area=next_area),
+                "blockers": _BLOCKERS[blocker[i]].format(area=area) if blocked[i] else None,
+                "sentiment_score": float(sentiment[i]),
+                "risk_level": str(risk[i]),
+                "created_at": datetime.datetime.combine(day, datetime.time(9, int(minutes[i]))).isoformat(),
+            }
+
+
+def write_records(records: Iterable[Dict[str, Any]], path: str) -> int:
+    """Write records as JSONL or CSV (by extension) for later import or benchmarking"""
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            writer = csv.DictWriter(f, fieldnames=RECORD_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            for record in records:
+                writer.writerow(record)
+                count += 1
+        else:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+                count += 1
+    return count
@@ -0,0 +1,257 @@
+import os
+import datetime
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models import JiraIssue, StandupIssueLink, SprintBurndown, BurndownSnapshot
+
+DONE_CATEGORY = "done"
+# Columns holding running totals; a change on one day shifts every later snapshot too
+CUMULATIVE_COLUMNS = ("scope_points", "remaining_points", "completed_points", "issues_total", "issues_done")
+
+
+def _to_date(value) -> Optional[datetime.date]:
+    if value is None or isinstance(value, datetime.date) and not isinstance(value, datetime.datetime):
+        return value
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    try:
+        return datetime.date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def issue_state(row: JiraIssue) -> Dict[str, Any]:
+    """The fields of a mirrored issue that affect burndown, captured before it is changed"""
+    return {
+        "sprint_id": row.sprint_id,
+        "story_points": row.story_points,
+        "status_category": row.status_category,
+        "is_deleted": bool(row.is_deleted),
+    }
+
+
+def _contribution(state: Optional[Dict[str, Any]]) -> Optional[Tuple[int, Dict[str, float]]]:
+    if not state or state.get("is_deleted") or not state.get("sprint_id"):
+        return None
+    points = float(state.get("story_points") or 0)
+    done = state.get("status_category") == DONE_CATEGORY
+    return state["sprint_id"], {
+        "scope_points": points,
+        "remaining_points": 0.0 if done else points,
+        "completed_points": points if done else 0.0,
+        "issues_total": 1,
+        "issues_done": 1 if done else 0,
+    }
+
+
+class BurndownEngine:
+    """Keeps per-sprint remaining-work totals and daily snapshots up to date from individual issue changes"""
+
+    def __init__(self):
+        self.cache_size = int(os.getenv("BURNDOWN_CACHE_SIZE", "256"))
+        self._charts: Dict[int, Tuple[int, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def apply_issue_change(self, db: Session, before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]],
+                           changed_at: Optional[datetime.datetime] = None, sprint: Optional[Dict[str, Any]] = None):
+        """Fold one issue's old and new state into the affected sprints as deltas"""
+        deltas: Dict[int, Dict[str, float]] = {}
+        for sign, state in ((-1, before), (1, after)):
+            contribution = _contribution(state)
+            if contribution is None:
+                continue
+            sprint_id, values = contribution
+            delta = deltas.setdefault(sprint_id, dict.fromkeys(CUMULATIVE_COLUMNS, 0.0))
+            for column, value in values.items():
+                delta[column] += sign * value
+        if sprint and sprint.get("id"):
+            self._sprint(db, sprint["id"], sprint)
+        day = (changed_at or datetime.datetime.utcnow()).date()
+        for sprint_id, delta in deltas.items():
+            if any(delta.values()):
+                self._apply_delta(db, self._sprint(db, sprint_id), day, delta)
+
+    def record_standup_mention(self, db: Session, issue_key: str, mentioned_at: datetime.datetime):
+        """Count an issue's first standup mention of the day towards its sprint's progress"""
+        issue = db.query(JiraIssue.sprint_id).filter(JiraIssue.issue_key == issue_key,
+                                                     JiraIssue.is_deleted == False).first()
+        if issue is None or not issue.sprint_id:
+            return
+        db.flush()  # The caller's new link has to be visible to the count below
+        start = datetime.datetime.combine(mentioned_at.date(), datetime.time())
+        mentions = db.query(func.count(StandupIssueLink.id)).filter(
+            StandupIssueLink.issue_key == issue_key,
+            StandupIssueLink.mentioned_at >= start,
+            StandupIssueLink.mentioned_at < start + datetime.timedelta(days=1)
+        ).scalar()
+        if mentions != 1:
+            return
+        burndown = self._sprint(db, issue.sprint_id)
+        day = self._clamp(burndown, mentioned_at.date())
+        self._ensure_snapshot(db, burndown.sprint_id, day)
+        db.query(BurndownSnapshot).filter(BurndownSnapshot.sprint_id == burndown.sprint_id,
+                                          BurndownSnapshot.day == day) \
+            .update({BurndownSnapshot.standup_issues: BurndownSnapshot.standup_issues + 1}, synchronize_session=False)
+        self._bump(db, burndown)
+
+    def _sprint(self, db: Session, sprint_id: int, meta: Optional[Dict[str, Any]] = None) -> SprintBurndown:
+        burndown = db.query(SprintBurndown).filter(SprintBurndown.sprint_id == sprint_id).first()
+        if burndown is None:
+            self._insert_ignore(db, SprintBurndown, ["sprint_id"], sprint_id=sprint_id, version=0,
+                                **dict.fromkeys(CUMULATIVE_COLUMNS, 0))
+            burndown = db.query(SprintBurndown).filter(SprintBurndown.sprint_id == sprint_id).first()
+        if meta:
+            burndown.sprint_name = meta.get("name") or burndown.sprint_name
+            burndown.state = meta.get("state") or burndown.state
+            burndown.start_date = _to_date(meta.get("start_date")) or burndown.start_date
+            burndown.end_date = _to_date(meta.get("end_date")) or burndown.end_date
+            burndown.project_key = meta.get("project_key") or burndown.project_key
+        return burndown
+
+    def _clamp(self, burndown: SprintBurndown, day: datetime.date) -> datetime.date:
+        # Changes before the sprint started are part of its starting scope
+        if burndown.start_date and day < burndown.start_date:
+            return burndown.start_date
+        return day
+
+    def _apply_delta(self, db: Session, burndown: SprintBurndown, day: datetime.date, delta: Dict[str, float]):
+        day = self._clamp(burndown, day)
+        self._ensure_snapshot(db, burndown.sprint_id, day)
+        db.query(BurndownSnapshot).filter(BurndownSnapshot.sprint_id == burndown.sprint_id,
+                                          BurndownSnapshot.day >= day) \
+            .update({getattr(BurndownSnapshot, c): getattr(BurndownSnapshot, c) + v for c, v in delta.items()},
+                    synchronize_session=False)
+        db.query(SprintBurndown).filter(SprintBurndown.id == burndown.id) \
+            .update({getattr(SprintBurndown, c): getattr(SprintBurndown, c) + v for c, v in delta.items()},
+                    synchronize_session=False)
+        self._bump(db, burndown)
+
+    def _ensure_snapshot(self, db: Session, sprint_id: int, day: datetime.date):
+        """Create the day's snapshot from the totals carried forward from the previous one"""
+        exists = db.query(BurndownSnapshot.id).filter(BurndownSnapshot.sprint_id == sprint_id,
+                                                      BurndownSnapshot.day == day).first()
+        if exists:
+            return
+        # Plain columns rather than entities: loaded snapshots may be stale after the bulk UPDATEs above
+        previous = db.query(*[getattr(BurndownSnapshot, c) for c in CUMULATIVE_COLUMNS]) \
+            .filter(BurndownSnapshot.sprint_id == sprint_id, BurndownSnapshot.day < day) \
+            .order_by(BurndownSnapshot.day.desc()).first()
+        carried = {c: (v or 0) for c, v in zip(CUMULATIVE_COLUMNS, previous)} if previous \
+            else dict.fromkeys(CUMULATIVE_COLUMNS, 0)
+        self._insert_ignore(db, BurndownSnapshot, ["sprint_id", "day"], sprint_id=sprint_id, day=day,
+                            standup_issues=0, **carried)
+
+    def _insert_ignore(self, db: Session, model, conflict_columns: List[str], **values):
+        """Insert unless a concurrent writer already created the row"""
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            db.add(model(**values))
+            db.flush()
+            return
+        db.execute(insert(model).values(**values).on_conflict_do_nothing(index_elements=conflict_columns))
+
+    def _bump(self, db: Session, burndown: SprintBurndown):
+        db.query(SprintBurndown).filter(SprintBurndown.id == burndown.id) \
+            .update({SprintBurndown.version: SprintBurndown.version + 1}, synchronize_session=False)
+
+    def reconcile(self, db: Session, sprint_id: int) -> Dict[str, Any]:
+        """Correct drift between the running totals and the mirrored issues, recorded as a change today"""
+        rows = db.query(JiraIssue).filter(JiraIssue.sprint_id == sprint_id, JiraIssue.is_deleted == False).all()
+        truth = dict.fromkeys(CUMULATIVE_COLUMNS, 0.0)
+        for row in rows:
+            _, values = _contribution(issue_state(row))
+            for column, value in values.items():
+                truth[column] += value
+        burndown = self._sprint(db, sprint_id)
+        db.refresh(burndown)
+        delta = {c: truth[c] - (getattr(burndown, c) or 0) for c in CUMULATIVE_COLUMNS}
+        if any(abs(v) > 1e-9 for v in delta.values()):
+            self._apply_delta(db, burndown, datetime.datetime.utcnow().date(), delta)
+        db.commit()
+        return {"sprint_id": sprint_id, "corrections": {c: v for c, v in delta.items() if abs(v) > 1e-9}}
+
+    def list_sprints(self, db: Session, project_key: Optional[str] = None) -> List[Dict[str, Any]]:
+        query = db.query(SprintBurndown)
+        if project_key:
+            query = query.filter(SprintBurndown.project_key == project_key.upper())
+        return [self._summary(b) for b in query.order_by(SprintBurndown.start_date.desc().nullslast(),
+                                                          SprintBurndown.sprint_id.desc()).all()]
+
+    def chart(self, db: Session, sprint_id: int) -> Optional[Dict[str, Any]]:
+        """Chart-ready daily series; rebuilt only when the sprint's version changes"""
+        burndown = db.query(SprintBurndown).filter(SprintBurndown.sprint_id == sprint_id).first()
+        if burndown is None:
+            return None
+        cached = self._charts.get(sprint_id)
+        if cached and cached[0] == burndown.version:
+            return cached[1]
+        snapshots = db.query(BurndownSnapshot).filter(BurndownSnapshot.sprint_id == sprint_id) \
+            .order_by(BurndownSnapshot.day).all()
+        chart = self._build_chart(burndown, snapshots)
+        with self._lock:
+            if len(self._charts) >= self.cache_size:
+                self._charts.pop(next(iter(self._charts)))
+            self._charts[sprint_id] = (burndown.version, chart)
+        return chart
+
+    def _build_chart(self, burndown: SprintBurndown, snapshots: List[BurndownSnapshot]) -> Dict[str, Any]:
+        today = datetime.datetime.utcnow().date()
+        first = burndown.start_date or (snapshots[0].day if snapshots else today)
+        last = burndown.end_date or max(today, snapshots[-1].day if snapshots else today)
+        through = min(last, max(today, snapshots[-1].day if snapshots else first))
+        n_days = (last - first).days + 1
+        by_day = {s.day: s for s in snapshots}
+
+        series = {c: [] for c in CUMULATIVE_COLUMNS}
+        standup_issues = []
+        # Snapshots taken before the sprint dates were known seed the first day's values
+        earlier = [s for s in snapshots if s.day < first]
+        current = {c: (getattr(earlier[-1], c) or 0) if earlier else 0.0 for c in CUMULATIVE_COLUMNS}
+        for i in range(max(0, (through - first).days + 1)):
+            snapshot = by_day.get(first + datetime.timedelta(days=i))
+            if snapshot is not None:
+                current = {c: getattr(snapshot, c) or 0 for c in CUMULATIVE_COLUMNS}
+            for c in CUMULATIVE_COLUMNS:
+                series[c].append(round(float(current[c]), 2))
+            standup_issues.append(snapshot.standup_issues if snapshot is not None else 0)
+
+        committed = series["scope_points"][0] if series["scope_points"] else 0.0
+        ideal = [round(committed * (1 - i / max(n_days - 1, 1)), 2) for i in range(n_days)]
+        return {
+            **self._summary(burndown),
+            "committed_points": committed,
+            "dates": [(first + datetime.timedelta(days=i)).isoformat() for i in range(n_days)],
+            "ideal_remaining": ideal,
+            "remaining_points": series["remaining_points"],
+            "completed_points": series["completed_points"],
+            "scope_points": series["scope_points"],
+            "issues_done": series["issues_done"],
+            "issues_total": series["issues_total"],
+            "standup_issues": standup_issues,
+        }
+
+    def _summary(self, burndown: SprintBurndown) -> Dict[str, Any]:
+        return {
+            "sprint_id": burndown.sprint_id,
+            "sprint_name": burndown.sprint_name,
+            "project_key": burndown.project_key,
+            "state": burndown.state,
+            "start_date": burndown.start_date.isoformat() if burndown.start_date else None,
+            "end_date": burndown.end_date.isoformat() if burndown.end_date else None,
+            "scope_total": burndown.scope_points,
+            "remaining_total": burndown.remaining_points,
+            "completed_total": burndown.completed_points,
+            "version": burndown.version,
+        }
+
+
+# Global instance
+burndown_engine = BurndownEngine()
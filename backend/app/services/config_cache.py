@@ -0,0 +1,154 @@
+import os
+import time
+import threading
+from typing import Dict, Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models import SessionLocal, Project, AIConfig
+from app.redis_client import get_redis
+
+VERSION_KEY = "autoscrum:config:version"
+AI_CONFIG_FIELDS = ("id", "project_id", "openai_model", "temperature", "max_tokens", "summary_style",
+                    "analysis_depth", "auto_generate_summaries", "sentiment_analysis_enabled",
+                    "risk_assessment_enabled")
+PROJECT_FIELDS = ("id", "name", "jira_project_key", "github_repo_name", "slack_channel_id", "is_active")
+
+
+class ConfigCache:
+    """In-memory snapshot of active AIConfig and Project rows, reloaded on TTL or when any worker bumps the version"""
+
+    def __init__(self):
+        self.ttl = float(os.getenv("CONFIG_CACHE_TTL", "300"))
+        self.version_check_interval = float(os.getenv("CONFIG_VERSION_CHECK_SECONDS", "2"))
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._dirty = False
+        self._last_version_check = 0.0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "reloads": 0, "invalidations": 0, "remote_invalidations": 0, "redis_errors": 0}
+
+    def get_ai_config(self, project_id: Optional[int]) -> Optional[Dict[str, Any]]:
+        """The project's active AIConfig (newest if several), or None"""
+        if project_id is None:
+            return None
+        return self._current()["ai_configs"].get(project_id)
+
+    def get_project(self, project_id: Optional[int]) -> Optional[Dict[str, Any]]:
+        if project_id is None:
+            return None
+        return self._current()["projects"].get(project_id)
+
+    def get_project_by_key(self, project_key: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not project_key:
+            return None
+        return self._current()["projects_by_key"].get(project_key.upper())
+
+    def warm(self):
+        """Load the snapshot now, e.g. in a preloading parent so forked workers start with it"""
+        self._current()
+
+    def invalidate(self):
+        """Reload on next access here, and tell other workers through the shared version counter"""
+        self._dirty = True
+        self.stats["invalidations"] += 1
+        client = get_redis()
+        if client is not None:
+            try:
+                client.incr(VERSION_KEY)
+            except Exception as e:
+                self.stats["redis_errors"] += 1
+                print(f"Config cache version bump failed, other workers will refresh on TTL: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        lookups = self.stats["hits"] + self.stats["reloads"]
+        return {
+            **self.stats,
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else None,
+            "version": snapshot["version"] if snapshot else None,
+            "age_seconds": round(time.monotonic() - snapshot["loaded_at"], 1) if snapshot else None,
+            "ai_configs": len(snapshot["ai_configs"]) if snapshot else 0,
+            "projects": len(snapshot["projects"]) if snapshot else 0,
+            "ttl_seconds": self.ttl,
+        }
+
+    def _current(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        if snapshot is not None and not self._dirty and time.monotonic() - snapshot["loaded_at"] < self.ttl \
+                and not self._remote_changed(snapshot):
+            self.stats["hits"] += 1
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and not self._dirty and time.monotonic() - snapshot["loaded_at"] < self.ttl \
+                    and snapshot["version"] == self._remote_version(snapshot["version"]):
+                self.stats["hits"] += 1
+                return snapshot
+            self._dirty = False
+            self._snapshot = self._load()
+            self.stats["reloads"] += 1
+            return self._snapshot
+
+    def _remote_changed(self, snapshot: Dict[str, Any]) -> bool:
+        # Redis is consulted at most once per interval, so a hit normally costs no I/O
+        now = time.monotonic()
+        if now - self._last_version_check < self.version_check_interval:
+            return False
+        self._last_version_check = now
+        changed = self._remote_version(snapshot["version"]) != snapshot["version"]
+        if changed:
+            self.stats["remote_invalidations"] += 1
+        return changed
+
+    def _remote_version(self, default: int) -> int:
+        client = get_redis()
+        if client is None:
+            return default
+        try:
+            return int(client.get(VERSION_KEY) or 0)
+        except Exception:
+            self.stats["redis_errors"] += 1
+            return default
+
+    def _load(self) -> Dict[str, Any]:
+        # Read the version first: a bump during the load makes the next check reload again
+        version = self._remote_version(0)
+        db = SessionLocal()
+        try:
+            ai_configs = {}
+            for config in db.query(AIConfig).filter(AIConfig.is_active == True).order_by(AIConfig.id).all():
+                ai_configs[config.project_id] = {f: getattr(config, f) for f in AI_CONFIG_FIELDS}
+            projects = {p.id: {f: getattr(p, f) for f in PROJECT_FIELDS} for p in db.query(Project).all()}
+        finally:
+            db.close()
+        return {
+            "version": version,
+            "loaded_at": time.monotonic(),
+            "ai_configs": ai_configs,
+            "projects": projects,
+            "projects_by_key": {p["jira_project_key"].upper(): p for p in projects.values() if p["jira_project_key"]},
+        }
+
+
+# Global instance
+config_cache = ConfigCache()
+
+
+@event.listens_for(Session, "after_flush")
+def _track_config_changes(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, (AIConfig, Project)):
+            session.info["config_changed"] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_config_cache(session):
+    if session.info.pop("config_changed", False):
+        config_cache.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_config_changes(session):
+    session.info.pop("config_changed", None)
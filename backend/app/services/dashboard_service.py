@@ -0,0 +1,111 @@
+import os
+import json
+import time
+import hashlib
+import datetime
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models import StandupSession, StandupResponse, BlockedItem
+
+OPEN_BLOCKER_STATUSES = ("open", "in-progress", "escalated")
+
+
+class DashboardService:
+    def __init__(self):
+        self.cache_ttl = float(os.getenv("DASHBOARD_CACHE_TTL", "30"))
+        self.sentiment_days = int(os.getenv("DASHBOARD_SENTIMENT_DAYS", "14"))
+        self.blocker_limit = int(os.getenv("DASHBOARD_BLOCKER_LIMIT", "20"))
+        self._snapshots: Dict[Optional[int], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get_snapshot(self, db: Session, project_id: Optional[int] = None) -> Tuple[Dict[str, Any], str]:
+        """Return the precomputed dashboard and its ETag, rebuilding only when stale or invalidated"""
+        snapshot = self._snapshots.get(project_id)
+        if snapshot and time.monotonic() - snapshot["built_at"] < self.cache_ttl:
+            return snapshot["payload"], snapshot["etag"]
+        with self._lock:
+            snapshot = self._snapshots.get(project_id)
+            if snapshot and time.monotonic() - snapshot["built_at"] < self.cache_ttl:
+                return snapshot["payload"], snapshot["etag"]
+            data = self.build(db, project_id)
+            # The ETag covers the data only, so an unchanged rebuild still answers 304
+            body = json.dumps(data, sort_keys=True, default=str)
+            etag = '"%s"' % hashlib.sha1(body.encode()).hexdigest()
+            payload = {**data, "generated_at": datetime.datetime.utcnow().isoformat()}
+            self._snapshots[project_id] = {"payload": payload, "etag": etag, "built_at": time.monotonic()}
+            return payload, etag
+
+    def invalidate(self, project_id: Optional[int] = None):
+        """Drop the project's snapshot and the all-projects snapshot"""
+        with self._lock:
+            if project_id is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(project_id, None)
+                self._snapshots.pop(None, None)
+
+    def build(self, db: Session, project_id: Optional[int] = None) -> Dict[str, Any]:
+        sessions = db.query(StandupSession.status, func.count(StandupSession.id),
+                            func.avg(StandupSession.participant_count), func.sum(StandupSession.blocker_count))
+        if project_id is not None:
+            sessions = sessions.filter(StandupSession.project_id == project_id)
+        by_status = {}
+        session_total = participants_total = blockers_total = 0
+        for status, count, avg_participants, blockers in sessions.group_by(StandupSession.status).all():
+            by_status[status or "unknown"] = count
+            session_total += count
+            participants_total += (avg_participants or 0) * count
+            blockers_total += blockers or 0
+
+        responses = db.query(StandupResponse.risk_level, func.count(StandupResponse.id))
+        if project_id is not None:
+            responses = responses.join(StandupSession, StandupSession.id == StandupResponse.session_id) \
+                .filter(StandupSession.project_id == project_id)
+        risk_distribution = {(risk or "unknown"): count
+                             for risk, count in responses.group_by(StandupResponse.risk_level).all()}
+
+        blockers = db.query(BlockedItem).filter(BlockedItem.status.in_(OPEN_BLOCKER_STATUSES))
+        if project_id is not None:
+            blockers = blockers.join(StandupSession, StandupSession.id == BlockedItem.session_id) \
+                .filter(StandupSession.project_id == project_id)
+        open_blockers = [{
+            "id": b.id,
+            "description": b.blocker_description,
+            "severity": b.severity,
+            "status": b.status,
+            "assigned_to": b.assigned_to,
+            "priority": b.ai_priority_score,
+            "created_at": b.created_at.isoformat() if b.created_at else None,
+        } for b in blockers.order_by(BlockedItem.ai_priority_score.desc().nullslast(), BlockedItem.created_at.desc())
+            .limit(self.blocker_limit).all()]
+
+        since = datetime.datetime.utcnow() - datetime.timedelta(days=self.sentiment_days)
+        day = func.date(StandupResponse.created_at)
+        sentiment = db.query(day, func.avg(StandupResponse.sentiment_score), func.count(StandupResponse.id)) \
+            .filter(StandupResponse.created_at >= since, StandupResponse.sentiment_score.isnot(None))
+        if project_id is not None:
+            sentiment = sentiment.join(StandupSession, StandupSession.id == StandupResponse.session_id) \
+                .filter(StandupSession.project_id == project_id)
+        recent_sentiment = [{"date": str(d), "average": round(avg, 3), "responses": count}
+                            for d, avg, count in sentiment.group_by(day).order_by(day).all()]
+
+        return {
+            "project_id": project_id,
+            "session_stats": {
+                "total": session_total,
+                "by_status": by_status,
+                "avg_participants": round(participants_total / session_total, 2) if session_total else 0,
+                "blockers_reported": blockers_total,
+            },
+            "risk_distribution": risk_distribution,
+            "open_blockers": open_blockers,
+            "recent_sentiment": recent_sentiment,
+        }
+
+
+# Global instance
+dashboard_service = DashboardService()
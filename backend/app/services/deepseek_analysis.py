@@ -5,6 +5,8 @@ from typing import Dict, Any, List, Optional
 from datetime import datetime
 import requests
 from app.models import SessionLocal, AIAnalysisLog
+from app.services.single_flight import single_flight, make_key
+from app.services.model_router import model_router
 
 class DeepSeekAnalysisService:
     def __init__(self):
@@ -14,40 +16,29 @@ class DeepSeekAnalysisService:
             
         self.api_key = api_key
         self.api_url = "https://api.deepseek.com/v1/chat/completions"
-        self.default_model = os.getenv("DEEPSEEK_MODEL", "deepseek-chat")
+        self.timeout = float(os.getenv("DEEPSEEK_TIMEOUT_SECONDS", "60"))
     
     def analyze_standup_response(self, standup_data: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze a single standup response using DeepSeek AI"""
         prompt = self._build_analysis_prompt(standup_data)
+        route = model_router.route_analysis("deepseek", standup_data)
 
         start_time = time.time()
         try:
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            payload = {
-                "model": self.default_model,
-                "messages": [{"role": "user", "content": prompt}],
-                "max_tokens": 500,
-                "temperature": 0.7
-            }
-            
-            response = requests.post(self.api_url, headers=headers, json=payload)
-            response.raise_for_status()
-            result = response.json()
-            
+            completion, coalesced = self._complete(prompt, route["model"], route["max_tokens"], route["temperature"])
+
             processing_time_ms = int((time.time() - start_time) * 1000)
-            analysis_result = self._parse_ai_response(result['choices'][0]['message']['content'])
+            analysis_result = self._parse_ai_response(completion["content"])
+            # Only the caller that actually hit the provider is charged for the tokens
+            tokens_consumed = 0 if coalesced else completion["total_tokens"]
 
             # Log the analysis
             self._log_analysis(
                 project_id=standup_data.get('project_id'),
                 session_id=standup_data.get('session_id'),
                 response_id=standup_data.get('response_id'),
-                model_used=self.default_model,
-                tokens_consumed=result['usage']['total_tokens'],
+                model_used=route["model"],
+                tokens_consumed=tokens_consumed,
                 analysis_type="standup_analysis",
                 processing_time_ms=processing_time_ms,
                 success=True
@@ -56,9 +47,12 @@ class DeepSeekAnalysisService:
             return {
                 **analysis_result,
                 "metadata": {
-                    "model": self.default_model,
-                    "tokens_used": result['usage']['total_tokens'],
-                    "processing_time_ms": processing_time_ms
+                    "model": route["model"],
+                    "tier": route["tier"],
+                    "routing_reason": route["reason"],
+                    "tokens_used": tokens_consumed,
+                    "processing_time_ms": processing_time_ms,
+                    "coalesced": coalesced
                 }
             }
 
@@ -68,7 +62,7 @@ class DeepSeekAnalysisService:
                 project_id=standup_data.get('project_id'),
                 session_id=standup_data.get('session_id'),
                 response_id=standup_data.get('response_id'),
-                model_used=self.default_model,
+                model_used=route["model"],
                 tokens_consumed=0,
                 analysis_type="standup_analysis",
                 processing_time_ms=processing_time_ms,
@@ -80,34 +74,22 @@ class DeepSeekAnalysisService:
     def generate_session_summary(self, session_data: Dict[str, Any], responses: List[Dict]) -> Dict[str, Any]:
         """Generate AI-powered session summary using DeepSeek"""
         prompt = self._build_summary_prompt(session_data, responses)
+        route = model_router.route_summary("deepseek", session_data, responses)
 
         start_time = time.time()
         try:
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            payload = {
-                "model": self.default_model,
-                "messages": [{"role": "user", "content": prompt}],
-                "max_tokens": 800,
-                "temperature": 0.5
-            }
-            
-            response = requests.post(self.api_url, headers=headers, json=payload)
-            response.raise_for_status()
-            result = response.json()
-            
+            completion, coalesced = self._complete(prompt, route["model"], route["max_tokens"], route["temperature"])
+
             processing_time_ms = int((time.time() - start_time) * 1000)
-            summary = result['choices'][0]['message']['content']
+            summary = completion["content"]
+            tokens_consumed = 0 if coalesced else completion["total_tokens"]
 
             # Log the analysis
             self._log_analysis(
                 project_id=session_data.get('project_id'),
                 session_id=session_data.get('session_id'),
-                model_used=self.default_model,
-                tokens_consumed=result['usage']['total_tokens'],
+                model_used=route["model"],
+                tokens_consumed=tokens_consumed,
                 analysis_type="session_summary",
                 processing_time_ms=processing_time_ms,
                 success=True
@@ -116,9 +98,12 @@ class DeepSeekAnalysisService:
             return {
                 "summary": summary,
                 "metadata": {
-                    "model": self.default_model,
-                    "tokens_used": result['usage']['total_tokens'],
-                    "processing_time_ms": processing_time_ms
+                    "model": route["model"],
+                    "tier": route["tier"],
+                    "routing_reason": route["reason"],
+                    "tokens_used": tokens_consumed,
+                    "processing_time_ms": processing_time_ms,
+                    "coalesced": coalesced
                 }
             }
 
@@ -127,7 +112,7 @@ class DeepSeekAnalysisService:
             self._log_analysis(
                 project_id=session_data.get('project_id'),
                 session_id=session_data.get('session_id'),
-                model_used=self.default_model,
+                model_used=route["model"],
                 tokens_consumed=0,
                 analysis_type="session_summary",
                 processing_time_ms=processing_time_ms,
@@ -136,8 +121,34 @@ class DeepSeekAnalysisService:
             )
             return {"error": str(e), "summary": "AI summary generation failed"}
 
+    def _complete(self, prompt: str, model: str, max_tokens: int, temperature: float):
+        """Chat completion shared by identical concurrent requests; returns (completion, coalesced)"""
+        def call():
+            headers = {
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json"
+            }
+            payload = {
+                "model": model,
+                "messages": [{"role": "user", "content": prompt}],
+                "max_tokens": max_tokens,
+                "temperature": temperature
+            }
+            response = requests.post(self.api_url, headers=headers, json=payload, timeout=self.timeout)
+            response.raise_for_status()
+            result = response.json()
+            return {"content": result['choices'][0]['message']['content'], "total_tokens": result['usage']['total_tokens']}
+
+        key = make_key("deepseek", model, prompt, max_tokens, temperature)
+        return single_flight.do(key, call)
+
     def _build_analysis_prompt(self, standup_data: Dict[str, Any]) -> str:
         """Build the prompt for standup analysis"""
+        history = standup_data.get('history_context')
+        history_section = f"""
+        RELATED PAST STANDUPS (from this project, for context on recurring issues):
+        {history}
+        """ if history else ""
         return f"""
         Analyze this daily standup response from a software development team and provide a JSON response with:
         {{
@@ -156,7 +167,7 @@ class DeepSeekAnalysisService:
         WHAT I DID: {standup_data.get('what_did_i_do', 'No information')}
         WHAT I WILL DO: {standup_data.get('what_will_i_do', 'No information')}
         BLOCKERS: {standup_data.get('blockers', 'None')}
-
+        {history_section}
         Provide only valid JSON response, no additional text.
         """
 
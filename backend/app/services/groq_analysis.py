@@ -4,6 +4,8 @@ import time
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 from app.models import SessionLocal, AIAnalysisLog
+from app.services.single_flight import single_flight, make_key
+from app.services.model_router import model_router
 
 try:
     import groq
@@ -21,31 +23,28 @@ class GroqAnalysisService:
             raise ValueError("GROQ_API_KEY environment variable is not set")
             
         self.client = groq.Groq(api_key=api_key)
-        self.default_model = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")  # Free model option
 
     def analyze_standup_response(self, standup_data: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze a single standup response using Groq AI"""
         prompt = self._build_analysis_prompt(standup_data)
+        route = model_router.route_analysis("groq", standup_data)
 
         start_time = time.time()
         try:
-            response = self.client.chat.completions.create(
-                model=self.default_model,
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=500,
-                temperature=0.7
-            )
+            completion, coalesced = self._complete(prompt, route["model"], route["max_tokens"], route["temperature"])
 
             processing_time_ms = int((time.time() - start_time) * 1000)
-            analysis_result = self._parse_ai_response(response.choices[0].message.content)
+            analysis_result = self._parse_ai_response(completion["content"])
+            # Only the caller that actually hit the provider is charged for the tokens
+            tokens_consumed = 0 if coalesced else completion["total_tokens"]
 
             # Log the analysis
             self._log_analysis(
                 project_id=standup_data.get('project_id'),
                 session_id=standup_data.get('session_id'),
                 response_id=standup_data.get('response_id'),
-                model_used=self.default_model,
-                tokens_consumed=response.usage.total_tokens,
+                model_used=route["model"],
+                tokens_consumed=tokens_consumed,
                 analysis_type="standup_analysis",
                 processing_time_ms=processing_time_ms,
                 success=True
@@ -54,9 +53,12 @@ class GroqAnalysisService:
             return {
                 **analysis_result,
                 "metadata": {
-                    "model": self.default_model,
-                    "tokens_used": response.usage.total_tokens,
-                    "processing_time_ms": processing_time_ms
+                    "model": route["model"],
+                    "tier": route["tier"],
+                    "routing_reason": route["reason"],
+                    "tokens_used": tokens_consumed,
+                    "processing_time_ms": processing_time_ms,
+                    "coalesced": coalesced
                 }
             }
 
@@ -66,7 +68,7 @@ class GroqAnalysisService:
                 project_id=standup_data.get('project_id'),
                 session_id=standup_data.get('session_id'),
                 response_id=standup_data.get('response_id'),
-                model_used=self.default_model,
+                model_used=route["model"],
                 tokens_consumed=0,
                 analysis_type="standup_analysis",
                 processing_time_ms=processing_time_ms,
@@ -78,25 +80,22 @@ class GroqAnalysisService:
     def generate_session_summary(self, session_data: Dict[str, Any], responses: List[Dict]) -> Dict[str, Any]:
         """Generate AI-powered session summary using Groq"""
         prompt = self._build_summary_prompt(session_data, responses)
+        route = model_router.route_summary("groq", session_data, responses)
 
         start_time = time.time()
         try:
-            response = self.client.chat.completions.create(
-                model=self.default_model,
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=800,
-                temperature=0.5
-            )
+            completion, coalesced = self._complete(prompt, route["model"], route["max_tokens"], route["temperature"])
 
             processing_time_ms = int((time.time() - start_time) * 1000)
-            summary = response.choices[0].message.content
+            summary = completion["content"]
+            tokens_consumed = 0 if coalesced else completion["total_tokens"]
 
             # Log the analysis
             self._log_analysis(
                 project_id=session_data.get('project_id'),
                 session_id=session_data.get('session_id'),
-                model_used=self.default_model,
-                tokens_consumed=response.usage.total_tokens,
+                model_used=route["model"],
+                tokens_consumed=tokens_consumed,
                 analysis_type="session_summary",
                 processing_time_ms=processing_time_ms,
                 success=True
@@ -105,9 +104,12 @@ class GroqAnalysisService:
             return {
                 "summary": summary,
                 "metadata": {
-                    "model": self.default_model,
-                    "tokens_used": response.usage.total_tokens,
-                    "processing_time_ms": processing_time_ms
+                    "model": route["model"],
+                    "tier": route["tier"],
+                    "routing_reason": route["reason"],
+                    "tokens_used": tokens_consumed,
+                    "processing_time_ms": processing_time_ms,
+                    "coalesced": coalesced
                 }
             }
 
@@ -116,7 +118,7 @@ class GroqAnalysisService:
             self._log_analysis(
                 project_id=session_data.get('project_id'),
                 session_id=session_data.get('session_id'),
-                model_used=self.default_model,
+                model_used=route["model"],
                 tokens_consumed=0,
                 analysis_type="session_summary",
                 processing_time_ms=processing_time_ms,
@@ -125,8 +127,27 @@ class GroqAnalysisService:
             )
             return {"error": str(e), "summary": "AI summary generation failed"}
 
+    def _complete(self, prompt: str, model: str, max_tokens: int, temperature: float):
+        """Chat completion shared by identical concurrent requests; returns (completion, coalesced)"""
+        def call():
+            response = self.client.chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=max_tokens,
+                temperature=temperature
+            )
+            return {"content": response.choices[0].message.content, "total_tokens": response.usage.total_tokens}
+
+        key = make_key("groq", model, prompt, max_tokens, temperature)
+        return single_flight.do(key, call)
+
     def _build_analysis_prompt(self, standup_data: Dict[str, Any]) -> str:
         """Build the prompt for standup analysis"""
+        history = standup_data.get('history_context')
+        history_section = f"""
+        RELATED PAST STANDUPS (from this project, for context on recurring issues):
+        {history}
+        """ if history else ""
         return f"""
         Analyze this daily standup response from a software development team and provide a JSON response with:
         {{
@@ -145,7 +166,7 @@ class GroqAnalysisService:
         WHAT I DID: {standup_data.get('what_did_i_do', 'No information')}
         WHAT I WILL DO: {standup_data.get('what_will_i_do', 'No information')}
         BLOCKERS: {standup_data.get('blockers', 'None')}
-
+        {history_section}
         Provide only valid JSON response, no additional text.
         """
 
@@ -241,4 +262,13 @@ class GroqAnalysisService:
             db.close()
 
 # Global instance
-groq_service = GroqAnalysisService()
\ No newline at end of file
+groq_service = GroqAnalysisService()
+
+
+def _reset_client_after_fork():
+    # The client's HTTP connection pool must not be shared with the parent process
+    groq_service.client = groq.Groq(api_key=os.getenv("GROQ_API_KEY"))
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_client_after_fork)
\ No newline at end of file
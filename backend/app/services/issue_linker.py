@@ -0,0 +1,147 @@
+import os
+import re
+import time
+import datetime
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+from sqlalchemy import func, exists, and_, or_
+from sqlalchemy.orm import Session
+
+from app.models import Project, JiraIssue, StandupResponse, StandupIssueLink
+from app.services.burndown import burndown_engine
+
+TEXT_FIELDS = ("what_did_i_do", "what_will_i_do", "blockers")
+
+
+class IssueLinker:
+    def __init__(self):
+        self.refresh_interval = float(os.getenv("ISSUE_KEY_REFRESH_SECONDS", "300"))
+        self._pattern: Optional[re.Pattern] = None
+        self._project_keys: frozenset = frozenset()
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def matcher(self, db: Session) -> Optional[re.Pattern]:
+        """One compiled alternation over every known project key, rebuilt when the key set changes"""
+        if time.monotonic() - self._loaded_at < self.refresh_interval:
+            return self._pattern
+        with self._lock:
+            if time.monotonic() - self._loaded_at < self.refresh_interval:
+                return self._pattern
+            keys = {k for (k,) in db.query(Project.jira_project_key).filter(Project.jira_project_key.isnot(None))}
+            keys |= {k for (k,) in db.query(JiraIssue.project_key).filter(JiraIssue.project_key.isnot(None)).distinct()}
+            keys = frozenset(k.upper() for k in keys if k)
+            if keys != self._project_keys:
+                self._pattern = self.compile(keys)
+                self._project_keys = keys
+            self._loaded_at = time.monotonic()
+            return self._pattern
+
+    @staticmethod
+    def compile(project_keys) -> Optional[re.Pattern]:
+        if not project_keys:
+            return None
+        # Longest keys first so PROJX-1 is not read as PROJ followed by garbage
+        alternation = "|".join(re.escape(k) for k in sorted(project_keys, key=len, reverse=True))
+        return re.compile(rf"(?<![A-Za-z0-9])({alternation})-(\d+)(?![A-Za-z0-9])", re.IGNORECASE)
+
+    def invalidate(self):
+        self._loaded_at = 0.0
+
+    def extract_keys(self, db: Session, text: Optional[str]) -> List[Tuple[str, str]]:
+        """(issue_key, project_key) pairs mentioned in text, in order of first mention"""
+        pattern = self.matcher(db)
+        if not text or pattern is None:
+            return []
+        found = {}
+        for match in pattern.finditer(text):
+            project_key = match.group(1).upper()
+            found.setdefault(f"{project_key}-{int(match.group(2))}", project_key)
+        return list(found.items())
+
+    def link_response(self, db: Session, response: StandupResponse) -> List[str]:
+        """Store links for every issue key a standup response mentions"""
+        links = {}
+        for field in TEXT_FIELDS:
+            for issue_key, project_key in self.extract_keys(db, getattr(response, field)):
+                links.setdefault(issue_key, (project_key, field))
+        if not links:
+            return []
+        existing = {k for (k,) in db.query(StandupIssueLink.issue_key)
+                    .filter(StandupIssueLink.response_id == response.id)}
+        for issue_key, (project_key, field) in links.items():
+            if issue_key in existing:
+                continue
+            db.add(StandupIssueLink(
+                response_id=response.id,
+                session_id=response.session_id,
+                issue_key=issue_key,
+                project_key=project_key,
+                field=field,
+                mentioned_at=response.created_at or datetime.datetime.utcnow()
+            ))
+            burndown_engine.record_standup_mention(db, issue_key, response.created_at or datetime.datetime.utcnow())
+        return list(links)
+
+    def backfill(self, db: Session, batch_size: int = 1000) -> int:
+        """Rescan all standup responses for issue keys, e.g. after adding a project"""
+        self.invalidate()
+        linked = 0
+        last_id = 0
+        while True:
+            batch = db.query(StandupResponse).filter(StandupResponse.id > last_id) \
+                .order_by(StandupResponse.id).limit(batch_size).all()
+            if not batch:
+                break
+            for response in batch:
+                linked += bool(self.link_response(db, response))
+            last_id = batch[-1].id
+            db.commit()
+        return linked
+
+    def standups_mentioning(self, db: Session, issue_key: str, limit: int = 50) -> List[Dict[str, Any]]:
+        rows = db.query(StandupIssueLink, StandupResponse) \
+            .join(StandupResponse, StandupResponse.id == StandupIssueLink.response_id) \
+            .filter(StandupIssueLink.issue_key == issue_key.upper()) \
+            .order_by(StandupIssueLink.mentioned_at.desc()).limit(limit).all()
+        return [{
+            "response_id": response.id,
+            "session_id": response.session_id,
+            "developer_email": response.developer_email,
+            "developer_name": response.developer_name,
+            "mentioned_in": link.field,
+            "mentioned_at": link.mentioned_at.isoformat() if link.mentioned_at else None,
+            "what_did_i_do": response.what_did_i_do,
+            "what_will_i_do": response.what_will_i_do,
+            "blockers": response.blockers,
+        } for link, response in rows]
+
+    def issues_without_activity(self, db: Session, days: int, project_key: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Open mirrored issues nobody has mentioned in a standup for the last N days"""
+        cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=days)
+        recent_mention = exists().where(and_(
+            StandupIssueLink.issue_key == JiraIssue.issue_key,
+            StandupIssueLink.mentioned_at >= cutoff
+        ))
+        last_mentioned = db.query(func.max(StandupIssueLink.mentioned_at)) \
+            .filter(StandupIssueLink.issue_key == JiraIssue.issue_key) \
+            .correlate(JiraIssue).scalar_subquery()
+        query = db.query(JiraIssue, last_mentioned).filter(
+            JiraIssue.is_deleted.is_(False),
+            or_(JiraIssue.status_category.is_(None), JiraIssue.status_category != "done"),
+            ~recent_mention
+        )
+        if project_key:
+            query = query.filter(JiraIssue.project_key == project_key.upper())
+        return [{
+            "key": issue.issue_key,
+            "summary": issue.summary,
+            "status": issue.status,
+            "assignee": issue.assignee,
+            "last_mentioned_at": mentioned.isoformat() if mentioned else None,
+        } for issue, mentioned in query.order_by(JiraIssue.issue_key).all()]
+
+
+# Global instance
+issue_linker = IssueLinker()
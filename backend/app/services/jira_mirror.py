@@ -0,0 +1,203 @@
+import os
+import hmac
+import hashlib
+import datetime
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models import SessionLocal, Project, JiraIssue, AnalyticsWatermark
+from app.services.jira_service import normalize_issue, get_jira_service
+from app.services.burndown import burndown_engine, issue_state
+
+ISSUE_EVENTS = {"jira:issue_created", "jira:issue_updated", "jira:issue_deleted"}
+RESYNC_WATERMARK = "jira_resync:{project_key}"
+
+
+def _parse_jira_datetime(value: Optional[str]) -> Optional[datetime.datetime]:
+    """Jira timestamps look like 2024-01-01T09:00:00.000+0000; store them as naive UTC"""
+    if not value:
+        return None
+    if value[-5] in "+-" and value[-3] != ":":
+        value = value[:-2] + ":" + value[-2:]
+    parsed = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _epoch_ms(value: Optional[datetime.datetime]) -> int:
+    if value is None:
+        return 0
+    return int(value.replace(tzinfo=datetime.timezone.utc).timestamp() * 1000)
+
+
+def _from_epoch_ms(value: int) -> datetime.datetime:
+    return datetime.datetime.fromtimestamp(value / 1000.0, tz=datetime.timezone.utc).replace(tzinfo=None)
+
+
+def verify_webhook_signature(body: bytes, signature: Optional[str], token: Optional[str]) -> bool:
+    """Accept an HMAC X-Hub-Signature or a ?token= matching JIRA_WEBHOOK_SECRET, if one is configured"""
+    secret = os.getenv("JIRA_WEBHOOK_SECRET")
+    if not secret:
+        return True
+    if signature:
+        method, _, digest = signature.partition("=")
+        algorithm = getattr(hashlib, method, None) if method in ("sha1", "sha256") else None
+        if algorithm is None:
+            return False
+        expected = hmac.new(secret.encode(), body, algorithm).hexdigest()
+        return hmac.compare_digest(expected, digest)
+    return bool(token) and hmac.compare_digest(secret, token)
+
+
+class JiraMirrorService:
+    def __init__(self):
+        self.resync_overlap = datetime.timedelta(minutes=int(os.getenv("JIRA_RESYNC_OVERLAP_MINUTES", "10")))
+        self._project_ids: Dict[str, Optional[int]] = {}
+
+    def apply_webhook_event(self, db: Session, event: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply a Jira issue webhook; duplicates and out-of-order deliveries are ignored"""
+        event_type = event.get("webhookEvent")
+        if event_type not in ISSUE_EVENTS or not event.get("issue"):
+            return {"status": "ignored", "reason": f"unsupported event {event_type}"}
+        timestamp = int(event.get("timestamp") or _epoch_ms(datetime.datetime.utcnow()))
+        issue = normalize_issue(event["issue"])
+        applied = self.apply_issue(db, issue, timestamp, deleted=event_type == "jira:issue_deleted")
+        db.commit()
+        return {"status": "applied" if applied else "stale", "issue_key": issue["key"]}
+
+    def apply_issue(self, db: Session, issue: Dict[str, Any], event_ms: int, deleted: bool = False) -> bool:
+        """Upsert one normalized issue unless a newer event for it was already applied"""
+        query = db.query(JiraIssue).filter(JiraIssue.jira_id == issue["id"]).with_for_update()
+        row = query.first()
+        if row is None:
+            self._insert_placeholder(db, issue["id"])
+            row = query.first()
+        if (row.last_event_at or 0) >= event_ms:
+            return False
+        before = issue_state(row) if row.issue_key else None
+        self._copy_fields(db, row, issue)
+        row.last_event_at = event_ms
+        row.is_deleted = deleted
+        db.flush()
+        sprint = issue.get("sprint")
+        burndown_engine.apply_issue_change(
+            db, before, issue_state(row),
+            changed_at=row.jira_updated_at or _from_epoch_ms(event_ms),
+            sprint={**sprint, "project_key": row.project_key} if sprint else None
+        )
+        return True
+
+    def _insert_placeholder(self, db: Session, jira_id: str):
+        """Create the row without racing concurrent deliveries for the same new issue"""
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            db.add(JiraIssue(jira_id=jira_id, last_event_at=0))
+            db.flush()
+            return
+        db.execute(insert(JiraIssue).values(jira_id=jira_id, last_event_at=0, is_deleted=False)
+                   .on_conflict_do_nothing(index_elements=["jira_id"]))
+
+    def _copy_fields(self, db: Session, row: JiraIssue, issue: Dict[str, Any]):
+        sprint = issue.get("sprint") or {}
+        row.issue_key = issue["key"]
+        row.project_key = issue.get("project_key")
+        row.project_id = self._project_id(db, row.project_key)
+        row.summary = issue.get("summary")
+        row.status = issue.get("status")
+        row.status_category = issue.get("status_category")
+        row.assignee = issue.get("assignee")
+        row.story_points = issue.get("story_points")
+        row.sprint_id = sprint.get("id")
+        row.sprint_name = sprint.get("name")
+        row.jira_updated_at = _parse_jira_datetime(issue.get("updated"))
+
+    def _project_id(self, db: Session, project_key: Optional[str]) -> Optional[int]:
+        if project_key not in self._project_ids:
+            project = db.query(Project.id).filter(Project.jira_project_key == project_key).first()
+            if project is None:
+                return None  # Don't cache misses, the project may be registered later
+            self._project_ids[project_key] = project.id
+        return self._project_ids[project_key]
+
+    def resync_project(self, db: Session, project_key: str) -> Dict[str, Any]:
+        """Pull issues updated since the last sync to repair any missed webhooks"""
+        watermark_name = RESYNC_WATERMARK.format(project_key=project_key)
+        watermark = db.get(AnalyticsWatermark, watermark_name)
+        # The window starts where the last successful resync started, not at the newest mirrored issue:
+        # webhooks move that forward past events they missed. JQL reads a bare number as epoch
+        # milliseconds, so no time zone applies to it.
+        started_ms = _epoch_ms(datetime.datetime.utcnow())
+        jql = f'project = "{project_key}"'
+        if watermark is not None and watermark.last_id:
+            since_ms = watermark.last_id - int(self.resync_overlap.total_seconds() * 1000)
+            jql += f' AND updated >= {since_ms}'
+        jql += " ORDER BY updated ASC"
+
+        jira_service = get_jira_service()
+        if not jira_service.base_url:
+            raise ValueError("JIRA_URL is not configured")
+        applied = 0
+        issues = jira_service.search_issues(jql)
+        for issue in issues:
+            updated_ms = _epoch_ms(_parse_jira_datetime(issue.get("updated")))
+            applied += self.apply_issue(db, issue, updated_ms)
+        if watermark is None:
+            watermark = AnalyticsWatermark(name=watermark_name)
+            db.add(watermark)
+        watermark.last_id = started_ms
+        db.commit()
+        return {"project_key": project_key, "fetched": len(issues), "applied": applied}
+
+    def resync_all(self) -> List[Dict[str, Any]]:
+        db = SessionLocal()
+        try:
+            keys = [k for (k,) in db.query(Project.jira_project_key)
+                    .filter(Project.is_active.is_(True), Project.jira_project_key.isnot(None)).all()]
+            results = []
+            for key in keys:
+                try:
+                    results.append(self.resync_project(db, key))
+                except Exception as e:
+                    db.rollback()
+                    print(f"Jira resync failed for {key}: {e}")
+                    results.append({"project_key": key, "error": str(e)})
+            return results
+        finally:
+            db.close()
+
+    def is_mirrored(self, db: Session, project_key: str) -> bool:
+        """A project is served locally once it has completed at least one resync"""
+        return db.get(AnalyticsWatermark, RESYNC_WATERMARK.format(project_key=project_key)) is not None
+
+    def get_in_progress_issues(self, db: Session, project_key: str) -> List[Dict[str, Any]]:
+        rows = db.query(JiraIssue).filter(
+            JiraIssue.project_key == project_key,
+            JiraIssue.status_category == "indeterminate",
+            JiraIssue.is_deleted.is_(False)
+        ).order_by(JiraIssue.id).all()
+        return [self.row_to_issue(row) for row in rows]
+
+    @staticmethod
+    def row_to_issue(row: JiraIssue) -> Dict[str, Any]:
+        return {
+            "id": row.jira_id,
+            "key": row.issue_key,
+            "project_key": row.project_key,
+            "assignee": row.assignee,
+            "summary": row.summary,
+            "status": row.status,
+            "status_category": row.status_category,
+            "updated": row.jira_updated_at.isoformat() if row.jira_updated_at else None,
+            "story_points": row.story_points,
+            "sprint": {"id": row.sprint_id, "name": row.sprint_name} if row.sprint_id else None,
+        }
+
+
+# Global instance
+jira_mirror = JiraMirrorService()
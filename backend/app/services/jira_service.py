@@ -1,16 +1,234 @@
+import os
+import re
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+IN_PROGRESS_JQL = 'project = "{project_key}" AND statusCategory = "In Progress" ORDER BY key ASC'
+STORY_POINTS_FIELD = os.getenv("JIRA_STORY_POINTS_FIELD", "customfield_10016")
+SPRINT_FIELD = os.getenv("JIRA_SPRINT_FIELD", "customfield_10020")
+ISSUE_FIELDS = ["summary", "status", "assignee", "updated", "project", STORY_POINTS_FIELD, SPRINT_FIELD]
+
+# Jira Server renders sprints as "com.atlassian.greenhopper...Sprint@1a2b[id=3,state=ACTIVE,name=Sprint 3,...]"
+_SPRINT_STRING = re.compile(r"(\w+)=([^,\]]*)")
+
+
+def _parse_sprint(sprint) -> Optional[Dict[str, Any]]:
+    if isinstance(sprint, str):
+        sprint = dict(_SPRINT_STRING.findall(sprint))
+    if not isinstance(sprint, dict) or not sprint.get("id"):
+        return None
+    return {
+        "id": int(sprint["id"]),
+        "name": sprint.get("name"),
+        "state": (sprint.get("state") or "").lower() or None,
+        "start_date": sprint.get("startDate") if sprint.get("startDate") != "<null>" else None,
+        "end_date": sprint.get("endDate") if sprint.get("endDate") != "<null>" else None,
+    }
+
+
+def normalize_issue(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten a Jira REST issue into the shape the API returns"""
+    fields = raw.get("fields") or {}
+    assignee = fields.get("assignee") or {}
+    status = fields.get("status") or {}
+    sprints = [s for s in (_parse_sprint(s) for s in (fields.get(SPRINT_FIELD) or [])) if s]
+    # The last active (or most recent) sprint is the one the issue currently counts towards
+    sprint = next((s for s in reversed(sprints) if s["state"] == "active"), sprints[-1] if sprints else None)
+    key = raw.get("key") or ""
+    return {
+        "id": str(raw.get("id")),
+        "key": raw.get("key"),
+        "project_key": (fields.get("project") or {}).get("key") or key.rsplit("-", 1)[0] or None,
+        "assignee": assignee.get("emailAddress") or assignee.get("displayName"),
+        "summary": fields.get("summary"),
+        "status": status.get("name"),
+        "status_category": (status.get("statusCategory") or {}).get("key"),
+        "updated": fields.get("updated"),
+        "story_points": fields.get(STORY_POINTS_FIELD),
+        "sprint": sprint,
+    }
+
+
+def _page(start_at: int, response: requests.Response, body: Dict[str, Any]) -> Dict[str, Any]:
+    """One cached search page with the validators Jira returned for it"""
+    return {
+        "start_at": start_at,
+        "issues": [normalize_issue(raw) for raw in body.get("issues", [])],
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+
+
+def _validators(page: Dict[str, Any]) -> Dict[str, str]:
+    validators = {}
+    if page.get("etag"):
+        validators["If-None-Match"] = page["etag"]
+    if page.get("last_modified"):
+        validators["If-Modified-Since"] = page["last_modified"]
+    return validators
+
+
 class JiraService:
-    def __init__(self, base_url, email, api_token):
-        # In a real scenario, we would set up the connection here
-        self.base_url = base_url
+    def __init__(self, base_url, email, api_token,
+                 page_size: Optional[int] = None,
+                 max_workers: Optional[int] = None,
+                 cache_ttl: Optional[float] = None,
+                 timeout: Optional[float] = None):
+        self.base_url = (base_url or "").rstrip("/")
         self.auth = (email, api_token)
-        print(f"Mock Jira Service initialized for {base_url}")
+        self.page_size = page_size or int(os.getenv("JIRA_PAGE_SIZE", "100"))
+        self.max_workers = max_workers or int(os.getenv("JIRA_MAX_WORKERS", "4"))
+        self.cache_ttl = cache_ttl if cache_ttl is not None else float(os.getenv("JIRA_CACHE_TTL", "60"))
+        self.timeout = timeout or float(os.getenv("JIRA_TIMEOUT", "15"))
+        self.session = self._build_session()
+        self._cache: Dict[str, Dict[str, Any]] = {}
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.stats = {"cache_hits": 0, "revalidated": 0, "fetched": 0, "requests": 0}
+        if not self.base_url:
+            print("JIRA_URL not set, Jira Service will return mock issues")
+
+    def _build_session(self) -> requests.Session:
+        """One pooled keep-alive session per service, shared by all page fetches"""
+        session = requests.Session()
+        session.auth = self.auth
+        session.headers.update({"Accept": "application/json"})
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 502, 503, 504),
+                      allowed_methods=frozenset(["GET"]), respect_retry_after_header=True)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(self.max_workers, 4), max_retries=retry)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
 
     def get_in_progress_issues(self, project_key):
         """Fetches all issues that are 'in progress' for a project."""
-        # This is MOCK DATA for now. We will replace this with a real API call.
+        if not self.base_url:
+            return self._mock_issues(project_key)
+        return self.search_issues_cached(project_key, IN_PROGRESS_JQL.format(project_key=project_key))
+
+    def search_issues_cached(self, cache_key: str, jql: str) -> List[Dict[str, Any]]:
+        """Serve a JQL search from cache, revalidating every page with Jira once the TTL has passed"""
+        with self._lock:
+            key_lock = self._key_locks.setdefault(cache_key, threading.Lock())
+        # Concurrent callers for the same key wait for one refresh instead of each hitting Jira
+        with key_lock:
+            entry = self._cache.get(cache_key)
+            if entry and time.monotonic() - entry["fetched_at"] < self.cache_ttl:
+                self.stats["cache_hits"] += 1
+                return entry["issues"]
+
+            pages = None
+            if entry:
+                first = self._get_page(jql, 0, headers=_validators(entry["pages"][0]))
+                if first.status_code == 304:
+                    # Page 1 (and so the total) is unchanged, but an issue can still move between later pages
+                    pages = [entry["pages"][0]] + self._revalidate_pages(jql, entry["pages"][1:])
+                    if all(new is old for new, old in zip(pages, entry["pages"])):
+                        entry["fetched_at"] = time.monotonic()
+                        self.stats["revalidated"] += 1
+                        return entry["issues"]
+            else:
+                first = self._get_page(jql, 0)
+            if pages is None:
+                pages = self._collect_pages(jql, first)
+
+            issues = [issue for page in pages for issue in page["issues"]]
+            self._cache[cache_key] = {"issues": issues, "pages": pages, "fetched_at": time.monotonic()}
+            self.stats["fetched"] += 1
+            return issues
+
+    def search_issues(self, jql: str) -> List[Dict[str, Any]]:
+        """Run a JQL search and return every matching issue, uncached"""
+        return [issue for page in self._collect_pages(jql, self._get_page(jql, 0)) for issue in page["issues"]]
+
+    def invalidate(self, cache_key: Optional[str] = None):
+        with self._lock:
+            if cache_key is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(cache_key, None)
+
+    def _get_page(self, jql: str, start_at: int, headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        self.stats["requests"] += 1
+        response = self.session.get(
+            f"{self.base_url}/rest/api/2/search",
+            params={
+                "jql": jql,
+                "startAt": start_at,
+                "maxResults": self.page_size,
+                "fields": ",".join(ISSUE_FIELDS),
+            },
+            headers=headers or {},
+            timeout=self.timeout,
+        )
+        if response.status_code != 304:
+            response.raise_for_status()
+        return response
+
+    def _collect_pages(self, jql: str, first: requests.Response) -> List[Dict[str, Any]]:
+        body = first.json()
+        pages = [_page(0, first, body)]
+        total = body.get("total", len(pages[0]["issues"]))
+        # Jira may cap maxResults below what we asked for; page by what it actually returned
+        page_size = body.get("maxResults") or self.page_size
+        offsets = list(range(len(pages[0]["issues"]), total, page_size)) if pages[0]["issues"] else []
+        if offsets:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(offsets))) as pool:
+                for start, response in zip(offsets, pool.map(lambda start: self._get_page(jql, start), offsets)):
+                    pages.append(_page(start, response, response.json()))
+        return pages
+
+    def _revalidate_pages(self, jql: str, cached: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Conditionally re-request cached pages; unchanged pages come back as the same cached objects"""
+        if not cached:
+            return []
+
+        def check(page):
+            response = self._get_page(jql, page["start_at"], headers=_validators(page))
+            return page if response.status_code == 304 else _page(page["start_at"], response, response.json())
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(cached))) as pool:
+            return list(pool.map(check, cached))
+
+    def _mock_issues(self, project_key):
+        # MOCK DATA used when no Jira instance is configured
         print(f"Mock: Fetching in-progress issues for project {project_key}")
-        mock_issues = [
+        return [
             {"id": "123", "key": "PROJ-1", "assignee": "john.doe@example.com", "summary": "Build the login page"},
             {"id": "124", "key": "PROJ-2", "assignee": "jane.smith@example.com", "summary": "Fix database bug"},
         ]
-        return mock_issues
\ No newline at end of file
+
+
+_jira_service: Optional[JiraService] = None
+_jira_service_lock = threading.Lock()
+
+
+def _reset_after_fork():
+    # Rebuilt on first use so the child gets its own requests.Session and connection pool
+    global _jira_service, _jira_service_lock
+    _jira_service = None
+    _jira_service_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_jira_service() -> JiraService:
+    """Shared JiraService built from JIRA_URL/JIRA_EMAIL/JIRA_API_TOKEN"""
+    global _jira_service
+    if _jira_service is None:
+        with _jira_service_lock:
+            if _jira_service is None:
+                _jira_service = JiraService(
+                    base_url=os.environ.get("JIRA_URL"),
+                    email=os.environ.get("JIRA_EMAIL"),
+                    api_token=os.environ.get("JIRA_API_TOKEN")
+                )
+    return _jira_service
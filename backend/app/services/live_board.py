@@ -0,0 +1,176 @@
+import os
+import json
+import time
+import asyncio
+import datetime
+import threading
+from typing import Dict, Any, Optional, Set
+
+from sqlalchemy.orm import Session, selectinload
+
+from app.models import StandupSession, StandupResponse, BlockedItem
+from app.redis_client import get_redis
+
+CHANNEL_PREFIX = "autoscrum:board:"
+
+
+def response_event(response: StandupResponse) -> Dict[str, Any]:
+    """The board's view of a response: who submitted and what the AI flagged, without the raw analysis"""
+    analysis = response.ai_analysis if isinstance(response.ai_analysis, dict) else {}
+    blockers = analysis.get("critical_blockers")
+    if blockers is None and analysis:
+        # Normalized (and archived) analyses keep their lists in analysis_items
+        blockers = [item.text for item in response.analysis_items if item.kind == "blocker"]
+    return {
+        "response_id": response.id,
+        "developer_email": response.developer_email,
+        "developer_name": response.developer_name,
+        "has_blockers": bool(response.has_blockers),
+        "sentiment_score": response.sentiment_score,
+        "risk_level": response.risk_level,
+        "analyzed": response.ai_analysis is not None,
+        "critical_blockers": blockers or [],
+        "created_at": response.created_at.isoformat() if response.created_at else None,
+    }
+
+
+def blocker_event(item: BlockedItem) -> Dict[str, Any]:
+    return {
+        "blocker_id": item.id,
+        "response_id": item.response_id,
+        "description": item.blocker_description,
+        "severity": item.severity,
+        "status": item.status,
+        "assigned_to": item.assigned_to,
+        "resolved_at": item.resolved_at.isoformat() if item.resolved_at else None,
+    }
+
+
+class _Subscriber:
+    def __init__(self, loop: asyncio.AbstractEventLoop, maxsize: int):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def offer(self, message: str):
+        # Runs on the subscriber's loop; a slow client loses its oldest events, never blocks the broker
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+
+class LiveBoardBroker:
+    """Fans standup board events out to WebSocket subscribers, across workers via Redis pub/sub when configured"""
+
+    def __init__(self):
+        self.queue_size = int(os.getenv("LIVE_BOARD_QUEUE_SIZE", "100"))
+        self.ping_seconds = float(os.getenv("LIVE_BOARD_PING_SECONDS", "25"))
+        self._subscribers: Dict[int, Set[_Subscriber]] = {}
+        self._lock = threading.Lock()
+        self._listener: Optional[threading.Thread] = None
+        self.stats = {"published": 0, "delivered": 0, "dropped": 0, "redis_errors": 0}
+
+    @property
+    def mode(self) -> str:
+        return "redis" if get_redis() is not None else "memory"
+
+    def publish(self, session_id: Optional[int], event_type: str, data: Dict[str, Any]):
+        """Send an event to everyone watching the session; safe to call from any thread or worker"""
+        if session_id is None:
+            return
+        message = json.dumps({
+            "type": event_type,
+            "session_id": session_id,
+            "data": data,
+            "sent_at": datetime.datetime.utcnow().isoformat(),
+        }, default=str)
+        self.stats["published"] += 1
+        client = get_redis()
+        if client is not None:
+            try:
+                client.publish(f"{CHANNEL_PREFIX}{session_id}", message)
+                return
+            except Exception as e:
+                self.stats["redis_errors"] += 1
+                print(f"Live board publish via Redis failed, delivering locally only: {e}")
+        self._deliver(session_id, message)
+
+    def subscribe(self, session_id: int) -> _Subscriber:
+        subscriber = _Subscriber(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(session_id, set()).add(subscriber)
+        if get_redis() is not None:
+            self._ensure_listener()
+        return subscriber
+
+    def unsubscribe(self, session_id: int, subscriber: _Subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(session_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[session_id]
+        self.stats["dropped"] += subscriber.dropped
+
+    def _deliver(self, session_id: int, message: str):
+        with self._lock:
+            subscribers = list(self._subscribers.get(session_id, ()))
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.offer, message)
+                self.stats["delivered"] += 1
+            except RuntimeError:
+                # The subscriber's loop has closed; it will be unsubscribed by its handler
+                pass
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener is not None and self._listener.is_alive():
+                return
+            self._listener = threading.Thread(target=self._listen, name="live-board-listener", daemon=True)
+            self._listener.start()
+
+    def _listen(self):
+        # One pattern subscription per process; local subscribers are matched by session id
+        while True:
+            try:
+                pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                while True:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is None:
+                        continue
+                    channel = message["channel"].decode() if isinstance(message["channel"], bytes) else message["channel"]
+                    data = message["data"].decode() if isinstance(message["data"], bytes) else message["data"]
+                    self._deliver(int(channel[len(CHANNEL_PREFIX):]), data)
+            except Exception as e:
+                self.stats["redis_errors"] += 1
+                print(f"Live board Redis listener error, reconnecting: {e}")
+                time.sleep(1)
+
+    def snapshot(self, db: Session, session_id: int) -> Optional[Dict[str, Any]]:
+        """Current state of the session's board, sent to each subscriber when it connects"""
+        session = db.get(StandupSession, session_id)
+        if session is None:
+            return None
+        responses = db.query(StandupResponse).filter(StandupResponse.session_id == session_id) \
+            .options(selectinload(StandupResponse.analysis_items)).order_by(StandupResponse.id).all()
+        blockers = db.query(BlockedItem).filter(BlockedItem.session_id == session_id) \
+            .order_by(BlockedItem.id).all()
+        return {
+            "session_id": session.id,
+            "project_id": session.project_id,
+            "status": session.status,
+            "responses": [response_event(r) for r in responses],
+            "blockers": [blocker_event(b) for b in blockers],
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            sessions = {session_id: len(subs) for session_id, subs in self._subscribers.items()}
+        return {**self.stats, "mode": self.mode, "subscribers": sum(sessions.values()), "sessions": sessions}
+
+
+# Global instance
+live_board = LiveBoardBroker()
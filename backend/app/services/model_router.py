@@ -0,0 +1,140 @@
+import os
+import datetime
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.blockers import has_blocker
+from app.services.usage_analytics import usage_analytics
+from app.services.config_cache import config_cache
+
+SMALL_TIER = "small"
+LARGE_TIER = "large"
+
+# Task defaults; a project's AIConfig overrides them for standup_analysis only
+DEFAULT_PARAMS = {
+    "standup_analysis": {"max_tokens": 500, "temperature": 0.7},
+    "session_summary": {"max_tokens": 800, "temperature": 0.5},
+}
+
+# AIConfig.openai_model values that mean "let the router decide"
+AUTO_MODELS = {None, "", "auto", "gpt-4-turbo-preview"}
+
+
+class ModelRouter:
+    """Picks a small or large model per call from the standup content and the project's AIConfig"""
+
+    def __init__(self):
+        self.models = {
+            "groq": {
+                SMALL_TIER: os.getenv("GROQ_SMALL_MODEL", os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")),
+                LARGE_TIER: os.getenv("GROQ_LARGE_MODEL", "llama-3.3-70b-versatile"),
+            },
+            "deepseek": {
+                SMALL_TIER: os.getenv("DEEPSEEK_SMALL_MODEL", os.getenv("DEEPSEEK_MODEL", "deepseek-chat")),
+                # Not deepseek-reasoner: it ignores temperature and adds reasoning output the JSON parsing doesn't expect
+                LARGE_TIER: os.getenv("DEEPSEEK_LARGE_MODEL", "deepseek-chat"),
+            },
+        }
+        self.long_chars = int(os.getenv("ROUTER_LONG_STANDUP_CHARS", "800"))
+        self.long_blocker_chars = int(os.getenv("ROUTER_LONG_BLOCKER_CHARS", "120"))
+        self.large_session_size = int(os.getenv("ROUTER_LARGE_SESSION_RESPONSES", "8"))
+        self.large_session_blockers = int(os.getenv("ROUTER_LARGE_SESSION_BLOCKERS", "2"))
+
+    def get_config(self, project_id: Optional[int]) -> Optional[Dict[str, Any]]:
+        """The project's active AIConfig, served from the config cache"""
+        return config_cache.get_ai_config(project_id)
+
+    def route_analysis(self, provider: str, standup_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Model and sampling parameters for analyzing one standup response"""
+        blockers = standup_data.get('blockers') or ""
+        length = sum(len(standup_data.get(f) or "") for f in ("what_did_i_do", "what_will_i_do", "blockers"))
+        if len(blockers.strip()) >= self.long_blocker_chars:
+            tier, reason = LARGE_TIER, "long blocker description"
+        elif length >= self.long_chars:
+            tier, reason = LARGE_TIER, "long standup"
+        elif has_blocker(blockers):
+            tier, reason = LARGE_TIER, "reports blockers"
+        else:
+            tier, reason = SMALL_TIER, "short standup without blockers"
+        return self._decide(provider, "standup_analysis", standup_data.get('project_id'), tier, reason)
+
+    def route_summary(self, provider: str, session_data: Dict[str, Any], responses: List[Dict]) -> Dict[str, Any]:
+        """Model and sampling parameters for a session summary"""
+        blocked = sum(1 for r in responses if has_blocker(r.get('blockers')))
+        if len(responses) >= self.large_session_size:
+            tier, reason = LARGE_TIER, "large session"
+        elif blocked >= self.large_session_blockers:
+            tier, reason = LARGE_TIER, "several blockers"
+        else:
+            tier, reason = SMALL_TIER, "small session"
+        return self._decide(provider, "session_summary", session_data.get('project_id'), tier, reason)
+
+    def _decide(self, provider: str, task: str, project_id: Optional[int], tier: str, reason: str) -> Dict[str, Any]:
+        config = self.get_config(project_id) or {}
+        # analysis_depth overrides the content heuristics in either direction
+        depth = config.get("analysis_depth")
+        if depth == "basic":
+            tier, reason = SMALL_TIER, "analysis_depth=basic"
+        elif depth == "detailed":
+            tier, reason = LARGE_TIER, "analysis_depth=detailed"
+
+        tiers = self.models[provider]
+        model = tiers[tier]
+        pinned = config.get("openai_model")
+        # A project can pin one of this provider's models; other providers' names are ignored
+        if pinned not in AUTO_MODELS and pinned in tiers.values():
+            model = pinned
+            tier = next(t for t, m in tiers.items() if m == pinned)
+            reason = "pinned by AIConfig"
+
+        params = dict(DEFAULT_PARAMS[task])
+        # AIConfig's max_tokens/temperature (column defaults 500/0.7) size the per-response analysis;
+        # applying them to summaries would cap every configured project's summary at 500 tokens
+        if task == "standup_analysis":
+            if config.get("max_tokens"):
+                params["max_tokens"] = config["max_tokens"]
+            if config.get("temperature") is not None:
+                params["temperature"] = config["temperature"]
+        return {
+            "tier": tier,
+            "model": model,
+            "max_tokens": params["max_tokens"],
+            "temperature": params["temperature"],
+            "reason": reason,
+        }
+
+    def tier_of(self, model: Optional[str]) -> str:
+        for tiers in self.models.values():
+            for tier, name in tiers.items():
+                if name == model:
+                    return tier
+        return "other"
+
+    def tier_report(self, db: Session, project_id: Optional[int] = None,
+                    start_date: Optional[datetime.date] = None,
+                    end_date: Optional[datetime.date] = None) -> Dict[str, Any]:
+        """Calls, tokens, latency and estimated cost per tier, broken down by model"""
+        usage = usage_analytics.usage_summary(db, project_id=project_id, start_date=start_date,
+                                              end_date=end_date, group_by=("model",))
+        tiers: Dict[str, Dict[str, Any]] = {}
+        for entry in usage["groups"]:
+            tier = tiers.setdefault(self.tier_of(entry["model"]), {
+                "calls": 0, "errors": 0, "tokens_total": 0, "latency_total_ms": 0.0,
+                "estimated_cost_usd": None, "models": []
+            })
+            tier["calls"] += entry["calls"]
+            tier["errors"] += entry["errors"]
+            tier["tokens_total"] += entry["tokens_total"]
+            tier["latency_total_ms"] += (entry["latency_avg_ms"] or 0) * entry["calls"]
+            if entry.get("estimated_cost_usd") is not None:
+                tier["estimated_cost_usd"] = round((tier["estimated_cost_usd"] or 0) + entry["estimated_cost_usd"], 6)
+            tier["models"].append(entry)
+        for tier in tiers.values():
+            latency_total = tier.pop("latency_total_ms")
+            tier["latency_avg_ms"] = round(latency_total / tier["calls"], 1) if tier["calls"] else None
+        return {"models": self.models, "tiers": tiers}
+
+
+# Global instance
+model_router = ModelRouter()
@@ -0,0 +1,306 @@
+import os
+import io
+import gzip
+import json
+import datetime
+from typing import Dict, Any, List, Iterator, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models import SessionLocal, AIAnalysisLog, StandupResponse, ArchivePartition, AnalysisBlob
+from app.services.usage_analytics import usage_analytics
+from app.services.analysis_store import analysis_store
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+LOG_TABLE = "ai_analysis_logs"
+RAW_ANALYSIS_TABLE = "standup_ai_analysis"
+LOG_COLUMNS = ("id", "project_id", "session_id", "response_id", "model_used", "tokens_consumed",
+               "analysis_type", "processing_time_ms", "success", "error_message", "created_at")
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _month(value: datetime.datetime) -> str:
+    return value.strftime("%Y-%m")
+
+
+class _PartitionWriter:
+    """Streams one month's rows to a compressed JSONL file, renamed into place by publish()"""
+
+    def __init__(self, archive_dir: str, table_name: str, partition: str, codec: str):
+        self.table_name = table_name
+        self.partition = partition
+        self.codec = codec
+        self.directory = os.path.join(archive_dir, table_name, partition)
+        os.makedirs(self.directory, exist_ok=True)
+        self.tmp_path = os.path.join(self.directory, f".part-{os.getpid()}-{id(self)}.tmp")
+        # Part of the final name, so a run never replaces or discards a file another run registered
+        self.stamp = datetime.datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+        raw = open(self.tmp_path, "wb")
+        if codec == "zstd":
+            self._stream = io.TextIOWrapper(zstandard.ZstdCompressor(level=10).stream_writer(raw, closefd=False), encoding="utf-8")
+        else:
+            self._stream = io.TextIOWrapper(gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6), encoding="utf-8")
+        self._raw = raw
+        self.row_count = 0
+        self.min_id = self.max_id = None
+        self.min_created_at = self.max_created_at = None
+
+    def write(self, row: Dict[str, Any]):
+        self._stream.write(json.dumps(row, default=_json_default, separators=(",", ":")) + "\n")
+        self.row_count += 1
+        self.min_id = row["id"] if self.min_id is None else min(self.min_id, row["id"])
+        self.max_id = row["id"] if self.max_id is None else max(self.max_id, row["id"])
+        created = row.get("created_at")
+        if created is not None:
+            self.min_created_at = created if self.min_created_at is None else min(self.min_created_at, created)
+            self.max_created_at = created if self.max_created_at is None else max(self.max_created_at, created)
+
+    @property
+    def name(self) -> str:
+        extension = "zst" if self.codec == "zstd" else "gz"
+        return f"part-{self.min_id}-{self.max_id}-{self.stamp}.jsonl.{extension}"
+
+    def close(self) -> str:
+        """Finish the temporary file; returns the path (relative to ARCHIVE_DIR) it will be published at"""
+        self._stream.close()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self._raw.close()
+        return os.path.join(self.table_name, self.partition, self.name)
+
+    def publish(self):
+        os.replace(self.tmp_path, os.path.join(self.directory, self.name))
+
+    def discard(self):
+        for path in (self.tmp_path, os.path.join(self.directory, self.name)):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def abort(self):
+        try:
+            self._stream.close()
+            self._raw.close()
+        finally:
+            if os.path.exists(self.tmp_path):
+                os.remove(self.tmp_path)
+
+
+class RetentionService:
+    def __init__(self):
+        self.archive_dir = os.getenv("ARCHIVE_DIR", "./archive")
+        self.log_retention_days = int(os.getenv("LOG_RETENTION_DAYS", "90"))
+        self.raw_analysis_retention_days = int(os.getenv("RAW_ANALYSIS_RETENTION_DAYS", "30"))
+        self.batch_size = int(os.getenv("RETENTION_BATCH_SIZE", "10000"))
+        self.codec = "zstd" if zstandard is not None else "gzip"
+
+    def apply(self) -> Dict[str, Any]:
+        """Run every retention policy; used by the scheduled task"""
+        db = SessionLocal()
+        try:
+            return {
+                LOG_TABLE: self.archive_analysis_logs(db),
+                RAW_ANALYSIS_TABLE: self.archive_raw_analysis(db),
+            }
+        finally:
+            db.close()
+
+    def archive_analysis_logs(self, db: Session, older_than_days: Optional[int] = None) -> Dict[str, Any]:
+        """Move old AIAnalysisLog rows into monthly archive files; daily usage rollups remain queryable"""
+        days = self.log_retention_days if older_than_days is None else older_than_days
+        cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=days)
+        # Rollups are the summary left behind, so every row must be folded in before it is removed
+        usage_analytics.refresh_rollups(db)
+        # The newest row is never removed: SQLite reuses ids above the highest remaining one, and a reused
+        # id at or below the rollup watermark would never be folded in
+        max_id = db.query(func.max(AIAnalysisLog.id)).scalar() or 0
+
+        def rows(last_id):
+            batch = db.query(AIAnalysisLog).filter(AIAnalysisLog.created_at < cutoff, AIAnalysisLog.id > last_id,
+                                                   AIAnalysisLog.id < max_id) \
+                .order_by(AIAnalysisLog.id).limit(self.batch_size).all()
+            return [{c: getattr(r, c) for c in LOG_COLUMNS} for r in batch], (batch[-1].id if batch else None)
+
+        def remove(ids: List[int]):
+            db.query(AIAnalysisLog).filter(AIAnalysisLog.id.in_(ids)).delete(synchronize_session=False)
+
+        return self._archive(db, LOG_TABLE, rows, remove)
+
+    def archive_raw_analysis(self, db: Session, older_than_days: Optional[int] = None) -> Dict[str, Any]:
+        """Move old full analyses (inline or in analysis_blobs) to archive files, keeping a small inline summary"""
+        days = self.raw_analysis_retention_days if older_than_days is None else older_than_days
+        cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=days)
+        summaries = {}
+
+        def rows(last_id):
+            batch = db.query(StandupResponse.id, StandupResponse.session_id, StandupResponse.created_at,
+                             StandupResponse.ai_analysis) \
+                .filter(StandupResponse.created_at < cutoff, StandupResponse.id > last_id,
+                        StandupResponse.ai_analysis.isnot(None),
+                        StandupResponse.ai_analysis["archived"].as_string().is_(None)) \
+                .order_by(StandupResponse.id).limit(self.batch_size).all()
+            full = analysis_store.expand_many(db, {r[0]: r[3] for r in batch})
+            result = []
+            for response_id, session_id, created_at, analysis in batch:
+                metadata = (analysis.get("metadata") or {}) if isinstance(analysis, dict) else {}
+                summaries[response_id] = {
+                    "archived": _month(created_at),
+                    "sentiment_label": analysis.get("sentiment_label") if isinstance(analysis, dict) else None,
+                    "model": metadata.get("model"),
+                }
+                result.append({"id": response_id, "session_id": session_id,
+                               "created_at": created_at, "ai_analysis": full[response_id]})
+            return result, (batch[-1][0] if batch else None)
+
+        def remove(ids: List[int]):
+            for response_id in ids:
+                db.query(StandupResponse).filter(StandupResponse.id == response_id).update(
+                    {StandupResponse.ai_analysis: summaries.pop(response_id)}, synchronize_session=False)
+            # The normalized analysis_items stay; only the raw copy moves to the archive
+            db.query(AnalysisBlob).filter(AnalysisBlob.response_id.in_(ids)).delete(synchronize_session=False)
+
+        return self._archive(db, RAW_ANALYSIS_TABLE, rows, remove)
+
+    def _archive(self, db: Session, table_name: str, fetch_rows, remove_rows) -> Dict[str, Any]:
+        writers: Dict[str, _PartitionWriter] = {}
+        archived_ids: List[int] = []
+        last_id = 0
+        try:
+            while True:
+                # A batch may come back empty (e.g. already archived) while last_id still advances
+                batch, last_id = fetch_rows(last_id)
+                if last_id is None:
+                    break
+                for row in batch:
+                    partition = _month(row["created_at"])
+                    writer = writers.get(partition)
+                    if writer is None:
+                        writer = writers[partition] = _PartitionWriter(self.archive_dir, table_name, partition, self.codec)
+                    writer.write(row)
+                    archived_ids.append(row["id"])
+        except Exception:
+            for writer in writers.values():
+                writer.abort()
+            raise
+
+        # Files are fsynced, then the partition rows and deletes are flushed, and only then are the files
+        # published. A crash before the commit leaves an unregistered file that is never read (and is
+        # overwritten by the next run); readers also drop ids seen twice, e.g. from overlapping runs.
+        try:
+            for writer in writers.values():
+                db.add(ArchivePartition(
+                    table_name=table_name, partition=writer.partition, path=writer.close(), codec=writer.codec,
+                    row_count=writer.row_count, min_id=writer.min_id, max_id=writer.max_id,
+                    min_created_at=writer.min_created_at, max_created_at=writer.max_created_at
+                ))
+            for start in range(0, len(archived_ids), 1000):
+                remove_rows(archived_ids[start:start + 1000])
+            db.flush()
+            for writer in writers.values():
+                writer.publish()
+            db.commit()
+        except Exception:
+            db.rollback()
+            for writer in writers.values():
+                writer.discard()
+            raise
+        return {"rows_archived": len(archived_ids), "partitions": sorted(writers)}
+
+    def iter_archived(self, db: Session, table_name: str,
+                      start: Optional[datetime.datetime] = None,
+                      end: Optional[datetime.datetime] = None,
+                      seen: Optional[set] = None) -> Iterator[Dict[str, Any]]:
+        """Rows from archive files whose created_at falls in [start, end), each row once.
+
+        Rows are keyed by (id, created_at), since SQLite can reuse the ids of deleted rows; keys are added to seen.
+        """
+        seen = set() if seen is None else seen
+        query = db.query(ArchivePartition).filter(ArchivePartition.table_name == table_name)
+        if start is not None:
+            query = query.filter(ArchivePartition.max_created_at >= start)
+        if end is not None:
+            query = query.filter(ArchivePartition.min_created_at < end)
+        for partition in query.order_by(ArchivePartition.partition, ArchivePartition.min_id).all():
+            for row in self._read_partition(partition.path):
+                created = datetime.datetime.fromisoformat(row["created_at"]) if row.get("created_at") else None
+                if (row["id"], created) in seen:
+                    continue
+                seen.add((row["id"], created))
+                if start is not None and (created is None or created < start):
+                    continue
+                if end is not None and (created is None or created >= end):
+                    continue
+                row["created_at"] = created
+                yield row
+
+    def _read_partition(self, relative_path: str) -> Iterator[Dict[str, Any]]:
+        path = os.path.join(self.archive_dir, relative_path)
+        if path.endswith(".zst"):
+            if zstandard is None:
+                raise ImportError("zstandard package is required to read .zst archives: pip install zstandard")
+            raw = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"))
+        else:
+            raw = gzip.open(path, "rb")
+        with io.TextIOWrapper(raw, encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+    def iter_analysis_logs(self, db: Session,
+                           start: Optional[datetime.datetime] = None,
+                           end: Optional[datetime.datetime] = None,
+                           project_id: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """AIAnalysisLog rows from archives and the live table as one stream, oldest first"""
+        archived: set = set()
+        for row in self.iter_archived(db, LOG_TABLE, start, end, seen=archived):
+            if project_id is None or row.get("project_id") == project_id:
+                yield row
+        filters = []
+        if start is not None:
+            filters.append(AIAnalysisLog.created_at >= start)
+        if end is not None:
+            filters.append(AIAnalysisLog.created_at < end)
+        if project_id is not None:
+            filters.append(AIAnalysisLog.project_id == project_id)
+        last_id = 0
+        while True:
+            batch = db.query(AIAnalysisLog).filter(*filters, AIAnalysisLog.id > last_id) \
+                .order_by(AIAnalysisLog.id).limit(self.batch_size).all()
+            if not batch:
+                return
+            for r in batch:
+                if (r.id, r.created_at) not in archived:
+                    yield {c: getattr(r, c) for c in LOG_COLUMNS}
+            last_id = batch[-1].id
+
+    def get_raw_analysis(self, db: Session, response_id: int) -> Optional[Dict[str, Any]]:
+        """The full ai_analysis for a response, read back from its archive partition if needed"""
+        response = db.get(StandupResponse, response_id)
+        if response is None:
+            return None
+        analysis = response.ai_analysis
+        if not (isinstance(analysis, dict) and analysis.get("archived")):
+            return analysis_store.load(db, response)
+        partitions = db.query(ArchivePartition).filter(
+            ArchivePartition.table_name == RAW_ANALYSIS_TABLE,
+            ArchivePartition.partition == analysis["archived"],
+            ArchivePartition.min_id <= response_id,
+            ArchivePartition.max_id >= response_id
+        ).all()
+        for partition in partitions:
+            for row in self._read_partition(partition.path):
+                if row["id"] == response_id:
+                    return row["ai_analysis"]
+        return analysis
+
+
+# Global instance
+retention_service = RetentionService()
@@ -0,0 +1,38 @@
+import datetime
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.models import AnalyticsWatermark
+
+
+def as_date(value) -> Optional[datetime.date]:
+    """SQLite returns DATE() results as strings, Postgres as dates"""
+    if value is None or isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(str(value)[:10])
+
+
+def claim_watermark(db: Session, name: str) -> AnalyticsWatermark:
+    """Lock a watermark row for the current transaction so concurrent refreshes run one at a time.
+
+    Writing the row first takes the row lock on Postgres and the database write lock on SQLite;
+    a second refresh waits here and then sees the advanced watermark.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        insert = None
+    if insert is not None:
+        db.execute(insert(AnalyticsWatermark).values(name=name, last_id=0)
+                   .on_conflict_do_nothing(index_elements=["name"]))
+    elif db.get(AnalyticsWatermark, name) is None:
+        db.add(AnalyticsWatermark(name=name, last_id=0))
+        db.flush()
+    db.query(AnalyticsWatermark).filter(AnalyticsWatermark.name == name) \
+        .update({AnalyticsWatermark.updated_at: datetime.datetime.utcnow()}, synchronize_session=False)
+    return db.query(AnalyticsWatermark).filter(AnalyticsWatermark.name == name) \
+        .with_for_update().populate_existing().one()
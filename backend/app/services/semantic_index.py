@@ -0,0 +1,497 @@
+import os
+import re
+import json
+import zlib
+import datetime
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models import SessionLocal, StandupSession, StandupResponse, BlockedItem
+from app.blockers import has_blocker
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+KIND_RESPONSE = 0
+KIND_BLOCKER = 1
+KINDS = {"response": KIND_RESPONSE, "blocker": KIND_BLOCKER}
+KIND_NAMES = {v: k for k, v in KINDS.items()}
+WATERMARK_KEYS = {KIND_RESPONSE: "response_watermark", KIND_BLOCKER: "blocker_watermark"}
+
+# Row metadata columns in rows.i64
+COL_KIND, COL_DOC_ID, COL_PROJECT, COL_SESSION, COL_CREATED = range(5)
+ROW_COLUMNS = 5
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have i i'm if in into is it its me my no not of on or our so that the
+their then there these this to was we were will with would yesterday today tomorrow working work worked
+""".split())
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercased word unigrams plus adjacent bigrams; bigrams keep phrases like 'staging db' distinct"""
+    words = [w for w in TOKEN_RE.findall((text or "").lower()) if len(w) > 1 and w not in STOPWORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def response_text(response: StandupResponse) -> str:
+    parts = [response.what_did_i_do, response.what_will_i_do]
+    if has_blocker(response.blockers):
+        parts.append(response.blockers)
+    return "\n".join(p for p in parts if p)
+
+
+def _epoch_seconds(value: Optional[datetime.datetime]) -> int:
+    if value is None:
+        return 0
+    return int(value.replace(tzinfo=datetime.timezone.utc).timestamp())
+
+
+def _from_epoch_seconds(value: int) -> datetime.datetime:
+    return datetime.datetime.fromtimestamp(value, tz=datetime.timezone.utc).replace(tzinfo=None)
+
+
+class SemanticIndex:
+    """Offline similarity search over past standups and blockers.
+
+    Text is embedded with signed feature hashing (no model, no network) into a fixed-width
+    vector; IDF weights come from document frequencies kept alongside and are applied at
+    query time, so adding documents never re-embeds old ones. Vectors live in memory-mapped
+    files shared by every worker on the host, and each project gets a random-hyperplane
+    LSH index over its rows for approximate nearest-neighbour lookup.
+    """
+
+    def __init__(self):
+        self.directory = os.getenv("SEMANTIC_INDEX_DIR", "./semantic_index")
+        self.dims = int(os.getenv("SEMANTIC_DIMENSIONS", "512"))
+        self.lsh_tables = int(os.getenv("SEMANTIC_LSH_TABLES", "8"))
+        self.lsh_bits = int(os.getenv("SEMANTIC_LSH_BITS", "10"))
+        self.exact_limit = int(os.getenv("SEMANTIC_EXACT_SEARCH_ROWS", "2000"))  # Smaller projects skip LSH
+        self.sync_batch = int(os.getenv("SEMANTIC_SYNC_BATCH", "2000"))
+        self.sync_rescan = int(os.getenv("SEMANTIC_SYNC_RESCAN_IDS", "500"))  # Late commits below the watermark
+        self.min_score = float(os.getenv("SEMANTIC_MIN_SCORE", "0.3"))
+        self.context_enabled = os.getenv("SEMANTIC_PROMPT_CONTEXT", "true").lower() == "true"
+        self.context_k = int(os.getenv("SEMANTIC_PROMPT_CONTEXT_K", "3"))
+        self.context_days = int(os.getenv("SEMANTIC_PROMPT_CONTEXT_DAYS", "14"))
+        self.seed = int(os.getenv("SEMANTIC_LSH_SEED", "1234"))
+
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._state_mtime: Optional[int] = None
+        self._state: Dict[str, Any] = {}
+        self._vectors: Optional[np.memmap] = None
+        self._rows: Optional[np.memmap] = None
+        self._codes: Optional[np.memmap] = None
+        self._df: Optional[np.ndarray] = None
+        self._indexed = 0  # Rows already placed in the in-memory buckets
+        self._buckets: Dict[int, List[Dict[int, List[int]]]] = {}
+        self._project_rows: Dict[int, List[int]] = {}
+        self._recent_ids: Dict[int, set] = {kind: set() for kind in WATERMARK_KEYS}  # Doc ids in the rescan window
+        self._planes = np.random.default_rng(self.seed).standard_normal(
+            (self.dims, self.lsh_tables * self.lsh_bits)).astype(np.float32)
+        self._bit_weights = (1 << np.arange(self.lsh_bits, dtype=np.int64))
+        self.stats = {"queries": 0, "exact_queries": 0, "candidates": 0, "indexed": 0, "syncs": 0,
+                      "skipped_syncs": 0}
+
+    # ------------------------------------------------------------------ embedding
+
+    def embed(self, text: Optional[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Unit-length hashed term-frequency vector and the buckets it touches (for document frequency)"""
+        vector = np.zeros(self.dims, dtype=np.float32)
+        counts: Dict[str, int] = {}
+        for token in tokenize(text):
+            counts[token] = counts.get(token, 0) + 1
+        for token, count in counts.items():
+            h = zlib.crc32(token.encode("utf-8"))
+            # Sublinear tf; the sign bit keeps colliding tokens from piling up in one direction
+            vector[h % self.dims] += (1.0 + np.log(count)) * (1.0 if h & 0x80000000 else -1.0)
+        norm = float(np.linalg.norm(vector))
+        if norm > 0:
+            vector /= norm
+        return vector, np.flatnonzero(vector)
+
+    def _codes_for(self, vectors: np.ndarray) -> np.ndarray:
+        bits = (vectors @ self._planes) > 0
+        bits = bits.reshape(len(vectors), self.lsh_tables, self.lsh_bits)
+        return (bits * self._bit_weights).sum(axis=2)
+
+    def _idf(self) -> np.ndarray:
+        n = self._state.get("count", 0)
+        return (np.log((1.0 + n) / (1.0 + self._df)) + 1.0).astype(np.float32)
+
+    # ------------------------------------------------------------------ storage
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    @contextmanager
+    def _write_lock(self, blocking: bool = True):
+        """One writer per host across processes; readers never take it. Yields False if busy and not blocking"""
+        os.makedirs(self.directory, exist_ok=True)
+        if not self._lock.acquire(blocking=blocking):
+            yield False
+            return
+        try:
+            with open(self._path("index.lock"), "a+") as handle:
+                if fcntl is not None:
+                    try:
+                        fcntl.flock(handle, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        yield False
+                        return
+                try:
+                    yield True
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(handle, fcntl.LOCK_UN)
+        finally:
+            self._lock.release()
+
+    def _empty_state(self) -> Dict[str, Any]:
+        return {"generation": int(datetime.datetime.utcnow().timestamp() * 1000), "count": 0, "capacity": 0,
+                "dims": self.dims, "lsh_tables": self.lsh_tables, "lsh_bits": self.lsh_bits, "seed": self.seed, "response_watermark": 0, "blocker_watermark": 0}
+
+    def _open_maps(self, capacity: int):
+        def open_map(name, dtype, width):
+            path = self._path(name)
+            size = capacity * width * np.dtype(dtype).itemsize
+            with open(path, "a+b") as f:
+                if os.path.getsize(path) < size:
+                    f.truncate(size)
+            return np.memmap(path, dtype=dtype, mode="r+", shape=(capacity, width)) if capacity else None
+
+        self._vectors = open_map("vectors.f32", np.float32, self.dims)
+        self._rows = open_map("rows.i64", np.int64, ROW_COLUMNS)
+        self._codes = open_map("codes.i64", np.int64, self.lsh_tables)
+
+    def _reset_memory(self):
+        self._indexed = 0
+        self._buckets = {}
+        self._project_rows = {}
+        self._recent_ids = {kind: set() for kind in WATERMARK_KEYS}
+
+    def _refresh(self):
+        """Pick up rows appended by this or any other process since the last look"""
+        state_path = self._path("state.json")
+        try:
+            mtime = os.stat(state_path).st_mtime_ns
+        except FileNotFoundError:
+            if not self._loaded:
+                self._state = self._empty_state()
+                self._df = np.zeros(self.dims, dtype=np.int64)
+                self._reset_memory()
+                self._loaded = True
+            return
+        if self._loaded and mtime == self._state_mtime:
+            return
+        with open(state_path) as f:
+            state = json.load(f)
+        layout = ("dims", "lsh_tables", "lsh_bits", "seed")
+        if any(state.get(k) != getattr(self, k) for k in layout):
+            raise ValueError("Semantic index on disk was built with different settings; rebuild it")
+        rebuilt = state.get("generation") != self._state.get("generation")
+        if rebuilt or state["capacity"] != self._state.get("capacity"):
+            # A rebuild replaces the files, so the old maps point at unlinked data
+            if rebuilt:
+                self._reset_memory()
+            self._open_maps(state["capacity"])
+        self._state = state
+        self._state_mtime = mtime
+        self._df = np.load(self._path("df.npy")) if os.path.exists(self._path("df.npy")) \
+            else np.zeros(self.dims, dtype=np.int64)
+        self._loaded = True
+        self._index_rows(self._indexed, state["count"])
+
+    def _index_rows(self, start: int, end: int):
+        if end <= start:
+            return
+        projects = self._rows[start:end, COL_PROJECT]
+        codes = np.asarray(self._codes[start:end])
+        for offset, project_id in enumerate(projects.tolist()):
+            row = start + offset
+            tables = self._buckets.get(project_id)
+            if tables is None:
+                tables = self._buckets[project_id] = [{} for _ in range(self.lsh_tables)]
+            for table, code in zip(tables, codes[offset].tolist()):
+                table.setdefault(code, []).append(row)
+            self._project_rows.setdefault(project_id, []).append(row)
+        kinds = np.asarray(self._rows[start:end, COL_KIND])
+        ids = np.asarray(self._rows[start:end, COL_DOC_ID])
+        for kind, recent in self._recent_ids.items():
+            floor = self._rescan_floor(kind)
+            recent.update(ids[(kinds == kind) & (ids > floor)].tolist())
+            # Only ids the next sync rescans are kept, so this stays the size of the rescan window
+            if recent and min(recent) <= floor:
+                self._recent_ids[kind] = {i for i in recent if i > floor}
+        self._indexed = end
+
+    def _rescan_floor(self, kind: int) -> int:
+        return max(self._state.get(WATERMARK_KEYS[kind], 0) - self.sync_rescan, 0)
+
+    def _append(self, docs: List[Tuple[int, int, int, int, int, str]]):
+        """Write (kind, doc_id, project_id, session_id, created, text) rows; caller holds the write lock"""
+        if not docs:
+            return
+        embedded = [self.embed(doc[5]) for doc in docs]
+        vectors = np.stack([v for v, _ in embedded])
+        count = self._state["count"]
+        needed = count + len(docs)
+        if needed > self._state["capacity"]:
+            capacity = max(1024, self._state["capacity"])
+            while capacity < needed:
+                capacity *= 2
+            self._state["capacity"] = capacity
+            self._open_maps(capacity)
+        self._vectors[count:needed] = vectors
+        self._rows[count:needed] = np.array([doc[:5] for doc in docs], dtype=np.int64)
+        self._codes[count:needed] = self._codes_for(vectors)
+        for _, touched in embedded:
+            self._df[touched] += 1
+        for m in (self._vectors, self._rows, self._codes):
+            m.flush()
+        self._state["count"] = needed
+
+    def _save_state(self):
+        # Rows are flushed before the count is published, so readers never see a half-written row
+        np.save(self._path("df.tmp.npy"), self._df)
+        os.replace(self._path("df.tmp.npy"), self._path("df.npy"))
+        with open(self._path("state.json.tmp"), "w") as f:
+            json.dump(self._state, f)
+        os.replace(self._path("state.json.tmp"), self._path("state.json"))
+        self._state_mtime = os.stat(self._path("state.json")).st_mtime_ns
+        self._index_rows(self._indexed, self._state["count"])
+
+    # ------------------------------------------------------------------ indexing
+
+    def sync(self, db: Optional[Session] = None, wait: bool = True) -> Dict[str, int]:
+        """Index responses and blockers inserted since the last sync; called right after inserts and on a schedule.
+
+        With wait=False the sync is skipped when another thread or worker holds the write lock;
+        that writer or the scheduled sync picks the new rows up.
+        """
+        own_session = db is None
+        db = db or SessionLocal()
+        added = {"responses": 0, "blockers": 0}
+        try:
+            with self._write_lock(blocking=wait) as acquired:
+                if not acquired:
+                    self.stats["skipped_syncs"] += 1
+                    return {**added, "skipped": True}
+                self._refresh()
+                added["responses"] = self._sync_kind(
+                    db, KIND_RESPONSE, StandupResponse,
+                    lambda r, project_id: (KIND_RESPONSE, r.id, project_id or 0, r.session_id or 0,
+                                           _epoch_seconds(r.created_at), response_text(r)))
+                added["blockers"] = self._sync_kind(
+                    db, KIND_BLOCKER, BlockedItem,
+                    lambda b, project_id: (KIND_BLOCKER, b.id, project_id or 0, b.session_id or 0,
+                                           _epoch_seconds(b.created_at), b.blocker_description or ""))
+                if added["responses"] or added["blockers"]:
+                    self._save_state()
+            self.stats["syncs"] += 1
+            self.stats["indexed"] += added["responses"] + added["blockers"]
+            return added
+        finally:
+            if own_session:
+                db.close()
+
+    def _sync_kind(self, db: Session, kind: int, model, to_doc) -> int:
+        """Append rows of one kind past the watermark; caller holds the write lock.
+
+        Ids are assigned at insert but become visible at commit, so a lower id can show up after a
+        higher one was indexed. The last sync_rescan ids below the watermark are read again and
+        anything not yet in the index is picked up.
+        """
+        watermark_key = WATERMARK_KEYS[kind]
+        watermark = self._state[watermark_key]
+        cursor = self._rescan_floor(kind)
+        indexed = self._recent_ids[kind]
+        added = 0
+        while True:
+            rows = db.query(model, StandupSession.project_id) \
+                .outerjoin(StandupSession, StandupSession.id == model.session_id) \
+                .filter(model.id > cursor) \
+                .order_by(model.id).limit(self.sync_batch).all()
+            if not rows:
+                break
+            cursor = rows[-1][0].id
+            docs = [to_doc(row, project_id) for row, project_id in rows if row.id not in indexed]
+            self._append(docs)
+            watermark = max(watermark, cursor)
+            added += len(docs)
+        self._state[watermark_key] = watermark
+        return added
+
+    def rebuild(self, db: Optional[Session] = None) -> Dict[str, int]:
+        """Drop the on-disk index and re-embed everything, e.g. after changing dimensions or LSH settings"""
+        with self._write_lock():
+            for name in ("vectors.f32", "rows.i64", "codes.i64", "df.npy", "state.json"):
+                if os.path.exists(self._path(name)):
+                    os.remove(self._path(name))
+            self._vectors = self._rows = self._codes = None
+            self._state = self._empty_state()
+            self._df = np.zeros(self.dims, dtype=np.int64)
+            self._state_mtime = None
+            self._reset_memory()
+            self._loaded = True
+        return self.sync(db)
+
+    # ------------------------------------------------------------------ retrieval
+
+    def _candidates(self, project_id: int, query: np.ndarray) -> np.ndarray:
+        rows = self._project_rows.get(project_id)
+        if not rows:
+            return np.empty(0, dtype=np.int64)
+        if len(rows) <= self.exact_limit:
+            self.stats["exact_queries"] += 1
+            return np.asarray(rows, dtype=np.int64)
+        found = set()
+        codes = self._codes_for(query[None, :])[0].tolist()
+        for table, code in zip(self._buckets[project_id], codes):
+            found.update(table.get(code, ()))
+            # Multi-probe: also look in the buckets one flipped bit away
+            for bit in range(self.lsh_bits):
+                found.update(table.get(code ^ (1 << bit), ()))
+        return np.fromiter(found, dtype=np.int64, count=len(found))
+
+    def search(self, project_id: int, text: str, k: int = 5, kind: Optional[str] = None,
+               before: Optional[datetime.datetime] = None, since: Optional[datetime.datetime] = None,
+               exclude: Optional[Tuple[str, int]] = None, min_score: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Top-k most similar indexed documents in the project, as (kind, id, score, created_at) hits"""
+        if kind is not None and kind not in KINDS:
+            raise ValueError(f"kind must be one of {sorted(KINDS)}")
+        with self._lock:
+            self._refresh()
+            query, _ = self.embed(text)
+            if not query.any():
+                return []
+            candidates = self._candidates(project_id, query)
+            self.stats["queries"] += 1
+            self.stats["candidates"] += len(candidates)
+            if not len(candidates):
+                return []
+            candidates.sort()  # Sequential reads from the memmap
+            meta = np.asarray(self._rows[candidates])
+            mask = np.ones(len(candidates), dtype=bool)
+            if kind is not None:
+                mask &= meta[:, COL_KIND] == KINDS[kind]
+            if before is not None:
+                mask &= meta[:, COL_CREATED] < _epoch_seconds(before)
+            if since is not None:
+                mask &= meta[:, COL_CREATED] >= _epoch_seconds(since)
+            if exclude is not None:
+                mask &= ~((meta[:, COL_KIND] == KINDS[exclude[0]]) & (meta[:, COL_DOC_ID] == exclude[1]))
+            candidates, meta = candidates[mask], meta[mask]
+            if not len(candidates):
+                return []
+            idf = self._idf()
+            weighted_query = query * idf
+            weighted = np.asarray(self._vectors[candidates]) * idf
+            norms = np.linalg.norm(weighted, axis=1) * np.linalg.norm(weighted_query)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                scores = np.where(norms > 0, (weighted @ weighted_query) / norms, 0.0)
+        threshold = self.min_score if min_score is None else min_score
+        order = np.argsort(-scores)[:k]
+        return [{
+            "kind": KIND_NAMES[int(meta[i, COL_KIND])],
+            "id": int(meta[i, COL_DOC_ID]),
+            "session_id": int(meta[i, COL_SESSION]) or None,
+            "created_at": _from_epoch_seconds(int(meta[i, COL_CREATED])).isoformat(),
+            "score": round(float(scores[i]), 4),
+        } for i in order if scores[i] >= threshold]
+
+    def similar(self, db: Session, project_id: int, text: str, k: int = 5, kind: Optional[str] = None,
+                **filters) -> List[Dict[str, Any]]:
+        """search() with each hit's text and developer filled in from the database"""
+        hits = self.search(project_id, text, k=k, kind=kind, **filters)
+        response_ids = [h["id"] for h in hits if h["kind"] == "response"]
+        blocker_ids = [h["id"] for h in hits if h["kind"] == "blocker"]
+        responses = {r.id: r for r in db.query(StandupResponse).filter(StandupResponse.id.in_(response_ids))} \
+            if response_ids else {}
+        blockers = {b.id: b for b in db.query(BlockedItem).filter(BlockedItem.id.in_(blocker_ids))} \
+            if blocker_ids else {}
+        results = []
+        for hit in hits:
+            if hit["kind"] == "response":
+                response = responses.get(hit["id"])
+                if response is None:
+                    continue
+                hit.update(developer_email=response.developer_email, text=response_text(response))
+            else:
+                blocker = blockers.get(hit["id"])
+                if blocker is None:
+                    continue
+                hit.update(developer_email=blocker.response.developer_email if blocker.response else None,
+                           text=blocker.blocker_description, status=blocker.status, severity=blocker.severity)
+            results.append(hit)
+        return results
+
+    def prompt_context(self, db: Session, standup_data: Dict[str, Any]) -> Optional[str]:
+        """Short 'seen before' notes for the analysis prompt, or None when nothing relevant is indexed"""
+        project_id = standup_data.get("project_id")
+        if not self.context_enabled or project_id is None:
+            return None
+        blockers = standup_data.get("blockers") or ""
+        has_blockers = has_blocker(blockers)
+        text = blockers if has_blockers else "\n".join(
+            standup_data.get(f) or "" for f in ("what_did_i_do", "what_will_i_do"))
+        now = datetime.datetime.utcnow()
+        try:
+            hits = self.similar(db, project_id, text, k=max(20, self.context_k), kind="blocker" if has_blockers else None,
+                                since=now - datetime.timedelta(days=self.context_days),
+                                exclude=("response", standup_data["response_id"]) if standup_data.get("response_id") else None)
+        except Exception as e:
+            print(f"Semantic context lookup failed, analyzing without it: {e}")
+            return None
+        if not hits:
+            return None
+        lines = []
+        developer = standup_data.get("developer_email")
+        if has_blockers:
+            days = sorted({h["created_at"][:10] for h in hits})
+            own_days = sorted({h["created_at"][:10] for h in hits if h.get("developer_email") == developer})
+            if len(own_days) >= 2:
+                lines.append(f"This developer reported a similar blocker on {len(own_days)} days "
+                             f"since {own_days[0]}.")
+            elif len(days) >= 2:
+                lines.append(f"Similar blockers were reported by the team on {len(days)} days since {days[0]}.")
+        for hit in hits[:self.context_k]:
+            snippet = " ".join((hit.get("text") or "").split())[:160]
+            status = f", {hit['status']}" if hit.get("status") else ""
+            lines.append(f"- {hit['created_at'][:10]} {hit.get('developer_email') or 'unknown'} "
+                         f"({hit['kind']}{status}, similarity {hit['score']:.2f}): {snippet}")
+        return "\n".join(lines)
+
+    def warm(self):
+        """Map the index files and build the LSH buckets now, before workers fork"""
+        with self._lock:
+            self._refresh()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refresh()
+            state = dict(self._state)
+            projects = {p: len(rows) for p, rows in self._project_rows.items()}
+        return {
+            **self.stats,
+            "directory": os.path.abspath(self.directory),
+            "documents": state.get("count", 0),
+            "capacity": state.get("capacity", 0),
+            "dims": self.dims,
+            "lsh_tables": self.lsh_tables,
+            "lsh_bits": self.lsh_bits,
+            "response_watermark": state.get("response_watermark", 0),
+            "blocker_watermark": state.get("blocker_watermark", 0),
+            "projects": projects,
+        }
+
+
+# Global instance
+semantic_index = SemanticIndex()
@@ -0,0 +1,438 @@
+import os
+import random
+import datetime
+from itertools import zip_longest
+from typing import Dict, Any, List, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models import (SessionLocal, Project, StandupSession, StandupResponse,
+                        StandupSchedule, SessionProcessingJob)
+from app.services.groq_analysis import groq_service
+from app.services.ai_analysis import ai_service
+from app.services.dashboard_service import dashboard_service
+from app.services.config_cache import config_cache
+from app.services.semantic_index import semantic_index
+from app.services.analysis_store import analysis_store
+from app.services.live_board import live_board, response_event, blocker_event
+from app.services.slack_notifier import slack_notifier
+
+# planned: written at close, tasks not yet handed to the broker; queued: dispatched
+ACTIVE_JOB_STATUSES = ("planned", "queued", "processing")
+RISK_ORDER = ("low", "medium", "high", "critical")
+
+
+def _parse_cutoff(value: str) -> datetime.time:
+    try:
+        hour, minute = value.split(":")
+        return datetime.time(int(hour), int(minute))
+    except (ValueError, AttributeError):
+        raise ValueError(f"cutoff_time must be HH:MM, got {value!r}")
+
+
+def _zone(name: str) -> ZoneInfo:
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown timezone: {name}")
+
+
+class SessionScheduler:
+    """Closes standup sessions at each project's cutoff and spreads the AI work into rate-limited waves"""
+
+    def __init__(self):
+        self.default_cutoff = os.getenv("STANDUP_DEFAULT_CUTOFF", "09:30")
+        self.rate_limit_rpm = int(os.getenv("AI_RATE_LIMIT_RPM", "30"))
+        self.rate_headroom = float(os.getenv("SCHEDULER_RATE_HEADROOM", "0.8"))
+        self.wave_seconds = int(os.getenv("SCHEDULER_WAVE_SECONDS", "60"))
+        # A job still "planned" this long after close lost its dispatch (e.g. the broker failed) and is re-planned
+        self.dispatch_grace = datetime.timedelta(seconds=int(os.getenv("SCHEDULER_DISPATCH_GRACE_SECONDS", "300")))
+
+    @property
+    def wave_capacity(self) -> int:
+        """AI calls allowed per wave, leaving headroom for interactive requests"""
+        return max(1, int(self.rate_limit_rpm * self.rate_headroom * self.wave_seconds / 60))
+
+    # Schedules
+
+    def list_schedules(self, db: Session, now: Optional[datetime.datetime] = None) -> List[Dict[str, Any]]:
+        now = now or datetime.datetime.utcnow()
+        return [self._schedule_to_dict(s, now) for s in db.query(StandupSchedule).order_by(StandupSchedule.project_id).all()]
+
+    def upsert_schedule(self, db: Session, project_id: int, cutoff_time: Optional[str] = None,
+                        timezone: Optional[str] = None, is_active: Optional[bool] = None) -> Dict[str, Any]:
+        if db.get(Project, project_id) is None:
+            raise ValueError(f"Project {project_id} not found")
+        if cutoff_time is not None:
+            _parse_cutoff(cutoff_time)
+        if timezone is not None:
+            _zone(timezone)
+        schedule = db.query(StandupSchedule).filter(StandupSchedule.project_id == project_id).first()
+        if schedule is None:
+            schedule = StandupSchedule(project_id=project_id, cutoff_time=self.default_cutoff, timezone="UTC", is_active=True)
+            db.add(schedule)
+        if cutoff_time is not None:
+            schedule.cutoff_time = cutoff_time
+        if timezone is not None:
+            schedule.timezone = timezone
+        if is_active is not None:
+            schedule.is_active = is_active
+        db.commit()
+        return self._schedule_to_dict(schedule, datetime.datetime.utcnow())
+
+    def _cutoff_utc(self, schedule: StandupSchedule, local_date: datetime.date) -> datetime.datetime:
+        zone = _zone(schedule.timezone or "UTC")
+        local = datetime.datetime.combine(local_date, _parse_cutoff(schedule.cutoff_time or self.default_cutoff), tzinfo=zone)
+        return local.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+    def _local_date(self, schedule: StandupSchedule, now: datetime.datetime) -> datetime.date:
+        zone = _zone(schedule.timezone or "UTC")
+        return now.replace(tzinfo=datetime.timezone.utc).astimezone(zone).date()
+
+    def _schedule_to_dict(self, schedule: StandupSchedule, now: datetime.datetime) -> Dict[str, Any]:
+        today = self._local_date(schedule, now)
+        next_date = today if schedule.last_closed_date != today and self._cutoff_utc(schedule, today) > now \
+            else today + datetime.timedelta(days=1)
+        return {
+            "project_id": schedule.project_id,
+            "cutoff_time": schedule.cutoff_time,
+            "timezone": schedule.timezone,
+            "is_active": schedule.is_active,
+            "last_closed_date": schedule.last_closed_date.isoformat() if schedule.last_closed_date else None,
+            "next_cutoff_utc": self._cutoff_utc(schedule, next_date).isoformat() if schedule.is_active else None,
+        }
+
+    # Closing and planning
+
+    def close_due_sessions(self, now: Optional[datetime.datetime] = None) -> Dict[str, Any]:
+        """Close sessions whose cutoff has passed and plan their analysis; returns the tasks to dispatch"""
+        now = now or datetime.datetime.utcnow()
+        db = SessionLocal()
+        try:
+            closed: Dict[int, List[Dict[str, Any]]] = {}
+            replanned = self._reclaim_undispatched(db, now, closed)
+            # Overlapping runs skip schedules another run holds (Postgres); the conditional status update
+            # below keeps a session from being closed twice on any database
+            schedules = db.query(StandupSchedule).filter(StandupSchedule.is_active == True) \
+                .with_for_update(skip_locked=True).all()
+            for schedule in schedules:
+                today = self._local_date(schedule, now)
+                cutoff = self._cutoff_utc(schedule, today)
+                if schedule.last_closed_date == today or now < cutoff:
+                    continue
+                session_ids = [sid for (sid,) in db.query(StandupSession.id).filter(
+                    StandupSession.project_id == schedule.project_id,
+                    StandupSession.status == "pending",
+                    StandupSession.date < cutoff
+                ).order_by(StandupSession.id).all()]
+                for session_id in session_ids:
+                    claimed = db.query(StandupSession).filter(StandupSession.id == session_id,
+                                                              StandupSession.status == "pending") \
+                        .update({StandupSession.status: "in-progress"}, synchronize_session=False)
+                    if not claimed:
+                        continue
+                    closed.setdefault(schedule.project_id, []).append(
+                        {"session_id": session_id, "responses": self._unanalyzed(db, session_id)})
+                schedule.last_closed_date = today
+            plan = self._plan_waves(db, closed, now)
+            db.commit()
+            for project_id, sessions in closed.items():
+                dashboard_service.invalidate(project_id)
+                for s in sessions:
+                    live_board.publish(s["session_id"], "session_status", {"status": "in-progress"})
+            return {
+                "closed_sessions": sum(len(s) for s in closed.values()) - replanned,
+                "replanned_sessions": replanned,
+                "projects": sorted(closed),
+                "analysis_tasks": sum(1 for t in plan if t["kind"] == "analysis"),
+                "summary_tasks": sum(1 for t in plan if t["kind"] == "summary"),
+                "waves": (max(t["wave"] for t in plan) + 1) if plan else 0,
+                "plan": plan,
+            }
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _unanalyzed(self, db: Session, session_id: int) -> List[int]:
+        return [r for (r,) in db.query(StandupResponse.id).filter(
+            StandupResponse.session_id == session_id,
+            StandupResponse.ai_analysis.is_(None)
+        ).order_by(StandupResponse.id).all()]
+
+    def _reclaim_undispatched(self, db: Session, now: datetime.datetime,
+                              closed: Dict[int, List[Dict[str, Any]]]) -> int:
+        """Put sessions whose tasks never reached the broker back into this run's plan"""
+        stale = db.query(SessionProcessingJob).filter(
+            SessionProcessingJob.status == "planned",
+            SessionProcessingJob.created_at < now - self.dispatch_grace
+        ).with_for_update(skip_locked=True).all()
+        for job in stale:
+            closed.setdefault(job.project_id, []).append(
+                {"session_id": job.session_id, "responses": self._unanalyzed(db, job.session_id)})
+            db.delete(job)
+        if stale:
+            db.flush()
+        return len(stale)
+
+    def mark_dispatched(self, session_ids: List[int]):
+        """Record that a close's tasks are with the broker, so the session is not re-planned"""
+        if not session_ids:
+            return
+        db = SessionLocal()
+        try:
+            db.query(SessionProcessingJob).filter(SessionProcessingJob.session_id.in_(session_ids),
+                                                  SessionProcessingJob.status == "planned") \
+                .update({SessionProcessingJob.status: "queued"}, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def _plan_waves(self, db: Session, closed: Dict[int, List[Dict[str, Any]]],
+                    now: datetime.datetime) -> List[Dict[str, Any]]:
+        """Interleave projects into waves of at most wave_capacity calls, each jittered within its window"""
+        if not closed:
+            return []
+        # Start after work already queued by earlier closes so the combined rate stays under the limit
+        horizon = db.query(func.max(SessionProcessingJob.summary_scheduled_at)) \
+            .filter(SessionProcessingJob.status.in_(ACTIVE_JOB_STATUSES)).scalar()
+        start = max(now, horizon + datetime.timedelta(seconds=self.wave_seconds)) if horizon else now
+
+        # Round-robin across projects, then sessions, so no project waits behind a large one
+        per_project = []
+        for sessions in closed.values():
+            per_project.append([(s["session_id"], r) for s in sessions for r in s["responses"]])
+        analysis_units = [u for group in zip_longest(*per_project) for u in group if u is not None]
+        last_wave = {s["session_id"]: -1 for sessions in closed.values() for s in sessions}
+        unplanned = {s["session_id"]: len(s["responses"]) for sessions in closed.values() for s in sessions}
+
+        capacity = self.wave_capacity
+        plan: List[Dict[str, Any]] = []
+        waiting_summaries = list(last_wave)
+        wave = 0
+        position = 0
+        while position < len(analysis_units) or waiting_summaries:
+            slots = capacity
+            # A summary runs in the wave after its session's last analysis
+            ready = [s for s in waiting_summaries if unplanned[s] == 0 and last_wave[s] < wave]
+            for session_id in ready[:slots]:
+                plan.append({"kind": "summary", "id": session_id, "session_id": session_id, "wave": wave})
+                waiting_summaries.remove(session_id)
+            slots -= min(len(ready), slots)
+            for session_id, response_id in analysis_units[position:position + slots]:
+                plan.append({"kind": "analysis", "id": response_id, "session_id": session_id, "wave": wave})
+                last_wave[session_id] = wave
+                unplanned[session_id] -= 1
+            position += slots
+            wave += 1
+
+        # Jitter spreads each wave over its whole window instead of bursting at the boundary
+        offset = (start - now).total_seconds()
+        for task in plan:
+            task["countdown"] = round(offset + task["wave"] * self.wave_seconds + random.uniform(0, self.wave_seconds), 2)
+            task["eta"] = now + datetime.timedelta(seconds=task["countdown"])
+
+        for project_id, sessions in closed.items():
+            for s in sessions:
+                tasks = [t for t in plan if t["session_id"] == s["session_id"]]
+                summary = next(t for t in tasks if t["kind"] == "summary")
+                db.add(SessionProcessingJob(
+                    session_id=s["session_id"],
+                    project_id=project_id,
+                    status="planned",
+                    created_at=now,
+                    total_responses=len(s["responses"]),
+                    first_wave=min(t["wave"] for t in tasks),
+                    summary_wave=summary["wave"],
+                    scheduled_from=min(t["eta"] for t in tasks),
+                    summary_scheduled_at=summary["eta"],
+                ))
+        for task in plan:
+            task["eta"] = task["eta"].isoformat()
+        return plan
+
+    # Workers
+
+    def process_response(self, response_id: int) -> Dict[str, Any]:
+        """Analyze one response from a closed session and record progress on its job"""
+        db = SessionLocal()
+        try:
+            response = db.get(StandupResponse, response_id)
+            if response is None:
+                return {"status": "missing", "response_id": response_id}
+            session = db.get(StandupSession, response.session_id)
+            job = self._job(db, response.session_id)
+            # A "planned" job stays planned until mark_dispatched, so a close whose dispatch fails
+            # partway is still re-planned even if some of its first-wave tasks already ran
+            if job is not None and job.status == "queued":
+                job.status = "processing"
+                job.started_at = datetime.datetime.utcnow()
+                db.commit()
+            if response.ai_analysis is not None:
+                # Saved analyses are committed together with their count, so this one is already counted
+                return {"status": "skipped", "response_id": response_id}
+
+            analysis_data = {
+                "response_id": response.id,
+                "session_id": response.session_id,
+                "project_id": session.project_id if session else None,
+                "developer_email": response.developer_email,
+                "developer_name": response.developer_name,
+                "what_did_i_do": response.what_did_i_do,
+                "what_will_i_do": response.what_will_i_do,
+                "blockers": response.blockers,
+            }
+            analysis_data["history_context"] = semantic_index.prompt_context(db, analysis_data)
+            try:
+                result = groq_service.analyze_standup_response(analysis_data)
+            except Exception:
+                result = ai_service.analyze_standup_response(analysis_data)
+
+            opened = []
+            if "error" not in result:
+                opened = analysis_store.save(db, response, result, analysis_data["project_id"])
+            # Commits the analysis and its count in one transaction, so a retried task never counts it twice
+            self._count(db, response.session_id, success="error" not in result)
+            live_board.publish(response.session_id, "analysis_failed" if "error" in result else "analysis_completed",
+                               response_event(response))
+            for item in opened:
+                live_board.publish(item.session_id, "blocker_opened", blocker_event(item))
+            if slack_notifier.notify_blockers(db, analysis_data["project_id"], opened):
+                db.commit()
+            return {"status": "failed" if "error" in result else "analyzed", "response_id": response_id}
+        finally:
+            db.close()
+
+    def pending_analyses(self, session_id: int) -> int:
+        db = SessionLocal()
+        try:
+            job = self._job(db, session_id)
+            if job is None:
+                return 0
+            return max(0, (job.total_responses or 0) - (job.analyzed_responses or 0) - (job.failed_responses or 0))
+        finally:
+            db.close()
+
+    def summarize_session(self, session_id: int) -> Dict[str, Any]:
+        """Roll a closed session's responses up into its summary and mark it completed"""
+        db = SessionLocal()
+        try:
+            session = db.get(StandupSession, session_id)
+            if session is None:
+                return {"status": "missing", "session_id": session_id}
+            job = self._job(db, session_id)
+            responses = db.query(StandupResponse).filter(StandupResponse.session_id == session_id) \
+                .order_by(StandupResponse.id).all()
+            scores = [r.sentiment_score for r in responses if r.sentiment_score is not None]
+            risks = [r.risk_level for r in responses if r.risk_level in RISK_ORDER]
+            session.participant_count = len({r.developer_email for r in responses})
+            session.blocker_count = sum(1 for r in responses if r.has_blockers or (r.blockers or "").strip())
+            session.sentiment_score = round(sum(scores) / len(scores), 3) if scores else None
+            session.risk_level = max(risks, key=RISK_ORDER.index) if risks else None
+
+            config = config_cache.get_ai_config(session.project_id)
+            error = None
+            if responses and (config is None or config["auto_generate_summaries"] is not False):
+                session_data = {"session_id": session.id, "project_id": session.project_id,
+                                "date": session.date.isoformat() if session.date else None}
+                response_data = [{
+                    "developer_name": r.developer_name,
+                    "developer_email": r.developer_email,
+                    "what_did_i_do": r.what_did_i_do,
+                    "what_will_i_do": r.what_will_i_do,
+                    "blockers": r.blockers,
+                    "sentiment_score": r.sentiment_score,
+                } for r in responses]
+                try:
+                    result = groq_service.generate_session_summary(session_data, response_data)
+                except Exception:
+                    result = ai_service.generate_session_summary(session_data, response_data)
+                if "error" in result:
+                    error = result["error"]
+                else:
+                    session.ai_generated_summary = result.get("summary")
+                    session.summary = session.summary or result.get("summary")
+
+            session.status = "completed"
+            if job is not None:
+                job.status = "failed" if error else "completed"
+                job.error_message = error
+                job.started_at = job.started_at or datetime.datetime.utcnow()
+                job.finished_at = datetime.datetime.utcnow()
+            db.commit()
+            if slack_notifier.notify_session_summary(db, session):
+                db.commit()
+            dashboard_service.invalidate(session.project_id)
+            live_board.publish(session_id, "session_status", {
+                "status": session.status,
+                "summary": session.ai_generated_summary,
+                "sentiment_score": session.sentiment_score,
+                "risk_level": session.risk_level,
+            })
+            return {"status": "failed" if error else "completed", "session_id": session_id, "error": error}
+        finally:
+            db.close()
+
+    def _job(self, db: Session, session_id: int) -> Optional[SessionProcessingJob]:
+        return db.query(SessionProcessingJob).filter(SessionProcessingJob.session_id == session_id).first()
+
+    def _count(self, db: Session, session_id: int, success: bool):
+        # Increment in SQL so concurrent workers don't lose updates
+        column = SessionProcessingJob.analyzed_responses if success else SessionProcessingJob.failed_responses
+        db.query(SessionProcessingJob).filter(SessionProcessingJob.session_id == session_id) \
+            .update({column: func.coalesce(column, 0) + 1}, synchronize_session=False)
+        db.commit()
+
+    # Progress
+
+    def progress(self, db: Session, day: Optional[datetime.date] = None,
+                 project_id: Optional[int] = None) -> Dict[str, Any]:
+        """Processing jobs for sessions closed on a given day (UTC), with overall completion"""
+        query = db.query(SessionProcessingJob)
+        if day is not None:
+            start = datetime.datetime.combine(day, datetime.time())
+            query = query.filter(SessionProcessingJob.created_at >= start,
+                                 SessionProcessingJob.created_at < start + datetime.timedelta(days=1))
+        if project_id is not None:
+            query = query.filter(SessionProcessingJob.project_id == project_id)
+        jobs = query.order_by(SessionProcessingJob.id.desc()).limit(500).all()
+
+        by_status: Dict[str, int] = {}
+        total = done = 0
+        items = []
+        for job in jobs:
+            by_status[job.status] = by_status.get(job.status, 0) + 1
+            processed = (job.analyzed_responses or 0) + (job.failed_responses or 0)
+            total += job.total_responses or 0
+            done += processed
+            items.append({
+                "session_id": job.session_id,
+                "project_id": job.project_id,
+                "status": job.status,
+                "total_responses": job.total_responses,
+                "analyzed_responses": job.analyzed_responses,
+                "failed_responses": job.failed_responses,
+                # The summary counts as one more step after the analyses
+                "percent_complete": 100.0 if job.status in ("completed", "failed")
+                else round(100.0 * processed / ((job.total_responses or 0) + 1), 1),
+                "scheduled_from": job.scheduled_from.isoformat() if job.scheduled_from else None,
+                "summary_scheduled_at": job.summary_scheduled_at.isoformat() if job.summary_scheduled_at else None,
+                "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+                "error": job.error_message,
+            })
+        return {
+            "jobs": len(items),
+            "by_status": by_status,
+            "responses_total": total,
+            "responses_processed": done,
+            "wave_capacity": self.wave_capacity,
+            "wave_seconds": self.wave_seconds,
+            "items": items,
+        }
+
+
+# Global instance
+session_scheduler = SessionScheduler()
@@ -0,0 +1,116 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Tuple
+
+from app.redis_client import get_redis
+
+
+def make_key(*parts: Any) -> str:
+    """Stable key for a provider call from everything that affects its output"""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapses concurrent identical calls into one; optionally across workers through Redis"""
+
+    def __init__(self, use_redis: bool = False, namespace: str = "autoscrum:singleflight"):
+        self.use_redis = use_redis
+        self.namespace = namespace
+        self.lock_ttl_ms = int(os.getenv("SINGLE_FLIGHT_LOCK_TTL_MS", "60000"))
+        self.result_ttl_ms = int(os.getenv("SINGLE_FLIGHT_RESULT_TTL_MS", "10000"))
+        self.poll_interval = float(os.getenv("SINGLE_FLIGHT_POLL_SECONDS", "0.05"))
+        # Followers stop waiting on a slow leader after this and make the call themselves
+        self.wait_timeout = float(os.getenv("SINGLE_FLIGHT_WAIT_SECONDS", "30"))
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self.stats = {"leaders": 0, "coalesced": 0, "remote_coalesced": 0, "redis_errors": 0, "wait_timeouts": 0}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Run fn once per key among concurrent callers; returns (result, coalesced)"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            if not call.event.wait(self.wait_timeout):
+                self.stats["wait_timeouts"] += 1
+                return fn(), False
+            self.stats["coalesced"] += 1
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        self.stats["leaders"] += 1
+        coalesced = False
+        try:
+            call.result, coalesced = self._run(key, fn)
+            return call.result, coalesced
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def _run(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        client = get_redis() if self.use_redis else None
+        if client is None:
+            return fn(), False
+        lock_key = f"{self.namespace}:lock:{key}"
+        result_key = f"{self.namespace}:result:{key}"
+        token = uuid.uuid4().hex
+        try:
+            cached = client.get(result_key)
+            if cached is not None:
+                self.stats["remote_coalesced"] += 1
+                return json.loads(cached), True
+            acquired = client.set(lock_key, token, nx=True, px=self.lock_ttl_ms)
+        except Exception as e:
+            self.stats["redis_errors"] += 1
+            print(f"Single-flight Redis unavailable, calling provider directly: {e}")
+            return fn(), False
+
+        if not acquired:
+            # Another worker owns this call: wait for its result, or take over if it disappears
+            deadline = time.monotonic() + self.lock_ttl_ms / 1000.0
+            try:
+                while time.monotonic() < deadline:
+                    cached = client.get(result_key)
+                    if cached is not None:
+                        self.stats["remote_coalesced"] += 1
+                        return json.loads(cached), True
+                    if not client.exists(lock_key):
+                        break
+                    time.sleep(self.poll_interval)
+            except Exception:
+                self.stats["redis_errors"] += 1
+            return fn(), False
+
+        try:
+            result = fn()
+            if not (isinstance(result, dict) and result.get("error")):
+                client.set(result_key, json.dumps(result, default=str), px=self.result_ttl_ms)
+            return result, False
+        finally:
+            try:
+                if client.get(lock_key) == token.encode():
+                    client.delete(lock_key)
+            except Exception:
+                self.stats["redis_errors"] += 1
+
+
+# Global instance
+single_flight = SingleFlight(use_redis=os.getenv("SINGLE_FLIGHT_REDIS", "false").lower() in ("1", "true", "yes"))
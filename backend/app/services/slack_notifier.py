@@ -0,0 +1,316 @@
+import os
+import time
+import uuid
+import random
+import datetime
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+import requests
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from app.models import SessionLocal, NotificationOutbox, StandupSession, BlockedItem, TeamMember
+from app.services.config_cache import config_cache
+
+# Slack errors that no retry will fix
+PERMANENT_ERRORS = {"channel_not_found", "not_in_channel", "is_archived", "invalid_auth", "not_authed",
+                    "account_inactive", "user_not_found", "cannot_dm_bot", "msg_too_long", "no_text"}
+
+
+class SlackError(Exception):
+    def __init__(self, message: str, retryable: bool = True, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class SlackNotifier:
+    """Delivers standup summaries and blocker alerts to Slack through an outbox.
+
+    Events are written to notification_outbox and nothing is sent inline. A periodic flush
+    picks every channel or user whose oldest pending item has waited out the coalescing
+    window and sends one digest per target (split only when it gets too long), so a burst
+    such as a session close becomes a few messages. Sends are paced to the configured rate,
+    Retry-After is honoured, and failed items back off exponentially until they give up.
+    """
+
+    def __init__(self):
+        self.token = os.getenv("SLACK_BOT_TOKEN")
+        self.api_url = os.getenv("SLACK_API_URL", "https://slack.com/api").rstrip("/")
+        self.window = float(os.getenv("SLACK_COALESCE_SECONDS", "60"))
+        self.max_batch = int(os.getenv("SLACK_MAX_BATCH", "50"))  # A target this full is flushed early
+        self.items_per_message = int(os.getenv("SLACK_ITEMS_PER_MESSAGE", "25"))
+        self.max_message_chars = int(os.getenv("SLACK_MAX_MESSAGE_CHARS", "3500"))
+        self.summary_chars = int(os.getenv("SLACK_SUMMARY_CHARS", "1200"))
+        self.rate = float(os.getenv("SLACK_MESSAGES_PER_SECOND", "1"))
+        self.max_attempts = int(os.getenv("SLACK_MAX_ATTEMPTS", "6"))
+        self.backoff_base = float(os.getenv("SLACK_BACKOFF_SECONDS", "5"))
+        self.backoff_max = float(os.getenv("SLACK_BACKOFF_MAX_SECONDS", "600"))
+        self.claim_timeout = datetime.timedelta(seconds=int(os.getenv("SLACK_CLAIM_TIMEOUT_SECONDS", "600")))
+        self.timeout = float(os.getenv("SLACK_TIMEOUT", "10"))
+        self.alert_roles = {r.strip().lower() for r in os.getenv("SLACK_ALERT_ROLES", "scrum master,scrum_master,lead")
+                            .split(",") if r.strip()}
+        self._session: Optional[requests.Session] = None
+        self._pace_lock = threading.Lock()
+        self._next_send = 0.0
+        self.stats = {"enqueued": 0, "duplicates": 0, "messages_sent": 0, "items_sent": 0,
+                      "rate_limited": 0, "errors": 0}
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.token)
+
+    # Producers
+
+    def enqueue(self, db: Session, project_id: Optional[int], kind: str, target_type: str, target: Optional[str],
+                section: str, text: str, dedupe_key: Optional[str] = None) -> bool:
+        """Add one line to a target's next digest; the caller commits. False if dropped or Slack is off"""
+        if not self.configured or not target:
+            return False
+        values = dict(project_id=project_id, kind=kind, target_type=target_type, target=target,
+                      dedupe_key=dedupe_key, payload={"section": section, "text": text}, status="pending",
+                      attempts=0, created_at=datetime.datetime.utcnow())
+        if dedupe_key and self._insert_ignore(db, values) == 0:
+            self.stats["duplicates"] += 1
+            return False
+        if not dedupe_key:
+            db.add(NotificationOutbox(**values))
+        self.stats["enqueued"] += 1
+        return True
+
+    def _insert_ignore(self, db: Session, values: Dict[str, Any]) -> int:
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            if db.query(NotificationOutbox.id).filter(NotificationOutbox.dedupe_key == values["dedupe_key"]).first():
+                return 0
+            db.add(NotificationOutbox(**values))
+            db.flush()
+            return 1
+        return db.execute(insert(NotificationOutbox).values(**values)
+                          .on_conflict_do_nothing(index_elements=["dedupe_key"])).rowcount
+
+    def notify_session_summary(self, db: Session, session: StandupSession) -> int:
+        """Queue a closed session's summary for its project channel"""
+        project = config_cache.get_project(session.project_id) or {}
+        channel = project.get("slack_channel_id")
+        summary = (session.ai_generated_summary or session.summary or "").strip()
+        if not channel or not summary:
+            return 0
+        if len(summary) > self.summary_chars:
+            summary = summary[:self.summary_chars].rsplit(" ", 1)[0] + " ..."
+        day = session.date.strftime("%Y-%m-%d") if session.date else f"session {session.id}"
+        stats = f"{session.participant_count or 0} updates, {session.blocker_count or 0} with blockers"
+        text = f"*{project.get('name') or 'Standup'} {day}* ({stats})\n{summary}"
+        return int(self.enqueue(db, session.project_id, "session_summary", "channel", channel,
+                                "Standup summaries", text, dedupe_key=f"summary:{session.id}:{channel}"))
+
+    def notify_blockers(self, db: Session, project_id: Optional[int], items: List[BlockedItem]) -> int:
+        """Queue new blockers for the project channel and as direct alerts to the project's leads"""
+        if not items or project_id is None or not self.configured:
+            return 0
+        channel = (config_cache.get_project(project_id) or {}).get("slack_channel_id")
+        recipients = [user_id for (user_id,) in db.query(TeamMember.slack_user_id).filter(
+            TeamMember.project_id == project_id, TeamMember.is_active == True,
+            TeamMember.slack_user_id.isnot(None), func.lower(TeamMember.role).in_(self.alert_roles))]
+        queued = 0
+        for item in items:
+            developer = item.response.developer_name or item.response.developer_email if item.response else None
+            text = f"{developer or 'Someone'}: {item.blocker_description} ({item.severity or 'unrated'})"
+            queued += self.enqueue(db, project_id, "blocker", "channel", channel, "New blockers", text,
+                                   dedupe_key=f"blocker:{item.id}:{channel}")
+            for user_id in recipients:
+                queued += self.enqueue(db, project_id, "blocker", "user", user_id, "Blockers needing attention",
+                                       text, dedupe_key=f"blocker:{item.id}:{user_id}")
+        return queued
+
+    # Delivery
+
+    def due_targets(self, now: Optional[datetime.datetime] = None, force: bool = False) -> List[Tuple[str, str]]:
+        """Targets whose coalescing window has closed (or whose backlog is already a full batch)"""
+        now = now or datetime.datetime.utcnow()
+        db = SessionLocal()
+        try:
+            # Items claimed by a worker that died mid-send go back in the queue
+            db.query(NotificationOutbox).filter(NotificationOutbox.status == "sending",
+                                                NotificationOutbox.claimed_at < now - self.claim_timeout) \
+                .update({NotificationOutbox.status: "pending", NotificationOutbox.claim_token: None},
+                        synchronize_session=False)
+            db.commit()
+            rows = db.query(NotificationOutbox.target_type, NotificationOutbox.target,
+                            func.min(NotificationOutbox.created_at), func.count(NotificationOutbox.id)) \
+                .filter(NotificationOutbox.status == "pending", self._ready(now)) \
+                .group_by(NotificationOutbox.target_type, NotificationOutbox.target).all()
+        finally:
+            db.close()
+        cutoff = now - datetime.timedelta(seconds=self.window)
+        return [(target_type, target) for target_type, target, oldest, count in rows
+                if force or oldest <= cutoff or count >= self.max_batch]
+
+    def _ready(self, now: datetime.datetime):
+        return or_(NotificationOutbox.next_attempt_at.is_(None), NotificationOutbox.next_attempt_at <= now)
+
+    def deliver(self, target_type: str, target: str) -> Dict[str, Any]:
+        """Send a target's pending items as one digest; retry_in is set when some must be retried later"""
+        now = datetime.datetime.utcnow()
+        token = uuid.uuid4().hex
+        db = SessionLocal()
+        try:
+            ids = [i for (i,) in db.query(NotificationOutbox.id).filter(
+                NotificationOutbox.status == "pending", NotificationOutbox.target_type == target_type,
+                NotificationOutbox.target == target, self._ready(now)).order_by(NotificationOutbox.id)]
+            if ids:
+                # Claim atomically so a concurrent flush of the same target cannot send these twice
+                db.query(NotificationOutbox).filter(NotificationOutbox.id.in_(ids),
+                                                    NotificationOutbox.status == "pending") \
+                    .update({NotificationOutbox.status: "sending", NotificationOutbox.claim_token: token,
+                             NotificationOutbox.claimed_at: now,
+                             NotificationOutbox.attempts: func.coalesce(NotificationOutbox.attempts, 0) + 1},
+                            synchronize_session=False)
+                db.commit()
+            items = db.query(NotificationOutbox).filter(NotificationOutbox.claim_token == token) \
+                .order_by(NotificationOutbox.id).all()
+            if not items:
+                return {"target": target, "messages": 0, "items": 0, "retry_in": None}
+
+            messages = self._compose(items)
+            sent_messages = sent_items = 0
+            for text, batch in messages:
+                try:
+                    self._post(target, text)
+                except SlackError as e:
+                    remaining = [item for _, b in messages[sent_messages:] for item in b]
+                    retry_in = self._fail(db, remaining, e)
+                    return {"target": target, "messages": sent_messages, "items": sent_items,
+                            "error": str(e), "retry_in": retry_in}
+                # Marked per message, so a later failure does not resend what already went out
+                sent_at = datetime.datetime.utcnow()
+                for item in batch:
+                    item.status, item.sent_at, item.error_message = "sent", sent_at, None
+                db.commit()
+                sent_messages += 1
+                sent_items += len(batch)
+                self.stats["messages_sent"] += 1
+                self.stats["items_sent"] += len(batch)
+            return {"target": target, "messages": sent_messages, "items": sent_items, "retry_in": None}
+        finally:
+            db.close()
+
+    def flush(self, force: bool = False) -> Dict[str, Any]:
+        """Deliver every due target inline; the scheduled path fans out to Celery tasks instead"""
+        results = [self.deliver(target_type, target) for target_type, target in self.due_targets(force=force)]
+        return {"targets": len(results), "messages": sum(r["messages"] for r in results),
+                "items": sum(r["items"] for r in results), "results": results}
+
+    def _fail(self, db: Session, items: List[NotificationOutbox], error: SlackError) -> Optional[float]:
+        self.stats["errors"] += 1
+        retry_in = None
+        for item in items:
+            item.claim_token = None
+            item.error_message = str(error)
+            if not error.retryable or (item.attempts or 0) >= self.max_attempts:
+                item.status = "failed"
+                continue
+            delay = error.retry_after if error.retry_after is not None else self.backoff(item.attempts or 1)
+            item.status = "pending"
+            item.next_attempt_at = datetime.datetime.utcnow() + datetime.timedelta(seconds=delay)
+            retry_in = delay if retry_in is None else max(retry_in, delay)
+        db.commit()
+        print(f"Slack delivery failed ({'retrying' if retry_in is not None else 'giving up'}): {error}")
+        return retry_in
+
+    def backoff(self, attempts: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * 2 ** max(attempts - 1, 0))
+        return round(delay * random.uniform(0.8, 1.2), 1)
+
+    def _compose(self, items: List[NotificationOutbox]) -> List[Tuple[str, List[NotificationOutbox]]]:
+        """Group lines by section and split into messages that stay under Slack's size limits"""
+        sections: Dict[str, List[NotificationOutbox]] = {}
+        for item in items:
+            sections.setdefault((item.payload or {}).get("section") or "Updates", []).append(item)
+        messages: List[Tuple[List[str], List[NotificationOutbox]]] = []
+        lines: List[str] = []
+        batch: List[NotificationOutbox] = []
+        length = 0
+        for section, section_items in sections.items():
+            for index, item in enumerate(section_items):
+                line = f"• {(item.payload or {}).get('text', '')}"
+                heading = [f"*{section}*"] if index == 0 or not lines else []
+                size = len(line) + sum(len(h) + 1 for h in heading) + 1
+                if batch and (len(batch) >= self.items_per_message or length + size > self.max_message_chars):
+                    messages.append((lines, batch))
+                    lines, batch, length = [], [], 0
+                    heading = [f"*{section}*"]
+                    size = len(line) + len(heading[0]) + 2
+                lines.extend(heading + [line])
+                batch.append(item)
+                length += size
+        if batch:
+            messages.append((lines, batch))
+        total = len(messages)
+        header = f"*AutoScrum digest* ({len(items)} update{'s' if len(items) != 1 else ''})"
+        return [(f"{header}{f' [{n}/{total}]' if total > 1 else ''}\n" + "\n".join(body), batch)
+                for n, (body, batch) in enumerate(messages, start=1)]
+
+    def _post(self, channel: str, text: str):
+        # Paced across threads in this process; Slack allows about one message per second per channel
+        with self._pace_lock:
+            now = time.monotonic()
+            wait = self._next_send - now
+            self._next_send = max(now, self._next_send) + 1.0 / self.rate
+        if wait > 0:
+            time.sleep(wait)
+        try:
+            response = self._client().post(f"{self.api_url}/chat.postMessage", timeout=self.timeout,
+                                           json={"channel": channel, "text": text, "unfurl_links": False})
+        except requests.RequestException as e:
+            raise SlackError(f"Slack request failed: {e}")
+        if response.status_code == 429:
+            self.stats["rate_limited"] += 1
+            raise SlackError("rate limited", retry_after=float(response.headers.get("Retry-After", 30)))
+        if response.status_code >= 500:
+            raise SlackError(f"Slack returned HTTP {response.status_code}")
+        try:
+            data = response.json()
+        except ValueError:
+            raise SlackError(f"Slack returned HTTP {response.status_code} without JSON")
+        if not data.get("ok"):
+            error = data.get("error") or f"HTTP {response.status_code}"
+            if error == "ratelimited":
+                self.stats["rate_limited"] += 1
+                raise SlackError(error, retry_after=float(response.headers.get("Retry-After", 30)))
+            raise SlackError(error, retryable=error not in PERMANENT_ERRORS)
+
+    def _client(self) -> requests.Session:
+        if self._session is None:
+            session = requests.Session()
+            session.headers.update({"Authorization": f"Bearer {self.token}",
+                                    "Content-Type": "application/json; charset=utf-8"})
+            self._session = session
+        return self._session
+
+    def get_stats(self, db: Session) -> Dict[str, Any]:
+        counts = dict(db.query(NotificationOutbox.status, func.count(NotificationOutbox.id))
+                      .group_by(NotificationOutbox.status).all())
+        pending_targets = db.query(func.count(func.distinct(NotificationOutbox.target))) \
+            .filter(NotificationOutbox.status == "pending").scalar()
+        return {**self.stats, "configured": self.configured, "outbox": counts, "pending_targets": pending_targets,
+                "coalesce_seconds": self.window, "messages_per_second": self.rate}
+
+
+# Global instance
+slack_notifier = SlackNotifier()
+
+
+def _reset_after_fork():
+    # The child opens its own HTTP connections and keeps its own send pacing
+    slack_notifier._session = None
+    slack_notifier._pace_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
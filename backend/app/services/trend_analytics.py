@@ -0,0 +1,289 @@
+import os
+import time
+import datetime
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, case, or_, and_
+from sqlalchemy.orm import Session
+
+from app.models import SessionLocal, StandupSession, StandupResponse, SentimentDaily
+from app.services.rollup_utils import as_date, claim_watermark
+
+ID_WATERMARK = "sentiment_daily:id"
+UPDATED_WATERMARK = "sentiment_daily:updated_at"  # last_id holds epoch ms of the last refresh start
+
+RISK_SCORES = {"low": 0, "medium": 1, "high": 2, "critical": 3}
+SCOPES = ("team", "developer")
+
+
+def _epoch_ms(value: datetime.datetime) -> int:
+    return int(value.replace(tzinfo=datetime.timezone.utc).timestamp() * 1000)
+
+
+def _from_epoch_ms(value: int) -> datetime.datetime:
+    return datetime.datetime.fromtimestamp(value / 1000.0, tz=datetime.timezone.utc).replace(tzinfo=None)
+
+
+def _rolling_sum(matrix: np.ndarray, window: int) -> np.ndarray:
+    """Trailing window sums along the time axis of a (series x days) matrix"""
+    total = np.cumsum(matrix, axis=1)
+    total[:, window:] = total[:, window:] - total[:, :-window].copy()
+    return total
+
+
+def _shift(matrix: np.ndarray, days: int) -> np.ndarray:
+    shifted = np.zeros_like(matrix)
+    if days < matrix.shape[1]:
+        shifted[:, days:] = matrix[:, :-days] if days else matrix
+    return shifted
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(denominator > 0, numerator / np.maximum(denominator, 1e-12), np.nan)
+
+
+class TrendAnalyticsService:
+    def __init__(self):
+        self.window = int(os.getenv("TREND_ROLLING_WINDOW_DAYS", "7"))
+        self.ewma_alpha = float(os.getenv("TREND_EWMA_ALPHA", "0.3"))
+        self.drop_threshold = float(os.getenv("TREND_SENTIMENT_DROP", "0.3"))  # Absolute drop below the EWMA
+        self.drop_sigmas = float(os.getenv("TREND_SENTIMENT_DROP_SIGMAS", "2.0"))
+        self.warmup_days = int(os.getenv("TREND_WARMUP_DAYS", "3"))
+        self.blocker_short_days = int(os.getenv("TREND_BLOCKER_SHORT_DAYS", "3"))
+        self.blocker_long_days = int(os.getenv("TREND_BLOCKER_LONG_DAYS", "14"))
+        self.blocker_rise_factor = float(os.getenv("TREND_BLOCKER_RISE_FACTOR", "1.5"))
+        self.blocker_min_rate = float(os.getenv("TREND_BLOCKER_MIN_RATE", "0.25"))
+        self.blocker_min_count = int(os.getenv("TREND_BLOCKER_MIN_COUNT", "2"))  # Blockers in the short window
+        self.refresh_overlap = datetime.timedelta(seconds=int(os.getenv("TREND_REFRESH_OVERLAP_SECONDS", "300")))
+        self.cache_ttl = float(os.getenv("TREND_CACHE_TTL", "300"))
+        self._cache: Dict[Tuple, Tuple[float, int, Dict[str, Any]]] = {}
+        self._version = 0
+        self._lock = threading.Lock()
+
+    # Incremental daily aggregates
+
+    def refresh(self, db: Optional[Session] = None) -> Dict[str, int]:
+        """Recompute daily aggregates only for the (project, day) pairs touched since the last refresh"""
+        own_session = db is None
+        db = db or SessionLocal()
+        try:
+            # Locked in a fixed order, so a concurrent refresh waits instead of rebuilding the same days
+            id_mark = claim_watermark(db, ID_WATERMARK)
+            updated_mark = claim_watermark(db, UPDATED_WATERMARK)
+            started_at = datetime.datetime.utcnow()
+            # Bound the id scan first so rows inserted while this runs are left for the next refresh
+            max_id = db.query(func.max(StandupResponse.id)).scalar()
+            day = func.date(StandupResponse.created_at)
+            # New rows are found by id (bulk imports carry historical timestamps), later analyses by updated_at
+            touched = db.query(StandupSession.project_id, day).join(
+                StandupSession, StandupSession.id == StandupResponse.session_id)
+            conditions = [and_(StandupResponse.id > (id_mark.last_id or 0), StandupResponse.id <= (max_id or 0))]
+            if updated_mark.last_id:
+                conditions.append(StandupResponse.updated_at >= _from_epoch_ms(updated_mark.last_id) - self.refresh_overlap)
+            dirty: Dict[int, set] = {}
+            for project_id, d in touched.filter(or_(*conditions)).distinct().all():
+                dirty.setdefault(project_id, set()).add(as_date(d))
+
+            rows = 0
+            for project_id, days in dirty.items():
+                rows += self._rebuild_days(db, project_id, sorted(days))
+            id_mark.last_id = max(id_mark.last_id or 0, max_id or 0)
+            updated_mark.last_id = max(updated_mark.last_id or 0, _epoch_ms(started_at))
+            db.commit()
+            if dirty:
+                with self._lock:
+                    self._version += 1
+                    self._cache.clear()
+            return {"projects": len(dirty), "days": sum(len(d) for d in dirty.values()), "rows": rows}
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            if own_session:
+                db.close()
+
+    def _rebuild_days(self, db: Session, project_id: int, days: List[datetime.date]) -> int:
+        start = datetime.datetime.combine(days[0], datetime.time())
+        end = datetime.datetime.combine(days[-1], datetime.time()) + datetime.timedelta(days=1)
+        day = func.date(StandupResponse.created_at)
+        risk = case(*[(StandupResponse.risk_level == level, score) for level, score in RISK_SCORES.items()], else_=None)
+        aggregates = db.query(
+            StandupResponse.developer_email, day,
+            func.count(StandupResponse.id),
+            func.count(StandupResponse.sentiment_score),
+            func.sum(StandupResponse.sentiment_score),
+            func.sum(case((StandupResponse.has_blockers == True, 1), else_=0)),
+            func.count(risk),
+            func.sum(risk),
+        ).join(StandupSession, StandupSession.id == StandupResponse.session_id).filter(
+            StandupSession.project_id == project_id,
+            StandupResponse.created_at >= start,
+            StandupResponse.created_at < end
+        ).group_by(StandupResponse.developer_email, day).all()
+
+        wanted = set(days)
+        db.query(SentimentDaily).filter(SentimentDaily.project_id == project_id,
+                                        SentimentDaily.day.in_(days)).delete(synchronize_session=False)
+        rows = [{
+            "project_id": project_id, "developer_email": email, "day": as_date(d),
+            "response_count": responses, "sentiment_count": sentiments, "sentiment_sum": sentiment_sum or 0.0,
+            "blocker_count": blockers or 0, "risk_count": risks, "risk_score_sum": float(risk_sum or 0),
+        } for email, d, responses, sentiments, sentiment_sum, blockers, risks, risk_sum in aggregates
+            if as_date(d) in wanted]
+        if rows:
+            db.bulk_insert_mappings(SentimentDaily, rows)
+        return len(rows)
+
+    # Time series
+
+    def trends(self, db: Session, project_id: Optional[int] = None, scope: str = "team",
+               developer_email: Optional[str] = None, days: int = 90,
+               end_date: Optional[datetime.date] = None) -> Dict[str, Any]:
+        """Daily mean, rolling mean, EWMA, blocker and risk rates with anomaly flags for each series.
+
+        Read-only: sentiment_daily is brought up to date by the scheduled refresh (or POST .../trends/refresh).
+        """
+        if scope not in SCOPES:
+            raise ValueError(f"scope must be one of: {', '.join(SCOPES)}")
+        end = end_date or datetime.datetime.utcnow().date()
+        key = (project_id, scope, developer_email, days, end)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached and cached[1] == self._version and time.monotonic() - cached[0] < self.cache_ttl:
+                return cached[2]
+
+        with self._lock:
+            version = self._version
+        start = end - datetime.timedelta(days=days - 1)
+        result = self._compute(self._load(db, project_id, scope, developer_email, start, end), start, days)
+        result.update({"scope": scope, "project_id": project_id, "start_date": start.isoformat(),
+                       "end_date": end.isoformat(), "window_days": self.window, "ewma_alpha": self.ewma_alpha})
+        with self._lock:
+            self._cache[key] = (time.monotonic(), version, result)
+        return result
+
+    def anomalies(self, db: Session, project_id: Optional[int] = None, days: int = 30,
+                  end_date: Optional[datetime.date] = None) -> List[Dict[str, Any]]:
+        """Flagged days across team and developer series, newest first"""
+        flagged = []
+        for scope in SCOPES:
+            for series in self.trends(db, project_id, scope, days=days, end_date=end_date)["series"]:
+                for anomaly in series["anomalies"]:
+                    flagged.append({"scope": scope, "project_id": series["project_id"],
+                                    "developer_email": series.get("developer_email"), **anomaly})
+        return sorted(flagged, key=lambda a: a["date"], reverse=True)
+
+    def _load(self, db: Session, project_id: Optional[int], scope: str, developer_email: Optional[str],
+              start: datetime.date, end: datetime.date) -> Dict[str, np.ndarray]:
+        """Columnar daily aggregates; team scope sums developers in SQL"""
+        keys = [SentimentDaily.project_id] + ([SentimentDaily.developer_email] if scope == "developer" else [])
+        query = db.query(
+            *keys, SentimentDaily.day,
+            func.sum(SentimentDaily.response_count), func.sum(SentimentDaily.sentiment_count),
+            func.sum(SentimentDaily.sentiment_sum), func.sum(SentimentDaily.blocker_count),
+            func.sum(SentimentDaily.risk_count), func.sum(SentimentDaily.risk_score_sum),
+        ).filter(SentimentDaily.day >= start, SentimentDaily.day <= end)
+        if project_id is not None:
+            query = query.filter(SentimentDaily.project_id == project_id)
+        if developer_email:
+            query = query.filter(SentimentDaily.developer_email == developer_email)
+        rows = query.group_by(*keys, SentimentDaily.day).all()
+
+        n_keys = len(keys)
+        series_keys = sorted({tuple(r[:n_keys]) for r in rows}, key=lambda k: tuple(str(v) for v in k))
+        index = {k: i for i, k in enumerate(series_keys)}
+        columns = list(zip(*rows)) if rows else [[]] * (n_keys + 7)
+        return {
+            "keys": series_keys,
+            "series": np.array([index[tuple(r[:n_keys])] for r in rows], dtype=np.int64),
+            "day": np.array([(as_date(d) - start).days for d in columns[n_keys]], dtype=np.int64),
+            "responses": np.array(columns[n_keys + 1], dtype=np.float64),
+            "sentiment_count": np.array(columns[n_keys + 2], dtype=np.float64),
+            "sentiment_sum": np.array([v or 0.0 for v in columns[n_keys + 3]], dtype=np.float64),
+            "blockers": np.array([v or 0 for v in columns[n_keys + 4]], dtype=np.float64),
+            "risk_count": np.array(columns[n_keys + 5], dtype=np.float64),
+            "risk_sum": np.array([v or 0.0 for v in columns[n_keys + 6]], dtype=np.float64),
+            "scope_fields": ["project_id"] + (["developer_email"] if scope == "developer" else []),
+        }
+
+    def _compute(self, data: Dict[str, Any], start: datetime.date, days: int) -> Dict[str, Any]:
+        """All series at once: a (series x days) matrix per measure, one pass over the days for the EWMA"""
+        n_series = len(data["keys"])
+        shape = (n_series, days)
+
+        def matrix(name):
+            m = np.zeros(shape)
+            np.add.at(m, (data["series"], data["day"]), data[name])
+            return m
+
+        responses, sentiment_count, sentiment_sum = matrix("responses"), matrix("sentiment_count"), matrix("sentiment_sum")
+        blockers, risk_count, risk_sum = matrix("blockers"), matrix("risk_count"), matrix("risk_sum")
+
+        daily = _ratio(sentiment_sum, sentiment_count)
+        rolling = _ratio(_rolling_sum(sentiment_sum, self.window), _rolling_sum(sentiment_count, self.window))
+        risk = _ratio(_rolling_sum(risk_sum, self.window), _rolling_sum(risk_count, self.window))
+        blocker_rate = _ratio(blockers, responses)
+
+        # Recent blocker rate against the longer window just before it
+        short_blockers = _rolling_sum(blockers, self.blocker_short_days)
+        short_rate = _ratio(short_blockers, _rolling_sum(responses, self.blocker_short_days))
+        baseline_responses = _shift(_rolling_sum(responses, self.blocker_long_days), self.blocker_short_days)
+        baseline_rate = _ratio(_shift(_rolling_sum(blockers, self.blocker_long_days), self.blocker_short_days),
+                               baseline_responses)
+        with np.errstate(invalid="ignore"):
+            rising = (short_rate >= self.blocker_min_rate) & (short_blockers >= self.blocker_min_count) & \
+                     (baseline_responses > 0) & \
+                     (short_rate >= self.blocker_rise_factor * np.maximum(baseline_rate, 1e-9))
+
+        # EWMA and EW variance carried across days without data
+        ewma = np.full(shape, np.nan)
+        drops = np.zeros(shape, dtype=bool)
+        mean = np.full(n_series, np.nan)
+        var = np.zeros(n_series)
+        seen = np.zeros(n_series, dtype=np.int64)
+        for t in range(days):
+            x = daily[:, t]
+            has = ~np.isnan(x)
+            first = has & (seen == 0)
+            update = has & (seen > 0)
+            diff = np.where(update, x - np.nan_to_num(mean), 0.0)
+            drops[:, t] = update & (seen >= self.warmup_days) & (-diff >= self.drop_threshold) & \
+                (-diff >= self.drop_sigmas * np.sqrt(var))
+            increment = self.ewma_alpha * diff
+            mean = np.where(first, x, np.where(update, mean + increment, mean))
+            var = np.where(update, (1 - self.ewma_alpha) * (var + diff * increment), var)
+            seen += has
+            ewma[:, t] = mean
+
+        dates = [(start + datetime.timedelta(days=t)).isoformat() for t in range(days)]
+
+        def values(row):
+            return [None if np.isnan(v) else round(float(v), 4) for v in row]
+
+        series = []
+        for i, key in enumerate(data["keys"]):
+            anomalies = [{"date": dates[t], "type": "sentiment_drop", "value": round(float(daily[i, t]), 4),
+                          "baseline": round(float(ewma[i, t - 1]), 4)} for t in np.flatnonzero(drops[i])]
+            # Only the first day of a run of rising blocker days is reported
+            rising_starts = np.flatnonzero(rising[i] & ~np.concatenate(([False], rising[i, :-1])))
+            anomalies += [{"date": dates[t], "type": "rising_blocker_rate", "value": round(float(short_rate[i, t]), 4),
+                           "baseline": None if np.isnan(baseline_rate[i, t]) else round(float(baseline_rate[i, t]), 4)}
+                          for t in rising_starts]
+            series.append({
+                **dict(zip(data["scope_fields"], key)),
+                "responses": int(responses[i].sum()),
+                "sentiment": values(daily[i]),
+                "sentiment_rolling": values(rolling[i]),
+                "sentiment_ewma": values(ewma[i]),
+                "blocker_rate": values(blocker_rate[i]),
+                "risk_rolling": values(risk[i]),
+                "anomalies": sorted(anomalies, key=lambda a: a["date"]),
+            })
+        return {"dates": dates, "series": series}
+
+
+# Global instance
+trend_analytics = TrendAnalyticsService()
@@ -0,0 +1,231 @@
+import os
+import json
+import datetime
+from typing import Dict, Any, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import func, case, and_
+from sqlalchemy.orm import Session
+
+from app.models import SessionLocal, AIAnalysisLog, AIUsageRollup
+from app.services.rollup_utils import as_date, claim_watermark
+
+# Latency histogram bucket upper bounds (ms), geometric so relative error stays ~20% at any scale.
+# The last bucket collects everything above the final bound.
+LATENCY_BUCKETS_MS = np.geomspace(1, 300000, 64)
+PERCENTILES = (50, 90, 95, 99)
+
+WATERMARK_NAME = "ai_usage_rollups"
+GROUP_COLUMNS = {
+    "project": AIUsageRollup.project_id,
+    "model": AIUsageRollup.model_used,
+    "type": AIUsageRollup.analysis_type,
+    "day": AIUsageRollup.day,
+}
+
+
+def histogram_percentiles(histograms: np.ndarray, max_latency: np.ndarray,
+                          percentiles: Sequence[int] = PERCENTILES) -> np.ndarray:
+    """Estimate percentiles for each row of a (groups x buckets) histogram matrix at once"""
+    counts = histograms.sum(axis=1, keepdims=True)
+    cdf = np.cumsum(histograms, axis=1) / np.maximum(counts, 1)
+    upper = np.append(LATENCY_BUCKETS_MS, max(LATENCY_BUCKETS_MS[-1], max_latency.max(initial=0)))
+    lower = np.concatenate(([0.0], upper[:-1]))
+    rows = np.arange(histograms.shape[0])
+    result = np.empty((histograms.shape[0], len(percentiles)))
+    for i, p in enumerate(percentiles):
+        q = p / 100.0
+        idx = np.minimum((cdf < q).sum(axis=1), len(upper) - 1)
+        below = np.where(idx > 0, cdf[rows, idx - 1], 0.0)
+        share = np.maximum(cdf[rows, idx] - below, 1e-12)
+        # Interpolate linearly inside the bucket the percentile falls into
+        result[:, i] = lower[idx] + (upper[idx] - lower[idx]) * np.clip((q - below) / share, 0.0, 1.0)
+    # A bucket bound can overshoot the slowest observed call; never report above it
+    result = np.minimum(result, max_latency[:, None])
+    result[counts[:, 0] == 0] = np.nan
+    return result
+
+
+class UsageAnalyticsService:
+    def __init__(self):
+        self.refresh_batch_size = int(os.getenv("USAGE_ROLLUP_BATCH_SIZE", "50000"))
+        # Logs younger than this are left for the next refresh, so a row whose transaction commits
+        # after a higher id was folded is not skipped by the id watermark
+        self.settle_delay = datetime.timedelta(seconds=int(os.getenv("USAGE_ROLLUP_SETTLE_SECONDS", "120")))
+        self.model_costs = json.loads(os.getenv("MODEL_COST_PER_1K_TOKENS", "{}"))
+
+    def refresh_rollups(self, db: Optional[Session] = None) -> int:
+        """Fold AIAnalysisLog rows written since the last refresh into daily rollups; returns the logs folded"""
+        own_session = db is None
+        db = db or SessionLocal()
+        folded = 0
+        try:
+            while True:
+                batch = self._refresh_batch(db)
+                if batch is None:
+                    break
+                folded += batch
+            return folded
+        finally:
+            if own_session:
+                db.close()
+
+    def _refresh_batch(self, db: Session) -> Optional[int]:
+        """Fold the next id range and return the number of logs in it, or None when caught up"""
+        watermark = claim_watermark(db, WATERMARK_NAME)
+        low = watermark.last_id or 0
+        settled = datetime.datetime.utcnow() - self.settle_delay
+        max_id = db.query(func.max(AIAnalysisLog.id)) \
+            .filter(AIAnalysisLog.id > low, AIAnalysisLog.created_at <= settled).scalar()
+        if max_id is None:
+            db.commit()
+            return None
+        high = min(max_id, low + self.refresh_batch_size)
+        in_range = and_(AIAnalysisLog.id > low, AIAnalysisLog.id <= high)
+        day = func.date(AIAnalysisLog.created_at)
+        keys = (AIAnalysisLog.project_id, AIAnalysisLog.model_used, AIAnalysisLog.analysis_type, day)
+
+        # Counters are aggregated by the database
+        totals = db.query(
+            *keys,
+            func.count(AIAnalysisLog.id),
+            func.sum(case((AIAnalysisLog.success.is_(False), 1), else_=0)),
+            func.coalesce(func.sum(AIAnalysisLog.tokens_consumed), 0),
+            func.coalesce(func.sum(AIAnalysisLog.processing_time_ms), 0),
+            func.coalesce(func.max(AIAnalysisLog.processing_time_ms), 0),
+        ).filter(in_range).group_by(*keys).all()
+
+        # Histograms need the raw latencies of just this delta, bucketed in one vectorized pass
+        latency_rows = db.query(*keys, AIAnalysisLog.processing_time_ms).filter(in_range).all()
+        codes = {}
+        group_codes = np.fromiter(
+            (codes.setdefault((r[0], r[1], r[2], as_date(r[3])), len(codes)) for r in latency_rows),
+            dtype=np.int64, count=len(latency_rows))
+        latencies = np.fromiter((r[4] or 0 for r in latency_rows), dtype=np.float64, count=len(latency_rows))
+        n_buckets = len(LATENCY_BUCKETS_MS) + 1
+        buckets = np.searchsorted(LATENCY_BUCKETS_MS, latencies, side="left")
+        histograms = np.bincount(group_codes * n_buckets + buckets,
+                                 minlength=len(codes) * n_buckets).reshape(len(codes), n_buckets)
+
+        days = {as_date(row[3]) for row in totals}
+        existing = {
+            (r.project_id, r.model_used, r.analysis_type, r.day): r
+            for r in db.query(AIUsageRollup).filter(AIUsageRollup.day.in_(days)).all()
+        }
+        folded = 0
+        for project_id, model_used, analysis_type, raw_day, calls, errors, tokens, latency_sum, latency_max in totals:
+            key = (project_id, model_used, analysis_type, as_date(raw_day))
+            rollup = existing.get(key)
+            if rollup is None:
+                rollup = AIUsageRollup(
+                    project_id=project_id, model_used=model_used, analysis_type=analysis_type, day=key[3],
+                    call_count=0, error_count=0, tokens_total=0, latency_total_ms=0, latency_max_ms=0,
+                    latency_histogram=[0] * n_buckets
+                )
+                db.add(rollup)
+                db.flush()
+                existing[key] = rollup
+            # Counters are incremented in SQL; the histogram is merged here, safe under the watermark lock
+            db.query(AIUsageRollup).filter(AIUsageRollup.id == rollup.id).update({
+                AIUsageRollup.call_count: AIUsageRollup.call_count + calls,
+                AIUsageRollup.error_count: AIUsageRollup.error_count + (errors or 0),
+                AIUsageRollup.tokens_total: AIUsageRollup.tokens_total + tokens,
+                AIUsageRollup.latency_total_ms: AIUsageRollup.latency_total_ms + latency_sum,
+                AIUsageRollup.latency_max_ms: case((AIUsageRollup.latency_max_ms > latency_max,
+                                                    AIUsageRollup.latency_max_ms), else_=latency_max),
+                AIUsageRollup.latency_histogram: (np.asarray(rollup.latency_histogram or [0] * n_buckets)
+                                                  + histograms[codes[key]]).tolist(),
+            }, synchronize_session=False)
+            folded += calls
+
+        watermark.last_id = high
+        db.commit()
+        return folded
+
+    def usage_summary(self, db: Session,
+                      project_id: Optional[int] = None,
+                      model: Optional[str] = None,
+                      start_date: Optional[datetime.date] = None,
+                      end_date: Optional[datetime.date] = None,
+                      group_by: Sequence[str] = ("project", "model", "day")) -> Dict[str, Any]:
+        """Token totals, error rates and latency percentiles grouped by project/model/type/day.
+
+        Read-only: rollups are kept current by the scheduled refresh task (or POST /api/analytics/usage/refresh).
+        """
+        unknown = [g for g in group_by if g not in GROUP_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown group_by dimension(s): {', '.join(unknown)}")
+
+        group_cols = [GROUP_COLUMNS[g] for g in group_by]
+        filters = []
+        if project_id is not None:
+            filters.append(AIUsageRollup.project_id == project_id)
+        if model:
+            filters.append(AIUsageRollup.model_used == model)
+        if start_date:
+            filters.append(AIUsageRollup.day >= start_date)
+        if end_date:
+            filters.append(AIUsageRollup.day <= end_date)
+
+        totals = db.query(
+            *group_cols,
+            func.sum(AIUsageRollup.call_count),
+            func.sum(AIUsageRollup.error_count),
+            func.sum(AIUsageRollup.tokens_total),
+            func.sum(AIUsageRollup.latency_total_ms),
+            func.max(AIUsageRollup.latency_max_ms),
+        ).filter(*filters).group_by(*group_cols).order_by(*group_cols).all()
+
+        # Percentiles can't be pushed into SQL portably; merge the stored histograms per group instead
+        n_groups = len(group_cols)
+        index = {tuple(row[:n_groups]): i for i, row in enumerate(totals)}
+        n_buckets = len(LATENCY_BUCKETS_MS) + 1
+        merged = np.zeros((len(totals), n_buckets), dtype=np.int64)
+        hist_rows = db.query(*group_cols, AIUsageRollup.latency_histogram).filter(*filters).all()
+        if hist_rows:
+            row_codes = np.array([index[tuple(r[:n_groups])] for r in hist_rows], dtype=np.int64)
+            matrix = np.array([r[n_groups] or [0] * n_buckets for r in hist_rows], dtype=np.int64)
+            np.add.at(merged, row_codes, matrix)
+        max_latency = np.array([row[n_groups + 4] or 0 for row in totals], dtype=np.float64)
+        percentiles = histogram_percentiles(merged, max_latency)
+
+        groups = []
+        for i, row in enumerate(totals):
+            calls, errors, tokens, latency_sum, latency_max = row[n_groups:]
+            entry = {dim: (value.isoformat() if isinstance(value, datetime.date) else value)
+                     for dim, value in zip(group_by, row[:n_groups])}
+            entry.update({
+                "calls": int(calls or 0),
+                "errors": int(errors or 0),
+                "error_rate": round((errors or 0) / calls, 4) if calls else 0.0,
+                "tokens_total": int(tokens or 0),
+                "latency_avg_ms": round(latency_sum / calls, 1) if calls else None,
+                "latency_max_ms": int(latency_max or 0),
+            })
+            for p, value in zip(PERCENTILES, percentiles[i]):
+                entry[f"latency_p{p}_ms"] = None if np.isnan(value) else round(float(value), 1)
+            cost = self.estimate_cost(entry.get("model"), entry["tokens_total"]) if "model" in entry else None
+            if cost is not None:
+                entry["estimated_cost_usd"] = cost
+            groups.append(entry)
+
+        return {
+            "group_by": list(group_by),
+            "groups": groups,
+            "totals": {
+                "calls": sum(g["calls"] for g in groups),
+                "errors": sum(g["errors"] for g in groups),
+                "tokens_total": sum(g["tokens_total"] for g in groups),
+            }
+        }
+
+    def estimate_cost(self, model: Optional[str], tokens: int) -> Optional[float]:
+        """Estimated spend from MODEL_COST_PER_1K_TOKENS, e.g. {"llama-3.1-8b-instant": 0.00008}"""
+        rate = self.model_costs.get(model)
+        if rate is None:
+            return None
+        return round(tokens / 1000.0 * float(rate), 6)
+
+
+# Global instance
+usage_analytics = UsageAnalyticsService()
@@ -1,6 +1,13 @@
 from app.celery import celery_app
 from app.services.groq_analysis import groq_service
 from app.services.ai_analysis import ai_service
+from app.services.usage_analytics import usage_analytics
+from app.services.jira_mirror import jira_mirror
+from app.services.retention import retention_service
+from app.services.session_scheduler import session_scheduler
+from app.services.trend_analytics import trend_analytics
+from app.services.semantic_index import semantic_index
+from app.services.slack_notifier import slack_notifier
 import time
 
 @celery_app.task
@@ -25,3 +32,73 @@ def generate_session_summary_task(session_data, responses):
             return ai_service.generate_session_summary(session_data, responses)
     except Exception as e:
         return {"error": str(e), "summary": "Background summary generation failed"}
+
+@celery_app.task
+def refresh_usage_rollups_task():
+    """Background task folding new AI analysis logs into usage rollups"""
+    return {"rows_folded": usage_analytics.refresh_rollups()}
+
+@celery_app.task
+def refresh_sentiment_trends_task():
+    """Fold new and re-analyzed standup responses into the daily sentiment aggregates"""
+    return trend_analytics.refresh()
+
+@celery_app.task
+def sync_semantic_index_task():
+    """Index standups and blockers that arrived outside the analyze endpoint (imports, bulk loads)"""
+    return semantic_index.sync()
+
+@celery_app.task
+def resync_jira_issues_task():
+    """Periodic delta resync of the local Jira issue mirror"""
+    return jira_mirror.resync_all()
+
+@celery_app.task
+def apply_retention_task():
+    """Archive analysis logs and raw AI output past their retention age"""
+    return retention_service.apply()
+
+@celery_app.task
+def close_due_sessions_task():
+    """Close sessions past their cutoff and queue their analysis in rate-limited waves"""
+    result = session_scheduler.close_due_sessions()
+    plan = result.pop("plan")
+    for task in plan:
+        worker = process_session_response_task if task["kind"] == "analysis" else summarize_session_task
+        worker.apply_async(args=[task["id"]], countdown=task["countdown"])
+    # Sessions whose dispatch fails before this line stay "planned" and are re-planned by a later run
+    session_scheduler.mark_dispatched(sorted({task["session_id"] for task in plan}))
+    return result
+
+@celery_app.task(bind=True, max_retries=3, default_retry_delay=30)
+def process_session_response_task(self, response_id):
+    """Analyze one response from a closed session"""
+    try:
+        return session_scheduler.process_response(response_id)
+    except Exception as e:
+        raise self.retry(exc=e)
+
+@celery_app.task(bind=True, max_retries=5)
+def summarize_session_task(self, session_id):
+    """Summarize a closed session once its analyses are done"""
+    # Retried analyses can land after the planned summary slot; wait a wave, then summarize regardless
+    if session_scheduler.pending_analyses(session_id) and self.request.retries < self.max_retries:
+        raise self.retry(countdown=session_scheduler.wave_seconds)
+    return session_scheduler.summarize_session(session_id)
+
+@celery_app.task
+def flush_slack_outbox_task():
+    """Queue one digest delivery per Slack target whose coalescing window has closed"""
+    targets = slack_notifier.due_targets() if slack_notifier.configured else []
+    for position, (target_type, target) in enumerate(targets):
+        # Spread across the beat interval at the configured send rate instead of bursting
+        deliver_slack_digest_task.apply_async(args=[target_type, target], countdown=position / slack_notifier.rate)
+    return {"targets": len(targets)}
+
+@celery_app.task(bind=True, max_retries=slack_notifier.max_attempts)
+def deliver_slack_digest_task(self, target_type, target):
+    """Send a target's pending items as one digest, retrying after the backoff Slack or the notifier asks for"""
+    result = slack_notifier.deliver(target_type, target)
+    if result["retry_in"] is not None and self.request.retries < self.max_retries:
+        raise self.retry(countdown=result["retry_in"])
+    return result
@@ -0,0 +1,57 @@
+"""
+Bulk-load standup history, or synthesize large datasets for benchmarking.
+
+    python bulk_load.py import history.csv
+    python bulk_load.py import history.jsonl --chunk-size 100000
+    python bulk_load.py generate --projects 20 --developers 10 --days 730 --seed 7
+    python bulk_load.py generate --days 365 --output synthetic.jsonl
+
+Records have one standup response each: project_key, project_name, date, developer_email,
+developer_name, what_did_i_do, what_will_i_do, blockers, sentiment_score, risk_level, created_at.
+"""
+import argparse
+
+from app.services.bulk_loader import BulkLoader, read_records, generate_records, write_records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk standup import and synthetic data generation")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="load standups from a CSV or JSONL file")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--format", choices=["csv", "jsonl"], help="defaults to the file extension")
+    import_parser.add_argument("--chunk-size", type=int, default=50000)
+
+    generate_parser = subparsers.add_parser("generate", help="synthesize standups with a fixed seed")
+    generate_parser.add_argument("--projects", type=int, default=5)
+    generate_parser.add_argument("--developers", type=int, default=8, help="developers per project")
+    generate_parser.add_argument("--days", type=int, default=730)
+    generate_parser.add_argument("--seed", type=int, default=42)
+    generate_parser.add_argument("--blocker-rate", type=float, default=0.15)
+    generate_parser.add_argument("--output", help="write CSV/JSONL here instead of loading the database")
+    generate_parser.add_argument("--chunk-size", type=int, default=50000)
+
+    args = parser.parse_args()
+
+    if args.command == "import":
+        records = read_records(args.path, args.format)
+    else:
+        records = generate_records(projects=args.projects, developers=args.developers, days=args.days,
+                                   seed=args.seed, blocker_rate=args.blocker_rate)
+        if args.output:
+            count = write_records(records, args.output)
+            print(f"Wrote {count} synthetic standup records to {args.output}")
+            return
+
+    stats = BulkLoader(chunk_size=args.chunk_size).load(records)
+    print(f"Loaded {stats['responses']} standup responses, {stats['sessions']} sessions, "
+          f"{stats['blocked_items']} blocked items and {stats['projects']} new projects "
+          f"in {stats['seconds']}s")
+    if stats["duplicates"]:
+        print(f"Skipped {stats['duplicates']} records already loaded for the same project, date and developer")
+    print("Run POST /api/issues/links/backfill to link issue keys in the imported standups")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+# Multi-process mode: gunicorn main:app -c gunicorn.conf.py
+# The app is imported once in the master, shared data is warmed, then one worker per core is forked.
+import os
+import multiprocessing
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+
+
+def when_ready(server):
+    # Runs in the master after the preloaded app is imported and before the first fork
+    from app.prefork import warm_shared_state
+    warm_shared_state()
+
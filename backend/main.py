@@ -1,14 +1,38 @@
 import os
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from typing import List, Dict, Any, Optional
+from datetime import date, datetime, timedelta
 import json
+import math
+import asyncio
 
-from app.models import get_db, init_db, StandupResponse, StandupSession, Project
+from app.models import get_db, get_async_db, dispose_async_engine, init_db, SessionLocal, StandupResponse, StandupSession, Project, AIConfig, BlockedItem
 from app.services.groq_analysis import groq_service
 from app.services.ai_analysis import ai_service
-from app.services.jira_service import JiraService
+from app.services.jira_service import get_jira_service
+from app.services.jira_mirror import jira_mirror, verify_webhook_signature
+from app.services.issue_linker import issue_linker
+from app.services.burndown import burndown_engine
+from app.services.dashboard_service import dashboard_service
+from app.services.retention import retention_service
+from app.services.usage_analytics import usage_analytics
+from app.services.trend_analytics import trend_analytics
+from app.services.single_flight import single_flight
+from app.services.model_router import model_router
+from app.services.config_cache import config_cache, AI_CONFIG_FIELDS
+from app.services.session_scheduler import session_scheduler
+from app.services.live_board import live_board, response_event, blocker_event
+from app.services.semantic_index import semantic_index
+from app.services.analysis_store import analysis_store
+from app.services.admission import admission_controller, Overloaded, local_analysis
+from app.services.slack_notifier import slack_notifier
+from app.tasks import close_due_sessions_task, process_session_response_task
 
 # Initialize database
 init_db()
@@ -32,6 +56,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("shutdown")
+async def shutdown():
+    await dispose_async_engine()
+
 # Health check endpoint
 @app.get("/")
 async def root():
@@ -46,12 +74,48 @@ async def health_check():
     return {"status": "healthy", "frontend_url": FRONTEND_URL}
 
 # Standup endpoints
+def _index_new_standups(db: Session):
+    # The index is a derived cache; a failure here must not fail the submission, and a submission
+    # never waits on another worker's sync (the host-wide write lock) - the scheduled sync catches up
+    try:
+        semantic_index.sync(db, wait=False)
+    except Exception as e:
+        db.rollback()
+        print(f"Semantic index sync failed, the scheduled sync will catch up: {e}")
+
+def _request_timeout(request: Request) -> Optional[float]:
+    # Clients may say how long they will wait (seconds); we stop queuing before that.
+    # nan/inf/negative values would disable the deadline checks, so they are ignored
+    try:
+        timeout = float(request.headers["X-Request-Timeout"])
+    except (KeyError, ValueError):
+        return None
+    return timeout if math.isfinite(timeout) and timeout > 0 else None
+
+def _deferred_analysis(db: Session, db_response: StandupResponse, analysis_data: Dict[str, Any],
+                       overload: Overloaded) -> JSONResponse:
+    """The response is already saved; queue its real analysis and answer now with a local one"""
+    deferred = os.getenv("ANALYZE_DEFER_ON_SHED", "true").lower() == "true"
+    if deferred:
+        response_id, countdown = db_response.id, float(os.getenv("ANALYZE_DEFER_SECONDS", "60"))
+        admission_controller.defer(lambda: process_session_response_task.apply_async(
+            args=[response_id], countdown=countdown, retry=False, ignore_result=True), f"response {response_id}")
+    result = local_analysis(analysis_data)
+    db_response.has_blockers = bool(result['critical_blockers'])
+    db.commit()
+    live_board.publish(db_response.session_id, "analysis_deferred", response_event(db_response))
+    result["metadata"] = {"model": "local", "deferred": deferred, "shed_reason": overload.reason,
+                          "response_id": db_response.id}
+    return JSONResponse(status_code=202, content=result,
+                        headers={"Retry-After": str(max(1, int(overload.retry_after)))})
+
 @app.post("/api/standup/analyze")
-async def analyze_standup(response_data: Dict[str, Any], db: Session = Depends(get_db)):
+def analyze_standup(response_data: Dict[str, Any], request: Request, db: Session = Depends(get_db)):
     """Analyze a single standup response"""
     try:
         # Save to database first
         db_response = StandupResponse(
+            session_id=response_data.get('session_id'),
             developer_email=response_data.get('developer_email'),
             developer_name=response_data.get('developer_name'),
             what_did_i_do=response_data.get('what_did_i_do'),
@@ -61,6 +125,12 @@ async def analyze_standup(response_data: Dict[str, Any], db: Session = Depends(g
         db.add(db_response)
         db.commit()
         db.refresh(db_response)
+
+        # Link any Jira issue keys mentioned in the update
+        issue_linker.link_response(db, db_response)
+        db.commit()
+        live_board.publish(db_response.session_id, "response_submitted", response_event(db_response))
+        _index_new_standups(db)
         
         # Analyze with AI
         analysis_data = response_data.copy()
@@ -69,21 +139,31 @@ async def analyze_standup(response_data: Dict[str, Any], db: Session = Depends(g
             'session_id': response_data.get('session_id'),
             'project_id': response_data.get('project_id')
         })
+        analysis_data['history_context'] = semantic_index.prompt_context(db, analysis_data)
         
-        # Use Groq if available, otherwise OpenAI
+        # Use Groq if available, otherwise OpenAI; shed to a deferred analysis when providers are saturated
         try:
-            analysis_result = groq_service.analyze_standup_response(analysis_data)
-        except:
-            analysis_result = ai_service.analyze_standup_response(analysis_data)
+            with admission_controller.admit(response_data.get('project_id'), _request_timeout(request)):
+                try:
+                    analysis_result = groq_service.analyze_standup_response(analysis_data)
+                except:
+                    analysis_result = ai_service.analyze_standup_response(analysis_data)
+        except Overloaded as e:
+            return _deferred_analysis(db, db_response, analysis_data, e)
         
         # Update response with analysis
+        opened = []
         if 'error' not in analysis_result:
-            db_response.sentiment_score = analysis_result.get('sentiment_score')
-            db_response.risk_level = analysis_result.get('risk_level')
-            db_response.confidence_score = analysis_result.get('confidence_score')
-            db_response.ai_analysis = analysis_result
-            db_response.has_blockers = bool(analysis_result.get('critical_blockers'))
+            opened = analysis_store.save(db, db_response, analysis_result, response_data.get('project_id'))
+            db.commit()
+        live_board.publish(db_response.session_id,
+                           "analysis_failed" if 'error' in analysis_result else "analysis_completed",
+                           response_event(db_response))
+        for item in opened:
+            live_board.publish(item.session_id, "blocker_opened", blocker_event(item))
+        if slack_notifier.notify_blockers(db, response_data.get('project_id'), opened):
             db.commit()
+        dashboard_service.invalidate(response_data.get('project_id'))
         
         return analysis_result
         
@@ -91,25 +171,285 @@ async def analyze_standup(response_data: Dict[str, Any], db: Session = Depends(g
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/standup/analyze/stats")
+def get_analyze_admission_stats():
+    """Queue depth, in-flight calls and shed counts for the analysis endpoint in this worker"""
+    return admission_controller.get_stats()
+
 @app.get("/api/standup/responses")
-async def get_standup_responses(db: Session = Depends(get_db)):
+async def get_standup_responses(db: AsyncSession = Depends(get_async_db)):
     """Get all standup responses"""
-    responses = db.query(StandupResponse).all()
-    return responses
+    result = await db.execute(select(StandupResponse))
+    return result.scalars().all()
+
+@app.get("/api/standup/responses/{response_id}/analysis")
+def get_standup_analysis(response_id: int, db: Session = Depends(get_db)):
+    """Full AI analysis for a response, read from the archive if it has been moved there"""
+    analysis = retention_service.get_raw_analysis(db, response_id)
+    if analysis is None:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    return analysis
+
+@app.get("/api/standup/analysis/items")
+def get_analysis_items(kind: Optional[str] = None, project_id: Optional[int] = None,
+                       session_id: Optional[int] = None, days: Optional[int] = None, limit: int = 100,
+                       db: Session = Depends(get_db)):
+    """Achievements, planned work, blockers or suggested actions across analyses, newest first"""
+    if not 1 <= limit <= 1000:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 1000")
+    since = datetime.utcnow() - timedelta(days=days) if days else None
+    try:
+        return {"items": analysis_store.items(db, kind, project_id, session_id, since, limit)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/api/standup/analysis/backfill")
+def backfill_analysis_items(limit: Optional[int] = None, db: Session = Depends(get_db)):
+    """Move lists out of analyses stored before normalization and compress their raw JSON"""
+    try:
+        return analysis_store.backfill(db, limit)
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/notifications/stats")
+def get_notification_stats(db: Session = Depends(get_db)):
+    """Slack outbox counts by status and delivery counters for this worker"""
+    return slack_notifier.get_stats(db)
+
+@app.post("/api/notifications/flush")
+def flush_notifications(force: bool = False):
+    """Send due Slack digests now; force=true also sends targets still inside the coalescing window"""
+    if not slack_notifier.configured:
+        raise HTTPException(status_code=400, detail="SLACK_BOT_TOKEN is not configured")
+    try:
+        return slack_notifier.flush(force=force)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/standup/similar")
+def get_similar_standups(project_id: int, text: str, k: int = 5, kind: Optional[str] = None,
+                         db: Session = Depends(get_db)):
+    """Past responses and blockers in the project most similar to the given text"""
+    if not 1 <= k <= 50:
+        raise HTTPException(status_code=400, detail="k must be between 1 and 50")
+    try:
+        return {"results": semantic_index.similar(db, project_id, text, k=k, kind=kind)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/standup/responses/{response_id}/similar")
+def get_similar_to_response(response_id: int, k: int = 5, kind: Optional[str] = None,
+                            db: Session = Depends(get_db)):
+    """Earlier responses and blockers that resemble this response"""
+    response = db.get(StandupResponse, response_id)
+    if response is None:
+        raise HTTPException(status_code=404, detail="Response not found")
+    if not 1 <= k <= 50:
+        raise HTTPException(status_code=400, detail="k must be between 1 and 50")
+    session = db.get(StandupSession, response.session_id) if response.session_id else None
+    text = response.blockers if response.has_blockers and response.blockers else \
+        "\n".join(p for p in (response.what_did_i_do, response.what_will_i_do, response.blockers) if p)
+    try:
+        results = semantic_index.similar(db, session.project_id if session else 0, text, k=k, kind=kind,
+                                         before=response.created_at, exclude=("response", response.id))
+        return {"response_id": response_id, "results": results}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/standup/index/stats")
+def get_semantic_index_stats():
+    """Size, watermarks and query counters of the local similarity index"""
+    return semantic_index.get_stats()
+
+@app.post("/api/standup/index/sync")
+def sync_semantic_index(rebuild: bool = False, db: Session = Depends(get_db)):
+    """Index standups added since the last sync, or re-embed everything with rebuild=true"""
+    try:
+        return semantic_index.rebuild(db) if rebuild else semantic_index.sync(db)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _board_snapshot(session_id: int) -> Optional[Dict[str, Any]]:
+    db = SessionLocal()
+    try:
+        return live_board.snapshot(db, session_id)
+    finally:
+        db.close()
+
+async def _wait_for_disconnect(websocket: WebSocket):
+    # Clients only listen; anything they send (e.g. keepalives) is ignored
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+@app.websocket("/ws/standup/{session_id}")
+async def standup_board(websocket: WebSocket, session_id: int):
+    """Live board for a session: a snapshot on connect, then submissions, analyses and blocker updates"""
+    await websocket.accept()
+    # Subscribe before taking the snapshot so nothing published in between is missed
+    subscriber = live_board.subscribe(session_id)
+    disconnected = asyncio.create_task(_wait_for_disconnect(websocket))
+    try:
+        snapshot = await run_in_threadpool(_board_snapshot, session_id)
+        if snapshot is None:
+            await websocket.close(code=4404, reason="Session not found")
+            return
+        await websocket.send_json({"type": "snapshot", "session_id": session_id, "data": snapshot})
+        while not disconnected.done():
+            next_event = asyncio.ensure_future(subscriber.queue.get())
+            done, _ = await asyncio.wait({next_event, disconnected}, timeout=live_board.ping_seconds,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if next_event in done:
+                await websocket.send_text(next_event.result())
+            else:
+                next_event.cancel()
+                if not done:
+                    await websocket.send_json({"type": "ping"})
+    except Exception as e:
+        if not disconnected.done():
+            print(f"Live board connection for session {session_id} closed: {e}")
+    finally:
+        disconnected.cancel()
+        live_board.unsubscribe(session_id, subscriber)
+
+@app.get("/api/standup/board/stats")
+async def get_board_stats():
+    """Live board subscribers and delivery counters for this worker"""
+    return live_board.get_stats()
+
+# Blocker endpoints
+@app.patch("/api/blockers/{blocker_id}")
+def update_blocker(blocker_id: int, update: Dict[str, Any], db: Session = Depends(get_db)):
+    """Change a blocker's status, severity or assignee and notify the session's live board"""
+    status = update.get('status')
+    if status is not None and status not in ("open", "in-progress", "resolved", "escalated"):
+        raise HTTPException(status_code=400, detail="status must be open, in-progress, resolved or escalated")
+    try:
+        item = db.get(BlockedItem, blocker_id)
+        if item is None:
+            raise HTTPException(status_code=404, detail="Blocker not found")
+        for field in ("status", "severity", "assigned_to"):
+            if field in update:
+                setattr(item, field, update[field])
+        if status is not None:
+            item.resolved_at = datetime.utcnow() if status == "resolved" else None
+        db.commit()
+        session = db.get(StandupSession, item.session_id) if item.session_id else None
+        live_board.publish(item.session_id, "blocker_updated", blocker_event(item))
+        dashboard_service.invalidate(session.project_id if session else None)
+        return blocker_event(item)
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Dashboard endpoints
+@app.get("/api/dashboard")
+def get_dashboard(request: Request, project_id: Optional[int] = None, db: Session = Depends(get_db)):
+    """Session stats, risk distribution, open blockers and recent sentiment in one call"""
+    try:
+        payload, etag = dashboard_service.get_snapshot(db, project_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("If-None-Match") == etag:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(payload, headers=headers)
 
 # Jira endpoints
 @app.get("/api/jira/issues/{project_key}")
-async def get_jira_issues(project_key: str):
+def get_jira_issues(project_key: str, db: Session = Depends(get_db)):
     """Get Jira issues for a project"""
     try:
-        jira_service = JiraService(
-            base_url=os.environ.get("JIRA_URL"),
-            email=os.environ.get("JIRA_EMAIL"),
-            api_token=os.environ.get("JIRA_API_TOKEN")
-        )
-        issues = jira_service.get_in_progress_issues(project_key)
-        return {"issues": issues}
+        # Served from the webhook-fed mirror once the project has been synced
+        if jira_mirror.is_mirrored(db, project_key):
+            return {"issues": jira_mirror.get_in_progress_issues(db, project_key), "source": "mirror"}
+        issues = get_jira_service().get_in_progress_issues(project_key)
+        return {"issues": issues, "source": "jira"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/jira/webhook")
+async def jira_webhook(request: Request, token: Optional[str] = None, db: Session = Depends(get_db)):
+    """Ingest Jira issue created/updated/deleted events into the local issue mirror"""
+    body = await request.body()
+    if not verify_webhook_signature(body, request.headers.get("X-Hub-Signature"), token):
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
+    try:
+        event = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Webhook body must be JSON")
+    try:
+        return await run_in_threadpool(jira_mirror.apply_webhook_event, db, event)
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/jira/resync/{project_key}")
+def resync_jira_project(project_key: str, db: Session = Depends(get_db)):
+    """Pull issues changed since the last sync into the local mirror"""
+    try:
+        return jira_mirror.resync_project(db, project_key)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Sprint burndown endpoints
+@app.get("/api/sprints")
+def get_sprints(project_key: Optional[str] = None, db: Session = Depends(get_db)):
+    """Sprints known from the issue mirror with their current totals"""
+    return {"sprints": burndown_engine.list_sprints(db, project_key)}
+
+@app.get("/api/sprints/{sprint_id}/burndown")
+def get_sprint_burndown(sprint_id: int, db: Session = Depends(get_db)):
+    """Chart-ready burndown: daily remaining, completed and scope points against the ideal line"""
+    chart = burndown_engine.chart(db, sprint_id)
+    if chart is None:
+        raise HTTPException(status_code=404, detail="Sprint not found")
+    return chart
+
+@app.post("/api/sprints/{sprint_id}/burndown/reconcile")
+def reconcile_sprint_burndown(sprint_id: int, db: Session = Depends(get_db)):
+    """Recount the sprint from mirrored issues and record any drift as today's change"""
+    try:
+        return burndown_engine.reconcile(db, sprint_id)
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Issue link endpoints
+@app.get("/api/issues/stale")
+def get_stale_issues(days: int = 3, project_key: Optional[str] = None, db: Session = Depends(get_db)):
+    """Open issues with no standup mentions in the last N days"""
+    try:
+        return {"days": days, "issues": issue_linker.issues_without_activity(db, days, project_key)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/issues/{issue_key}/standups")
+def get_issue_standups(issue_key: str, limit: int = 50, db: Session = Depends(get_db)):
+    """Standup responses mentioning a Jira issue, newest first"""
+    try:
+        return {"issue_key": issue_key.upper(), "standups": issue_linker.standups_mentioning(db, issue_key, limit)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/issues/links/backfill")
+def backfill_issue_links(db: Session = Depends(get_db)):
+    """Scan existing standup responses for issue keys"""
+    try:
+        return {"responses_linked": issue_linker.backfill(db)}
+    except Exception as e:
+        db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 # AI endpoints
@@ -119,9 +459,189 @@ async def get_ai_models():
     return {
         "openai_available": bool(os.environ.get("OPENAI_API_KEY")),
         "groq_available": bool(os.environ.get("GROQ_API_KEY")),
-        "default_model": os.environ.get("GROQ_MODEL", "gpt-3.5-turbo")
+        "default_model": os.environ.get("GROQ_MODEL", "gpt-3.5-turbo"),
+        "tiers": model_router.models
     }
 
+@app.get("/api/projects/{project_id}/ai-config")
+def get_project_ai_config(project_id: int):
+    """The project's active AIConfig, as the AI services see it"""
+    if config_cache.get_project(project_id) is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return config_cache.get_ai_config(project_id) or {"project_id": project_id, "configured": False}
+
+@app.put("/api/projects/{project_id}/ai-config")
+def update_project_ai_config(project_id: int, settings: Dict[str, Any], db: Session = Depends(get_db)):
+    """Create or update the project's active AIConfig; every worker picks it up on its next lookup"""
+    editable = set(AI_CONFIG_FIELDS) - {"id", "project_id"}
+    unknown = sorted(set(settings) - editable)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown AIConfig field(s): {', '.join(unknown)}")
+    if settings.get('analysis_depth') not in (None, "basic", "standard", "detailed"):
+        raise HTTPException(status_code=400, detail="analysis_depth must be basic, standard or detailed")
+    try:
+        if db.get(Project, project_id) is None:
+            raise HTTPException(status_code=404, detail="Project not found")
+        config = db.query(AIConfig).filter(AIConfig.project_id == project_id, AIConfig.is_active == True) \
+            .order_by(AIConfig.id.desc()).first()
+        if config is None:
+            config = AIConfig(project_id=project_id, is_active=True)
+            db.add(config)
+        for field, value in settings.items():
+            setattr(config, field, value)
+        db.commit()
+        return {f: getattr(config, f) for f in AI_CONFIG_FIELDS}
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/config/cache/stats")
+async def get_config_cache_stats():
+    """Hit rate, version and age of the per-project config cache"""
+    return config_cache.get_stats()
+
+@app.get("/api/ai/tiers")
+def get_ai_tier_usage(project_id: Optional[int] = None,
+                      start_date: Optional[date] = None,
+                      end_date: Optional[date] = None,
+                      db: Session = Depends(get_db)):
+    """Latency, tokens and estimated cost per model tier"""
+    try:
+        return model_router.tier_report(db, project_id, start_date, end_date)
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/ai/single-flight/stats")
+async def get_single_flight_stats():
+    """How many provider calls were collapsed into a shared in-flight request"""
+    return {"redis_enabled": single_flight.use_redis, **single_flight.stats}
+
+# Analytics endpoints
+@app.get("/api/analytics/usage")
+def get_usage_analytics(project_id: Optional[int] = None,
+                              model: Optional[str] = None,
+                              start_date: Optional[date] = None,
+                              end_date: Optional[date] = None,
+                              group_by: str = "project,model,day",
+                              db: Session = Depends(get_db)):
+    """Token totals, error rates and latency percentiles from AI analysis logs"""
+    dimensions = [d.strip() for d in group_by.split(",") if d.strip()]
+    try:
+        return usage_analytics.usage_summary(
+            db, project_id=project_id, model=model,
+            start_date=start_date, end_date=end_date, group_by=dimensions
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/analytics/logs")
+def get_analysis_logs(start_date: date,
+                            end_date: Optional[date] = None,
+                            project_id: Optional[int] = None,
+                            limit: int = Query(100, ge=1, le=1000),
+                            db: Session = Depends(get_db)):
+    """Raw AI analysis log rows, including those already moved to archive partitions"""
+    start = datetime.combine(start_date, datetime.min.time())
+    end = datetime.combine(end_date, datetime.min.time()) + timedelta(days=1) if end_date else None
+    try:
+        rows = []
+        for row in retention_service.iter_analysis_logs(db, start, end, project_id):
+            rows.append(row)
+            if len(rows) >= limit:
+                break
+        return {"logs": rows, "truncated": len(rows) >= limit}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/analytics/trends")
+def get_sentiment_trends(project_id: Optional[int] = None,
+                         scope: str = "team",
+                         developer_email: Optional[str] = None,
+                         days: int = 90,
+                         end_date: Optional[date] = None,
+                         db: Session = Depends(get_db)):
+    """Sentiment, blocker and risk time series per team or developer, with anomaly flags"""
+    if not 1 <= days <= 730:
+        raise HTTPException(status_code=400, detail="days must be between 1 and 730")
+    try:
+        return trend_analytics.trends(db, project_id, scope, developer_email, days, end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/analytics/anomalies")
+def get_sentiment_anomalies(project_id: Optional[int] = None, days: int = 30, end_date: Optional[date] = None,
+                            db: Session = Depends(get_db)):
+    """Sudden sentiment drops and rising blocker rates, newest first"""
+    if not 1 <= days <= 730:
+        raise HTTPException(status_code=400, detail="days must be between 1 and 730")
+    try:
+        return {"anomalies": trend_analytics.anomalies(db, project_id, days, end_date)}
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/analytics/trends/refresh")
+def refresh_sentiment_trends(db: Session = Depends(get_db)):
+    """Rebuild the daily sentiment aggregates for days touched since the last refresh"""
+    try:
+        return trend_analytics.refresh(db)
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/analytics/usage/refresh")
+def refresh_usage_analytics(db: Session = Depends(get_db)):
+    """Fold new AI analysis logs into the daily usage rollups"""
+    try:
+        return {"rows_folded": usage_analytics.refresh_rollups(db)}
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Session scheduling endpoints
+@app.get("/api/schedules")
+def get_schedules(db: Session = Depends(get_db)):
+    """Per-project standup cutoffs and when each will next close"""
+    return {"schedules": session_scheduler.list_schedules(db), "wave_capacity": session_scheduler.wave_capacity,
+            "wave_seconds": session_scheduler.wave_seconds}
+
+@app.put("/api/schedules/{project_id}")
+def update_schedule(project_id: int, schedule: Dict[str, Any], db: Session = Depends(get_db)):
+    """Set a project's cutoff_time (HH:MM), timezone and is_active"""
+    try:
+        return session_scheduler.upsert_schedule(db, project_id, cutoff_time=schedule.get('cutoff_time'),
+                                                 timezone=schedule.get('timezone'),
+                                                 is_active=schedule.get('is_active'))
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/schedules/progress")
+def get_schedule_progress(day: Optional[date] = None, project_id: Optional[int] = None,
+                          db: Session = Depends(get_db)):
+    """Analysis and summary progress of sessions closed by the scheduler"""
+    return session_scheduler.progress(db, day, project_id)
+
+@app.post("/api/schedules/run")
+def run_schedules():
+    """Close any sessions already past their cutoff now instead of waiting for the next beat"""
+    try:
+        return {"task_id": close_due_sessions_task.delay().id}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 if __name__ == "__main__":
     import uvicorn
     port = int(os.environ.get("PORT", 8000))
@@ -0,0 +1,93 @@
+"""
+Local mock of the Jira search API for developing against JiraService.
+
+    python mock_jira_server.py --port 8089 --issues 250
+    JIRA_URL=http://localhost:8089 uvicorn main:app
+"""
+import argparse
+import hashlib
+import json
+import re
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+STATUSES = [("To Do", "new"), ("In Progress", "indeterminate"), ("Done", "done")]
+DEVELOPERS = ["john.doe@example.com", "jane.smith@example.com", "mike.lee@example.com"]
+
+
+def build_issues(project_key, count):
+    issues = []
+    for n in range(1, count + 1):
+        status, category = STATUSES[n % len(STATUSES)]
+        issues.append({
+            "id": str(10000 + n),
+            "key": f"{project_key}-{n}",
+            "fields": {
+                "summary": f"Mock issue {n}",
+                "status": {"name": status, "statusCategory": {"key": category}},
+                "assignee": {"emailAddress": DEVELOPERS[n % len(DEVELOPERS)]},
+                "updated": "2024-01-01T09:00:00.000+0000",
+                "customfield_10016": float(n % 5 + 1),
+                "customfield_10020": [{"id": 1, "name": "Sprint 1", "state": "active",
+                                       "startDate": "2024-01-01T00:00:00.000Z",
+                                       "endDate": "2024-01-14T00:00:00.000Z"}],
+            },
+        })
+    return issues
+
+
+class MockJiraHandler(BaseHTTPRequestHandler):
+    issues_per_project = 250
+    request_count = 0
+
+    def do_GET(self):
+        type(self).request_count += 1
+        url = urlparse(self.path)
+        if url.path != "/rest/api/2/search":
+            self.send_error(404)
+            return
+        params = parse_qs(url.query)
+        jql = params.get("jql", [""])[0]
+        start_at = int(params.get("startAt", ["0"])[0])
+        max_results = min(int(params.get("maxResults", ["50"])[0]), 100)
+
+        match = re.search(r'project\s*=\s*"?(\w+)"?', jql)
+        issues = build_issues(match.group(1) if match else "PROJ", self.issues_per_project)
+        if "In Progress" in jql:
+            issues = [i for i in issues if i["fields"]["status"]["statusCategory"]["key"] == "indeterminate"]
+
+        body = json.dumps({
+            "startAt": start_at,
+            "maxResults": max_results,
+            "total": len(issues),
+            "issues": issues[start_at:start_at + max_results],
+        }).encode()
+        # Each page has its own validator, so JiraService can revalidate pages independently
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock Jira search API")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--issues", type=int, default=250, help="issues generated per project")
+    args = parser.parse_args()
+
+    MockJiraHandler.issues_per_project = args.issues
+    server = ThreadingHTTPServer(("0.0.0.0", args.port), MockJiraHandler)
+    print(f"Mock Jira listening on http://localhost:{args.port}")
+    server.serve_forever()
@@ -0,0 +1,100 @@
+"""
+Local mock of Slack's chat.postMessage for developing against SlackNotifier.
+
+    python mock_slack_server.py --port 8090 --rate 1 --fail-rate 0.1
+    SLACK_BOT_TOKEN=xoxb-test SLACK_API_URL=http://localhost:8090/api uvicorn main:app
+
+Posted messages are listed at GET /api/_messages (DELETE clears them).
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+KNOWN_PREFIXES = ("C", "G", "D", "U", "W")
+
+
+class MockSlackHandler(BaseHTTPRequestHandler):
+    rate = 1.0  # Messages per second per channel, as Slack enforces
+    fail_rate = 0.0
+    messages = []
+    last_post = {}
+    lock = threading.Lock()
+
+    def do_GET(self):
+        if urlparse(self.path).path != "/api/_messages":
+            self.send_error(404)
+            return
+        with self.lock:
+            self._json(200, {"ok": True, "count": len(self.messages), "messages": self.messages})
+
+    def do_DELETE(self):
+        with self.lock:
+            del self.messages[:]
+            self.last_post.clear()
+        self._json(200, {"ok": True})
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/api/chat.postMessage":
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._json(200, {"ok": False, "error": "invalid_json"})
+            return
+        if not self.headers.get("Authorization", "").startswith("Bearer "):
+            self._json(200, {"ok": False, "error": "not_authed"})
+            return
+        if random.random() < self.fail_rate:
+            self._json(500, {"ok": False, "error": "internal_error"})
+            return
+        channel = payload.get("channel") or ""
+        if not channel.startswith(KNOWN_PREFIXES):
+            self._json(200, {"ok": False, "error": "channel_not_found"})
+            return
+        if not payload.get("text"):
+            self._json(200, {"ok": False, "error": "no_text"})
+            return
+
+        with self.lock:
+            now = time.monotonic()
+            wait = self.last_post.get(channel, 0) + 1.0 / self.rate - now
+            if wait > 0:
+                self._json(429, {"ok": False, "error": "ratelimited"}, {"Retry-After": str(max(1, round(wait)))})
+                return
+            self.last_post[channel] = now
+            ts = f"{time.time():.6f}"
+            self.messages.append({"channel": channel, "text": payload["text"], "ts": ts})
+        self._json(200, {"ok": True, "channel": channel, "ts": ts})
+
+    def _json(self, status, data, headers=None):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock Slack chat.postMessage API")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--rate", type=float, default=1.0, help="messages per second allowed per channel")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of posts answered with HTTP 500")
+    args = parser.parse_args()
+
+    MockSlackHandler.rate = args.rate
+    MockSlackHandler.fail_rate = args.fail_rate
+    server = ThreadingHTTPServer(("0.0.0.0", args.port), MockSlackHandler)
+    print(f"Mock Slack listening on http://localhost:{args.port}/api")
+    server.serve_forever()
@@ -1,9 +1,14 @@
 import streamlit as st
 import requests
+import pandas as pd
+import plotly.express as px
 import os
+from requests.adapters import HTTPAdapter
 
 # Configuration
 BACKEND_URL = os.environ.get("BACKEND_URL", "https://autoscrum-production.up.railway.app")
+CACHE_TTL_SECONDS = int(os.environ.get("DASHBOARD_CACHE_TTL", "30"))
+RISK_ORDER = ["low", "medium", "high", "critical", "unknown"]
 
 # Set page config
 st.set_page_config(
@@ -12,22 +17,86 @@ st.set_page_config(
     layout="wide"
 )
 
+@st.cache_resource
+def get_http_session():
+    """Keep-alive session shared by every rerun and browser tab"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=10)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+@st.cache_resource
+def get_etag_store():
+    """Last payload and ETag per dashboard query, used to revalidate with If-None-Match"""
+    return {}
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def fetch_dashboard(project_id):
+    """One conditional request per TTL; a 304 reuses the previous payload"""
+    store = get_etag_store()
+    cached = store.get(project_id)
+    headers = {"If-None-Match": cached["etag"]} if cached else {}
+    params = {"project_id": project_id} if project_id else {}
+    response = get_http_session().get(f"{BACKEND_URL}/api/dashboard", params=params, headers=headers, timeout=10)
+    if response.status_code == 304 and cached:
+        return cached["payload"]
+    response.raise_for_status()
+    payload = response.json()
+    store[project_id] = {"etag": response.headers.get("ETag"), "payload": payload}
+    return payload
+
+def render_dashboard(data):
+    stats = data["session_stats"]
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Standup sessions", stats["total"])
+    col2.metric("Completed", stats["by_status"].get("completed", 0))
+    col3.metric("Avg participants", stats["avg_participants"])
+    col4.metric("Open blockers", len(data["open_blockers"]))
+
+    left, right = st.columns(2)
+    with left:
+        st.subheader("Risk distribution")
+        risk = data["risk_distribution"]
+        if risk:
+            risk_df = pd.DataFrame({"risk_level": list(risk), "responses": list(risk.values())})
+            risk_df["risk_level"] = pd.Categorical(risk_df["risk_level"], RISK_ORDER, ordered=True)
+            st.plotly_chart(px.bar(risk_df.sort_values("risk_level"), x="risk_level", y="responses"),
+                            use_container_width=True)
+        else:
+            st.info("No analyzed standups yet.")
+    with right:
+        st.subheader("Recent sentiment")
+        if data["recent_sentiment"]:
+            sentiment_df = pd.DataFrame(data["recent_sentiment"])
+            fig = px.line(sentiment_df, x="date", y="average", markers=True)
+            fig.update_yaxes(range=[-1, 1])
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("No sentiment data in the selected window.")
+
+    st.subheader("Open blockers")
+    if data["open_blockers"]:
+        st.dataframe(pd.DataFrame(data["open_blockers"]), use_container_width=True, hide_index=True)
+    else:
+        st.success("No open blockers 🎉")
+
 def main():
     st.title("AutoScrum Dashboard")
     st.write("Welcome to AutoScrum - Your AI Agile Orchestration Tool")
-    
-    # Test connection to backend
+
+    project_id = st.sidebar.number_input("Project ID (0 = all projects)", min_value=0, value=0, step=1)
+    if st.sidebar.button("Refresh now"):
+        fetch_dashboard.clear()
+
     try:
-        response = requests.get(f"{BACKEND_URL}/health")
-        if response.status_code == 200:
-            st.success("✅ Connected to backend API successfully!")
-            st.json(response.json())
-        else:
-            st.error("❌ Backend connection failed")
+        data = fetch_dashboard(int(project_id) or None)
     except Exception as e:
         st.error(f"Connection error: {str(e)}")
-    
-    # Add your actual app functionality here
+        return
+
+    st.sidebar.caption(f"Data generated at {data.get('generated_at', 'unknown')} UTC")
+    render_dashboard(data)
 
 if __name__ == "__main__":
     main()